@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -52,6 +53,7 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'team.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'team.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'skillmatch.urls'
@@ -94,6 +97,31 @@ DATABASES = {
 }
 
 
+# Caches
+# "llm" holds Gemini responses on disk so repeat prompts survive restarts;
+# MAX_ENTRIES bounds its size, TIMEOUT is the response TTL.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'llm': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'llm',
+        'TIMEOUT': 7 * 24 * 3600,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# rendered /api/skills/ and /api/teams/ list bodies, keyed by their ETag (see team/versions.py)
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 600
+
+LLM_CACHE_ALIAS = 'llm'
+LLM_CACHE_TIMEOUT = 7 * 24 * 3600
+LLM_CACHE_MEMORY_ENTRIES = 256
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,3 +164,101 @@ print(STATICFILES_DIRS)
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Skill matching
+# SKILL_MATCH_ENGINE picks the /api/match/ scorer: 'index' (in-memory inverted index),
+# 'shared' (memory-mapped snapshot shared by all worker processes, see team/skill_matrix.py),
+# 'sql' (aggregated and limited in the database) or 'orm' (row-by-row Python loop)
+SKILL_MATCH_ENGINE = 'index'
+SKILL_MATCH_DEFAULT_LIMIT = 100
+BULK_SET_SKILLS_CHUNK_SIZE = 500
+
+# 'shared' engine: snapshot file, and how many replayed changes or seconds of age trigger a background rebuild
+SKILL_MATRIX_PATH = BASE_DIR / '.cache' / 'skill_matrix.bin'
+SKILL_MATRIX_MAX_OVERLAY = 50000
+SKILL_MATRIX_MAX_AGE = 3600
+
+# Gemini calls from the async views (ASGI): max concurrent calls per worker and per-call timeout in seconds
+LLM_MAX_CONCURRENCY = 100
+LLM_TIMEOUT = 30
+
+# Background jobs (manage.py run_jobs)
+JOBS_WORKERS = 4
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_BACKOFF = 5  # seconds, doubled on every retry
+JOBS_LEASE_SECONDS = 300  # running jobs older than this are assumed crashed and re-claimed
+JOBS_LONG_POLL_MAX = 30
+
+# Skill extraction (/api/extract-skills/?mode=local|llm|hybrid)
+SKILL_EXTRACTION_MODE = 'llm'
+# hybrid mode calls Gemini when the share of tech-looking terms the dictionary recognised is below this
+SKILL_EXTRACTION_HYBRID_MIN_RECALL = 0.6
+# alias -> canonical skill name, matched by the local extractor alongside Skill.name
+SKILL_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'nodejs': 'node.js',
+    'node': 'node.js',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'golang': 'go',
+    'postgres': 'postgresql',
+    'psql': 'postgresql',
+    'k8s': 'kubernetes',
+    'google cloud': 'gcp',
+    'google cloud platform': 'gcp',
+    'amazon web services': 'aws',
+    'c sharp': 'c#',
+    'cpp': 'c++',
+    'py': 'python',
+    'drf': 'django rest framework',
+    'sklearn': 'scikit-learn',
+}
+
+# Skill terms in /api/match/, set-skills and extraction that match no name or alias
+# resolve to the closest one by trigram similarity (0-1) if it is at least this close
+SKILL_FUZZY_MIN_SIMILARITY = 0.6
+
+# Keyset paging on /api/users/ and /api/match/: page size when only ?cursor= is given, and the cap;
+# rows loaded per query when streaming NDJSON (Accept: application/x-ndjson)
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_STREAM_CHUNK_SIZE = 500
+
+# /api/changes/: default and maximum changes per page
+CHANGE_FEED_PAGE_SIZE = 500
+CHANGE_FEED_MAX_PAGE_SIZE = 5000
+
+# /api/skills/suggest/: default and maximum number of suggestions
+SKILL_SUGGEST_LIMIT = 10
+SKILL_SUGGEST_MAX_LIMIT = 50
+
+# Batch extraction (/api/extract-skills/batch/)
+EXTRACT_BATCH_MAX_DOCUMENTS = 500
+EXTRACT_BATCH_CONCURRENCY = 8  # Gemini calls in flight per request
+EXTRACT_BATCH_CHUNK_CHARS = 8000  # longer documents are split into chunks of this size
+EXTRACT_BATCH_PACK_CHARS = 6000  # short documents are packed into prompts up to this size
+EXTRACT_BATCH_PACK_DOCS = 10
+
+# /api/teams/<id>/candidates/: years of experience at which a skill gets full weight
+CANDIDATE_EXPERIENCE_CAP = 10
+
+# /api/readiness-matrix/: seconds a computed matrix is reused, and default page size
+READINESS_MATRIX_TTL = 300
+READINESS_MATRIX_PAGE_SIZE = 1000
+
+# `manage.py bench`: baseline file and how far p95 latency / peak memory may grow before failing
+BENCH_BASELINE = BASE_DIR / 'bench_baseline.json'
+BENCH_LATENCY_TOLERANCE = 0.25
+BENCH_MEMORY_TOLERANCE = 0.25
+BENCH_MIN_DELTA_MS = 5  # p95 growth smaller than this is timer noise
+
+# /api/metrics/: per-route latency/DB/LLM histograms collected by team.middleware.MetricsMiddleware
+METRICS_ENABLED = True
+
+# ?profile=1 for staff: cProfile (or pyinstrument, if installed) captures plus SQL logs, newest N kept on disk
+PROFILING_ENABLED = True
+PROFILE_DIR = BASE_DIR / '.cache' / 'profiles'
+PROFILE_MAX_ENTRIES = 50
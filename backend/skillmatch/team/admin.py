@@ -1,3 +1,5 @@
 from django.contrib import admin
-from .models import UserSkill
+from .models import UserSkill, TeamReadiness, Job
 admin.site.register(UserSkill)
+admin.site.register(Job)
+admin.site.register(TeamReadiness)
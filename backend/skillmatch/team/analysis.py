@@ -0,0 +1,54 @@
+from django.conf import settings
+
+from .models import UserSkill
+from .skill_extractor import skill_extractor
+from .skill_resolver import skill_resolver
+
+'''
+Non-LLM halves of the gap analysis and extraction endpoints,
+shared by the views and the background job handlers.
+'''
+
+
+def skill_gap(user, team):
+    """Return (matched, missing, required) skill names for user against team."""
+    user_skills = set(UserSkill.objects.filter(user=user).values_list('skill__name', flat=True))
+    team_skills = set(team.required_skills.values_list('name', flat=True))
+    return sorted(user_skills & team_skills), sorted(team_skills - user_skills), sorted(team_skills)
+
+
+EXTRACTION_MODES = ('local', 'llm', 'hybrid')
+
+
+def extraction_mode(requested):
+    """Validate ?mode= / "mode", falling back to SKILL_EXTRACTION_MODE."""
+    mode = str(requested or getattr(settings, 'SKILL_EXTRACTION_MODE', 'llm')).lower()
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"mode must be one of {', '.join(EXTRACTION_MODES)}")
+    return mode
+
+
+def local_extraction(text, mode):
+    """
+    Run the dictionary extractor for mode and return (skills, needs_llm).
+    'llm' skips it, 'local' never asks the LLM, and 'hybrid' asks only when the
+    estimated recall is below SKILL_EXTRACTION_HYBRID_MIN_RECALL.
+    """
+    if mode == 'llm':
+        return [], True
+    matches = skill_extractor.find(text)
+    skills = sorted({canonical for _, _, canonical in matches})
+    if mode == 'local':
+        return skills, False
+    threshold = getattr(settings, 'SKILL_EXTRACTION_HYBRID_MIN_RECALL', 0.6)
+    return skills, skill_extractor.estimated_recall(text, matches) < threshold
+
+
+def merge_llm_skills(local_skills, llm_terms):
+    """
+    Map the model's skill terms to canonical names and add the dictionary hits.
+    Returns (skills, resolutions); terms the resolver does not know are kept as-is.
+    """
+    resolutions = skill_resolver.resolve_many(llm_terms)
+    skills = set(local_skills) | {r['skill'] or r['term'] for r in resolutions}
+    return sorted(skills), resolutions
@@ -0,0 +1,136 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import llm
+from .analysis import extraction_mode, local_extraction, merge_llm_skills
+from .models import Team, TeamReadiness, User, UserSkill
+
+'''
+Async versions of the Gemini-backed endpoints, for serving under ASGI
+(skillmatch/asgi.py). While a request waits on the model it holds no worker
+thread; only the short auth and ORM steps touch the thread pool.
+Same request and response shapes as skill_gap_analysis and SkillExtractionView.
+'''
+
+
+def _authenticate(request):
+    """
+    Run DRF's configured authenticators and parsers (token, session + CSRF)
+    over the Django request. Returns (user, data); user is None when anonymous.
+    """
+    drf_request = Request(
+        request,
+        parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    user = drf_request.user
+    if not user or not user.is_authenticated:
+        return None, None
+    return user, drf_request.data
+
+
+async def _authenticated_post(request):
+    """Returns (data, None) for an authenticated POST, else (None, error response)."""
+    if request.method != 'POST':
+        return None, JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    try:
+        user, data = await sync_to_async(_authenticate)(request)
+    except APIException as e:
+        return None, JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+    if user is None:
+        return None, JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+    return data, None
+
+
+@csrf_exempt
+async def skill_gap_analysis_async(request):
+    """
+    POST /api/async/skill-gap/
+    Same as /api/skill-gap/, awaiting Gemini instead of blocking a thread.
+    """
+    data, error = await _authenticated_post(request)
+    if error:
+        return error
+
+    user_id = data.get('user_id')
+    team_id = data.get('team_id')
+    if not user_id or not team_id:
+        return JsonResponse({'error': 'user_id and team_id required'}, status=400)
+
+    try:
+        user = await User.objects.aget(id=user_id)
+        team = await Team.objects.aget(id=team_id)
+    except User.DoesNotExist:
+        return JsonResponse({'error': 'User not found'}, status=400)
+    except Team.DoesNotExist:
+        return JsonResponse({'error': 'Team not found'}, status=400)
+
+    user_skills = {n async for n in UserSkill.objects.filter(user=user).values_list('skill__name', flat=True)}
+    team_skills = {n async for n in team.required_skills.values_list('name', flat=True)}
+
+    matched = sorted(user_skills & team_skills)
+    missing = sorted(team_skills - user_skills)
+    row = await TeamReadiness.objects.filter(user=user, team=team).afirst()
+    readiness = {
+        'matched_count': row.matched_count if row else 0,
+        'required_count': row.required_count if row else len(team_skills),
+        'score': round(row.score) if row else 0,
+    }
+
+    prompt = llm.gap_analysis_prompt(matched, team_skills)
+    try:
+        summary = await llm.agenerate(prompt, refresh=llm.wants_refresh(request))
+    except asyncio.TimeoutError:
+        summary = "Gemini AI summary failed: timed out"
+    except Exception as e:
+        summary = f"Gemini AI summary failed: {e}"
+
+    return JsonResponse({
+        'user': user.username,
+        'team': team.name,
+        'matched_skills': matched,
+        'missing_skills': missing,
+        'readiness': readiness,
+        'summary': summary
+    })
+
+
+@csrf_exempt
+async def extract_skills_async(request):
+    """
+    POST /api/async/extract-skills/
+    Same as /api/extract-skills/, awaiting Gemini instead of blocking a thread.
+    """
+    data, error = await _authenticated_post(request)
+    if error:
+        return error
+
+    text = data.get('text', '')
+    if not text:
+        return JsonResponse({'error': "Missing 'text' field"}, status=400)
+
+    try:
+        mode = extraction_mode(data.get('mode') or request.GET.get('mode'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    local_skills, needs_llm = await sync_to_async(local_extraction)(text, mode)
+    if not needs_llm:
+        return JsonResponse({'skills': local_skills, 'mode': mode, 'llm_used': False})
+
+    try:
+        raw_output = await llm.agenerate(llm.extraction_prompt(text), refresh=llm.wants_refresh(request))
+    except Exception as e:
+        error = 'Gemini AI timed out' if isinstance(e, asyncio.TimeoutError) else f'Gemini AI failed: {e}'
+        if mode == 'hybrid':
+            return JsonResponse({'skills': local_skills, 'mode': mode, 'llm_used': False, 'llm_error': error})
+        return JsonResponse({'error': error}, status=504 if isinstance(e, asyncio.TimeoutError) else 500)
+
+    skills, resolved = await sync_to_async(merge_llm_skills)(local_skills, llm.parse_skill_list(raw_output.strip()))
+    return JsonResponse({'skills': skills, 'mode': mode, 'llm_used': True, 'resolved': resolved})
@@ -0,0 +1,159 @@
+import contextvars
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from . import llm
+from .analysis import local_extraction, merge_llm_skills
+
+'''
+Skill extraction for many documents in one request (/api/extract-skills/batch/).
+
+Documents the local extractor settles are answered without the LLM. The rest
+are planned into prompts: long documents are split into chunks, short ones
+are packed several to a prompt that asks for a JSON object keyed by document.
+Prompts run on a bounded thread pool. A packed reply that does not parse
+cleanly is retried one document per prompt, so packing never loses results.
+'''
+
+CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def split_text(text, size):
+    """Split text into chunks of at most size chars, cutting at line or word breaks."""
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            cut = text.rfind('\n', start, end)
+            if cut <= start:
+                cut = text.rfind(' ', start, end)
+            if cut > start:
+                end = cut
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def packed_prompt(docs):
+    parts = [
+        "Extract the programming and technical skills mentioned in each document below.\n"
+        "Return ONLY a JSON object mapping each document id to a list of lowercase skill names, "
+        'like: {"d0": ["django", "react"], "d1": []}. Include every id, even with an empty list.\n'
+    ]
+    for key, text in docs:
+        parts.append(f"### {key}\n{text}\n")
+    return "\n".join(parts)
+
+
+def parse_packed(raw_output, keys):
+    """Return {key: skills} or None if the reply is not a complete JSON object."""
+    try:
+        data = json.loads(CODE_FENCE.sub('', raw_output.strip()))
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not set(keys) <= set(data):
+        return None
+    parsed = {}
+    for key in keys:
+        value = data[key]
+        if isinstance(value, list):
+            parsed[key] = llm.parse_skill_list(repr([str(s) for s in value]))
+        else:
+            parsed[key] = llm.parse_skill_list(str(value))
+    return parsed
+
+
+def plan(pending):
+    """
+    Turn [(index, text)] into prompt units:
+    ('single', index, text) for a chunk or a document sent alone,
+    ('pack', [(index, text), ...]) for short documents sharing a prompt.
+    """
+    chunk_chars = getattr(settings, 'EXTRACT_BATCH_CHUNK_CHARS', 8000)
+    pack_chars = getattr(settings, 'EXTRACT_BATCH_PACK_CHARS', 6000)
+    pack_docs = getattr(settings, 'EXTRACT_BATCH_PACK_DOCS', 10)
+
+    units, pack, pack_size = [], [], 0
+
+    def flush():
+        nonlocal pack, pack_size
+        if len(pack) == 1:
+            units.append(('single',) + pack[0])
+        elif pack:
+            units.append(('pack', pack))
+        pack, pack_size = [], 0
+
+    for index, text in pending:
+        if len(text) > chunk_chars:
+            units.extend(('single', index, chunk) for chunk in split_text(text, chunk_chars))
+        elif len(text) > pack_chars // 2:
+            units.append(('single', index, text))
+        else:
+            if pack_size + len(text) > pack_chars or len(pack) >= pack_docs:
+                flush()
+            pack.append((index, text))
+            pack_size += len(text)
+    flush()
+    return units
+
+
+def _run_single(index, text, refresh):
+    try:
+        raw_output = llm.generate(llm.extraction_prompt(text), refresh=refresh)
+        return [(index, llm.parse_skill_list(raw_output.strip()), None)]
+    except Exception as e:
+        return [(index, [], f"Gemini AI failed: {e}")]
+
+
+def _run_pack(docs, refresh):
+    keys = [f"d{n}" for n in range(len(docs))]
+    try:
+        raw_output = llm.generate(packed_prompt(zip(keys, (text for _, text in docs))), refresh=refresh)
+        parsed = parse_packed(raw_output, keys)
+    except Exception:
+        parsed = None
+    if parsed is None:
+        # unsafe to guess which skills belong to which document: ask one at a time
+        return [item for index, text in docs for item in _run_single(index, text, refresh)]
+    return [(index, parsed[key], None) for key, (index, _) in zip(keys, docs)]
+
+
+def _run_unit(unit, refresh):
+    if unit[0] == 'pack':
+        return _run_pack(unit[1], refresh)
+    return _run_single(unit[1], unit[2], refresh)
+
+
+def extract_batch(texts, mode, refresh=False):
+    """Return one {'skills', 'llm_used', 'error'} dict per input text, in input order."""
+    results = [{'skills': [], 'llm_used': False, 'error': None} for _ in texts]
+    pending = []
+    for index, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            results[index]['error'] = "Missing 'text' field"
+            continue
+        local_skills, needs_llm = local_extraction(text, mode)
+        results[index]['skills'] = local_skills
+        if needs_llm:
+            pending.append((index, text))
+
+    units = plan(pending)
+    if not units:
+        return results
+
+    workers = min(len(units), getattr(settings, 'EXTRACT_BATCH_CONCURRENCY', 8))
+    with ThreadPoolExecutor(workers, thread_name_prefix='extract') as executor:
+        # each unit runs in a copy of this context so LLM time is counted for the request
+        futures = [executor.submit(contextvars.copy_context().run, _run_unit, unit, refresh) for unit in units]
+        for future in futures:
+            for index, skills, error in future.result():
+                result = results[index]
+                if error:
+                    result['error'] = error
+                else:
+                    result['skills'], _ = merge_llm_skills(result['skills'], skills)
+                    result['llm_used'] = True
+    return results
@@ -0,0 +1,153 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import Skill, Team, User
+
+'''
+Endpoint benchmarks for `manage.py bench`.
+
+Each scenario is one request, replayed against whatever data is in the
+database (the command seeds a throwaway test database first). For every
+scenario we keep p50/p95 wall time over the timed runs, plus the query count
+and peak Python allocation of one extra run. compare() checks a result
+against a saved baseline and lists every metric that regressed.
+'''
+
+LLM_REPLY = "python, django, sql"
+
+
+def _context():
+    """Ids and names the scenarios need, picked deterministically from the data."""
+    team = (
+        Team.objects.annotate(n=Count('required_skills')).filter(n__gt=0).order_by('id').first()
+    )
+    users = list(User.objects.filter(userskill__isnull=False).distinct().order_by('id')[:2])
+    if team is None or len(users) < 2:
+        raise ValueError("benchmarks need at least one team with required skills and two users with skills")
+    skills = list(
+        Skill.objects.annotate(n=Count('userskill')).order_by('-n', 'name').values_list('name', flat=True)[:6]
+    )
+    return SimpleNamespace(team=team, user=users[0], editor=users[1], skills=skills)
+
+
+def _set_skills_payloads(skills):
+    half = max(1, len(skills) // 2)
+    return [
+        {"skills": [{"name": name, "level": "intermediate", "experience_years": 2} for name in names]}
+        for names in (skills[:half], skills[half:] or skills[:half])
+    ]
+
+
+def scenarios(ctx):
+    """{name: callable(client, run) -> response}; run counts calls so writes can alternate."""
+    payloads = _set_skills_payloads(ctx.skills)
+    text = ("We use " + ", ".join(ctx.skills) + " every day. ") * 20
+    return {
+        'match': lambda c, n: c.get(f"/api/match/?skills={','.join(ctx.skills[:3])}&limit=20"),
+        'match_team': lambda c, n: c.get(f"/api/match/?team={ctx.team.id}&limit=20"),
+        'users': lambda c, n: c.get('/api/users/'),
+        'teams': lambda c, n: c.get('/api/teams/'),
+        'candidates': lambda c, n: c.get(f"/api/teams/{ctx.team.id}/candidates/?limit=20"),
+        'set_skills': lambda c, n: c.post(f"/api/users/{ctx.editor.id}/set-skills/", payloads[n % 2], format='json'),
+        'skill_gap': lambda c, n: c.post('/api/skill-gap/?refresh=1',
+                                         {"user_id": ctx.user.id, "team_id": ctx.team.id}, format='json'),
+        'extract_skills': lambda c, n: c.post('/api/extract-skills/?refresh=1',
+                                              {"text": text, "mode": "llm"}, format='json'),
+    }
+
+
+@contextmanager
+def stub_llm(latency_ms=0):
+    """Replace the Gemini call with a fixed reply after latency_ms."""
+    def generate_content(self, prompt, *args, **kwargs):
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        return SimpleNamespace(text=LLM_REPLY)
+
+    with patch('team.llm.genai.GenerativeModel.generate_content', generate_content):
+        yield
+
+
+def _percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct))]
+
+
+def measure(fn, client, repeat, warmup):
+    for n in range(warmup):
+        fn(client, n)
+
+    timings = []
+    status = None
+    for n in range(repeat):
+        start = time.perf_counter()
+        response = fn(client, warmup + n)
+        timings.append((time.perf_counter() - start) * 1000)
+        status = response.status_code
+    timings.sort()
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as ctx:
+            fn(client, warmup + repeat)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(_percentile(timings, 0.5), 3),
+        'p95_ms': round(_percentile(timings, 0.95), 3),
+        'queries': len(ctx.captured_queries),
+        'peak_kb': round(peak / 1024, 1),
+        'status': status,
+    }
+
+
+def run(repeat=20, warmup=3, only=None, llm_latency_ms=0, user=None):
+    """Run the scenarios (or the names in only) and return {name: metrics}."""
+    ctx = _context()
+    client = APIClient()
+    client.force_authenticate(user or User.objects.filter(is_staff=True).first() or ctx.user)
+    selected = scenarios(ctx)
+    if only:
+        unknown = set(only) - set(selected)
+        if unknown:
+            raise ValueError(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        selected = {name: fn for name, fn in selected.items() if name in only}
+
+    results = {}
+    with stub_llm(llm_latency_ms):
+        for name, fn in selected.items():
+            results[name] = measure(fn, client, repeat, warmup)
+    return results
+
+
+def compare(results, baseline, latency_tolerance=0.25, memory_tolerance=0.25, min_delta_ms=5.0):
+    """
+    Regressions of results against baseline scenarios, as readable strings.
+    p95 may grow by latency_tolerance (and at least min_delta_ms, to ignore
+    timer noise on fast endpoints), peak memory by memory_tolerance; any extra
+    query or a changed status code is a regression.
+    """
+    problems = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if new['status'] != old['status']:
+            problems.append(f"{name}: status {old['status']} -> {new['status']}")
+        if new['queries'] > old['queries']:
+            problems.append(f"{name}: queries {old['queries']} -> {new['queries']}")
+        limit = max(old['p95_ms'] * (1 + latency_tolerance), old['p95_ms'] + min_delta_ms)
+        if new['p95_ms'] > limit:
+            problems.append(f"{name}: p95 {old['p95_ms']:.1f} ms -> {new['p95_ms']:.1f} ms")
+        if new['peak_kb'] > old['peak_kb'] * (1 + memory_tolerance):
+            problems.append(f"{name}: peak memory {old['peak_kb']:.0f} KB -> {new['peak_kb']:.0f} KB")
+    return problems
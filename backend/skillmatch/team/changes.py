@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CatalogVersion, Change
+from .versions import SKILL, TEAM, TEAM_ROLE, USER_SKILL
+
+'''
+Append-only change feed behind /api/changes/?since=<cursor>, so downstream
+copies (warehouse, search index) can sync what changed instead of re-pulling
+/api/users/ and /api/teams/.
+
+Every committed create, update or delete of a Skill, Team, TeamRole,
+UserSkill or required skill (team_skill) appends a Change holding the row's
+fields after the write (before it, for deletes). The signals in
+team/signals.py record single-object writes; bulk writers (skill_sync,
+import_skills) call record() themselves. Deleting a team or skill also drops
+its team_skill links without separate entries. Raw-SQL seeding is not logged.
+
+Changes are inserted inside the writer's transaction (an outbox), so they
+commit or roll back with the write itself: a crash between the two cannot
+lose one, and rolled-back writes never appear.
+
+The feed is ordered by Change.position, not id. Positions come from the
+CatalogVersion row named CHANGE_SEQUENCE, incremented inside the writer's
+transaction; the row stays locked until that transaction ends, so the next
+writer only gets its positions after the previous one has committed (or
+rolled back, leaving a gap). Positions therefore become visible in order, and
+a reader that has passed one never sees a smaller one appear later. The cost
+is that transactions logging changes commit one at a time from their first
+record() on.
+'''
+
+TEAM_SKILL = 'team_skill'
+CHANGE_SEQUENCE = 'change'  # CatalogVersion row holding the last feed position handed out
+
+FIELDS = {
+    SKILL: ('id', 'name'),
+    TEAM: ('id', 'name', 'description'),
+    TEAM_ROLE: ('id', 'team', 'user', 'role', 'is_active'),
+    USER_SKILL: ('user', 'skill', 'level', 'experience_years', 'is_active'),
+    TEAM_SKILL: ('team', 'skill'),
+}
+KEYS = {USER_SKILL: ('user', 'skill'), TEAM_SKILL: ('team', 'skill')}  # the rest are keyed by id
+
+
+def row(resource, instance):
+    """The logged fields of a model instance, foreign keys as ids."""
+    opts = instance._meta
+    return {name: getattr(instance, opts.get_field(name).attname) for name in FIELDS[resource]}
+
+
+def _allocate(count):
+    """Reserve count feed positions; returns the first. Locks the sequence row until the transaction ends."""
+    with transaction.atomic():
+        if not CatalogVersion.objects.filter(name=CHANGE_SEQUENCE).update(version=F('version') + count):
+            CatalogVersion.objects.get_or_create(name=CHANGE_SEQUENCE, defaults={'version': 0})
+            CatalogVersion.objects.filter(name=CHANGE_SEQUENCE).update(version=F('version') + count)
+        last = CatalogVersion.objects.filter(name=CHANGE_SEQUENCE).values_list('version', flat=True).get()
+    return last - count + 1
+
+
+def record(resource, action, rows):
+    """Append a Change per row dict in the current transaction, so it commits with the write."""
+    keys = KEYS.get(resource, ('id',))
+    now = timezone.now()
+    changes = [
+        Change(resource=resource, action=action, object_id=':'.join(str(r[k]) for k in keys), data=r, created_at=now)
+        for r in rows
+    ]
+    if changes:
+        first = _allocate(len(changes))
+        for offset, change in enumerate(changes):
+            change.position = first + offset
+        Change.objects.bulk_create(changes, batch_size=1000)
+
+
+def since(after, limit):
+    """Up to limit changes with position > after, oldest first, and whether more follow."""
+    rows = list(Change.objects.filter(position__gt=after).order_by('position')[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def latest():
+    """Position of the newest committed change (0 when there is none), for starting a feed from now."""
+    return Change.objects.order_by('-position').values_list('position', flat=True).first() or 0
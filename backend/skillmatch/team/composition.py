@@ -0,0 +1,68 @@
+import heapq
+
+from .skill_index import LEVEL_SCORES, skill_index
+
+'''
+Team composition for /api/teams/<id>/compose/: the smallest group of users
+that together cover a team's required skills (greedy set cover).
+
+Each user becomes a bitset over the required skills (bit i = required skill i,
+held at min_level or above on an active UserSkill row). Users with identical
+bitsets collapse to one candidate, then a lazy greedy picks the candidate
+adding the most uncovered bits each round. Gains only shrink as coverage
+grows, so a stale heap entry that still beats the next best is the true best
+and most rounds touch a handful of candidates. Greedy is within ln(R) + 1 of
+the optimal roster size.
+'''
+
+
+def compose_team(required, min_level='beginner', members=(), exclude=(), max_size=None):
+    """
+    required: {skill_id: name}. members: user ids already on the team, taken first
+    and counted toward coverage. exclude: user ids that may not be picked.
+    max_size caps the roster, members included.
+    Returns {'roster': [{'user_id', 'member', 'covers'}], 'covered', 'uncovered'}.
+    """
+    skill_ids = sorted(required)
+    floor = LEVEL_SCORES.get(min_level, 0)
+    masks = skill_index.bitsets(skill_ids, {level for level, score in LEVEL_SCORES.items() if score >= floor})
+    full = (1 << len(skill_ids)) - 1
+    uncovered = full
+    roster = []
+
+    def take(uid, mask, member):
+        nonlocal uncovered
+        gained = mask & uncovered
+        uncovered &= ~mask
+        roster.append({'user_id': uid, 'member': member, 'covers': _names(gained, skill_ids, required)})
+
+    for uid in sorted(set(members)):
+        take(uid, masks.get(uid, 0), True)
+
+    skip = set(exclude) | set(members)
+    best = {}
+    for uid, mask in masks.items():
+        if uid not in skip and mask & uncovered and (mask not in best or uid < best[mask]):
+            best[mask] = uid
+    heap = [(-(mask & uncovered).bit_count(), uid, mask) for mask, uid in best.items()]
+    heapq.heapify(heap)
+
+    while uncovered and heap and (max_size is None or len(roster) < max_size):
+        _, uid, mask = heapq.heappop(heap)
+        gain = (mask & uncovered).bit_count()
+        if not gain:
+            continue
+        if heap and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, uid, mask))
+            continue
+        take(uid, mask, False)
+
+    return {
+        'roster': roster,
+        'covered': _names(full & ~uncovered, skill_ids, required),
+        'uncovered': _names(uncovered, skill_ids, required),
+    }
+
+
+def _names(mask, skill_ids, required):
+    return sorted(required[sid] for bit, sid in enumerate(skill_ids) if mask >> bit & 1)
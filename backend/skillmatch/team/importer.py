@@ -0,0 +1,174 @@
+import csv
+import json
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from . import versions
+from .models import User
+from .skill_resolver import skill_resolver
+from .skill_sync import SkillPayloadError, parse_skill_entries, replace_user_skills
+
+'''
+Streaming bulk import of users and their skills (manage.py import_skills).
+
+Input is CSV with a header row, or NDJSON, with one (user, skill) per row:
+  username,email,display_name,skill,level,experience_years,is_active
+An NDJSON line may carry "skills": [{"name": ..., "level": ...}] instead, as
+set-skills does. Rows are read lazily and applied a batch at a time, one
+transaction per batch:
+  - skill terms go through the skill resolver once per distinct term
+    (exact, alias and normalized matches; typos are not corrected),
+  - users are upserted by username with bulk_create / bulk_update (new users
+    get an unusable password and no token; they log in after a reset),
+  - UserSkill rows are upserted, never deleted, through replace_user_skills,
+    so readiness, the skill index and the catalog versions follow as they do
+    for bulk-set-skills.
+read_rows yields the byte offset after every row, so a checkpoint saved
+once a batch commits lets a failed import resume from there.
+'''
+
+FORMATS = ('csv', 'ndjson')
+USER_COLUMNS = ('email', 'display_name')
+SKILL_COLUMNS = ('level', 'experience_years', 'is_active')
+MAX_LENGTHS = {name: User._meta.get_field(name).max_length for name in ('username', *USER_COLUMNS)}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def detect_format(path):
+    return 'ndjson' if path.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def read_rows(path, fmt, offset=0, line=0):
+    """
+    Yield (line number, row dict or ImportRowError, byte offset after the row)
+    from path, starting at offset / line as yielded for an earlier row (0 for the start).
+    A line that is not valid UTF-8 is reported as an ImportRowError and read as blank.
+    """
+    with open(path, 'rb') as f:
+        header = None
+        if fmt == 'csv':
+            first = f.readline()
+            header = [h.strip().lower() for h in next(csv.reader([first.decode('utf-8-sig')]), [])]
+            if not offset:
+                offset, line = len(first), 1
+        f.seek(offset)
+        position = [offset, line]
+        undecodable = []  # line numbers read as blank since the last row was yielded
+
+        def lines():
+            for raw in f:
+                position[0] += len(raw)
+                position[1] += 1
+                try:
+                    text = raw.decode('utf-8')
+                except UnicodeDecodeError:
+                    undecodable.append(position[1])
+                    text = '\n'
+                yield text
+
+        def bad_lines():
+            while undecodable:
+                yield undecodable.pop(0), ImportRowError("invalid UTF-8"), position[0]
+
+        if fmt == 'csv':
+            # csv.reader pulls lines only as it needs them, so position is the end of each record
+            for values in csv.reader(lines()):
+                yield from bad_lines()
+                if any(v.strip() for v in values):
+                    yield position[1], dict(zip(header, values)), position[0]
+            return
+        for text in lines():
+            yield from bad_lines()
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                row = ImportRowError("invalid JSON")
+            yield position[1], row, position[0]
+
+
+def parse_row(row):
+    """(username, {email/display_name given}, {name: (level, years, active)}); ImportRowError if invalid."""
+    if isinstance(row, ImportRowError):
+        raise row
+    if not isinstance(row, dict):
+        raise ImportRowError("row must be an object")
+    username = str(row.get('username') or '').strip()
+    if not username:
+        raise ImportRowError("username required")
+    if len(username) > MAX_LENGTHS['username']:
+        raise ImportRowError(f"username longer than {MAX_LENGTHS['username']} characters")
+
+    if 'skills' in row:
+        skills = row['skills']
+    elif row.get('skill'):
+        skills = [{'name': row['skill'], **{k: row[k] for k in SKILL_COLUMNS if row.get(k) not in (None, '')}}]
+    else:
+        skills = []
+    try:
+        entries = parse_skill_entries(skills)
+    except SkillPayloadError as e:
+        raise ImportRowError(str(e))
+    fields = {k: str(row[k]).strip() for k in USER_COLUMNS if row.get(k) not in (None, '')}
+    for k, value in fields.items():
+        if len(value) > MAX_LENGTHS[k]:
+            raise ImportRowError(f"{k} longer than {MAX_LENGTHS[k]} characters")
+    return username, fields, entries
+
+
+class SkillImport:
+    """Applies batches of parse_row output; keeps term resolutions and running totals across batches."""
+
+    def __init__(self):
+        self.canonical = {}  # skill term -> canonical name
+        self.totals = {"users_created": 0, "users_updated": 0, "skills_created": 0, "skills_updated": 0}
+
+    def resolve(self, terms):
+        unseen = [term for term in terms if term not in self.canonical]
+        for resolution in skill_resolver.resolve_many(unseen, fuzzy=False):
+            self.canonical[resolution['term']] = resolution['skill'] or resolution['term']
+
+    def apply(self, rows):
+        """Upsert the users and skills of rows in one transaction; later rows win."""
+        users, skills = {}, {}
+        for username, fields, entries in rows:
+            users.setdefault(username, {}).update(fields)
+            skills.setdefault(username, {}).update(entries)
+        self.resolve({name for entries in skills.values() for name in entries})
+
+        with transaction.atomic():
+            existing = {u.username: u for u in User.objects.filter(username__in=users).only('id', 'username',
+                                                                                             *USER_COLUMNS)}
+            new = [User(username=name, password=make_password(None), **fields)
+                   for name, fields in users.items() if name not in existing]
+            changed = []
+            for name, fields in users.items():
+                user = existing.get(name)
+                if user is not None and any(getattr(user, k) != v for k, v in fields.items()):
+                    for k, v in fields.items():
+                        setattr(user, k, v)
+                    changed.append(user)
+            if new:
+                User.objects.bulk_create(new, ignore_conflicts=True)
+                existing.update((u.username, u) for u in User.objects.filter(
+                    username__in=[u.username for u in new]).only('id', 'username'))
+            if changed:
+                User.objects.bulk_update(changed, USER_COLUMNS)
+            if new or changed:
+                versions.bump(versions.USER)
+
+            user_entries = {}
+            for name, entries in skills.items():
+                if entries:
+                    user_entries[existing[name].id] = {self.canonical[term]: v for term, v in entries.items()}
+            created, updated, _ = replace_user_skills(user_entries, prune=False)
+
+        self.totals["users_created"] += len(new)
+        self.totals["users_updated"] += len(changed)
+        self.totals["skills_created"] += created
+        self.totals["skills_updated"] += updated
@@ -0,0 +1,196 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import llm
+from .analysis import extraction_mode, local_extraction, merge_llm_skills, skill_gap
+from .models import Job, Team, User
+
+'''
+DB-backed job queue for the LLM endpoints.
+Jobs are submitted through /api/jobs/ and executed by `manage.py run_jobs`;
+no broker is needed, workers claim rows with a conditional UPDATE.
+'''
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+class JobPayloadError(ValueError):
+    """Bad input; the job fails immediately instead of being retried."""
+
+
+def _validate_skill_gap(payload):
+    try:
+        return {
+            'user_id': int(payload['user_id']),
+            'team_id': int(payload['team_id']),
+            'refresh': llm.is_refresh(payload.get('refresh', False)),
+        }
+    except (KeyError, TypeError, ValueError):
+        raise JobPayloadError('user_id and team_id required')
+
+
+def _validate_extract_skills(payload):
+    text = payload.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise JobPayloadError("Missing 'text' field")
+    try:
+        mode = extraction_mode(payload.get('mode'))
+    except ValueError as e:
+        raise JobPayloadError(str(e))
+    return {'text': text, 'mode': mode, 'refresh': llm.is_refresh(payload.get('refresh', False))}
+
+
+def _lease():
+    return getattr(settings, 'JOBS_LEASE_SECONDS', 300)
+
+
+def llm_timeout():
+    """LLM_TIMEOUT, but well inside the lease, so a slow call fails before another worker reclaims the job."""
+    return min(getattr(settings, 'LLM_TIMEOUT', 30), _lease() / 2)
+
+
+def run_skill_gap(payload):
+    try:
+        user = User.objects.get(id=payload['user_id'])
+        team = Team.objects.get(id=payload['team_id'])
+    except (User.DoesNotExist, Team.DoesNotExist) as e:
+        raise JobPayloadError(str(e))
+
+    matched, missing, required = skill_gap(user, team)
+    summary = llm.generate(llm.gap_analysis_prompt(matched, required), refresh=payload['refresh'],
+                           timeout=llm_timeout())
+    return {
+        'user': user.username,
+        'team': team.name,
+        'matched_skills': matched,
+        'missing_skills': missing,
+        'summary': summary
+    }
+
+
+def run_extract_skills(payload):
+    mode = payload.get('mode', 'llm')
+    local_skills, needs_llm = local_extraction(payload['text'], mode)
+    if not needs_llm:
+        return {'skills': local_skills, 'mode': mode, 'llm_used': False}
+    raw_output = llm.generate(llm.extraction_prompt(payload['text']), refresh=payload['refresh'],
+                              timeout=llm_timeout())
+    skills, resolved = merge_llm_skills(local_skills, llm.parse_skill_list(raw_output.strip()))
+    return {'skills': skills, 'mode': mode, 'llm_used': True, 'resolved': resolved}
+
+
+JOB_TYPES = {
+    'skill_gap': (_validate_skill_gap, run_skill_gap),
+    'extract_skills': (_validate_extract_skills, run_extract_skills),
+}
+
+
+def dedupe_key(kind, payload, user_id=None):
+    """Per submitter, so nobody is handed a job id they are not allowed to poll."""
+    source = f"{kind}\0{user_id or ''}\0{json.dumps(payload, sort_keys=True)}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def submit(kind, payload, user=None):
+    """
+    Queue a job, or return the identical pending/running one the same user submitted.
+    Returns (job, created).
+    """
+    if kind not in JOB_TYPES:
+        raise JobPayloadError(f"unknown job kind '{kind}'")
+    if not isinstance(payload, dict):
+        raise JobPayloadError('payload must be an object')
+    payload = JOB_TYPES[kind][0](payload)
+    key = dedupe_key(kind, payload, user.pk if user is not None else None)
+
+    for _ in range(2):
+        existing = Job.objects.filter(dedupe_key=key, status__in=ACTIVE_STATUSES).first()
+        if existing:
+            return existing, False
+        try:
+            with transaction.atomic():
+                job = Job.objects.create(
+                    kind=kind,
+                    payload=payload,
+                    dedupe_key=key,
+                    max_attempts=getattr(settings, 'JOBS_MAX_ATTEMPTS', 3),
+                    created_by=user,
+                )
+            return job, True
+        except IntegrityError:
+            # lost a race with an identical submit; pick that one up
+            continue
+    raise IntegrityError(f"could not queue {kind} job")
+
+
+def _expired(now):
+    return Q(status='running', locked_at__lt=now - timedelta(seconds=_lease()))
+
+
+def _claimable(now):
+    return Q(status='pending', run_after__lte=now) | (_expired(now) & Q(attempts__lt=F('max_attempts')))
+
+
+def claim(limit):
+    """
+    Mark up to `limit` due jobs as running and return their ids.
+    Running jobs whose lease expired (crashed worker) are claimed again while
+    attempts remain, and failed once they are used up.
+    """
+    now = timezone.now()
+    Job.objects.filter(_expired(now), attempts__gte=F('max_attempts')).update(
+        status='failed', error='lease expired on the last attempt', locked_at=None, updated_at=now,
+    )
+    candidates = (
+        Job.objects.filter(_claimable(now))
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:limit * 2]
+    )
+    claimed = []
+    for job_id in candidates:
+        updated = Job.objects.filter(_claimable(now), id=job_id).update(
+            status='running', locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if updated:
+            claimed.append(job_id)
+            if len(claimed) >= limit:
+                break
+    return claimed
+
+
+def execute(job_id):
+    """
+    Run one claimed job and record its result, retry or failure. The record is
+    only written while this worker still holds the claim; if the lease expired
+    and another worker took the job over, this run's outcome is dropped.
+    Returns whether it was recorded.
+    """
+    job = Job.objects.get(id=job_id)
+    kind_handler = JOB_TYPES[job.kind][1]
+    try:
+        result = kind_handler(job.payload)
+    except JobPayloadError as e:
+        outcome = {'status': 'failed', 'error': str(e)}
+    except Exception as e:
+        outcome = {'status': 'failed', 'error': str(e)}
+        if job.attempts < job.max_attempts:
+            backoff = getattr(settings, 'JOBS_RETRY_BACKOFF', 5) * 2 ** (job.attempts - 1)
+            outcome.update(status='pending', run_after=timezone.now() + timedelta(seconds=backoff))
+    else:
+        outcome = {'status': 'succeeded', 'result': result, 'error': ''}
+    claimed = Job.objects.filter(id=job.id, status='running', locked_at=job.locked_at, attempts=job.attempts)
+    return bool(claimed.update(locked_at=None, updated_at=timezone.now(), **outcome))
+
+
+def run_job(job_id):
+    """Pool entry point: execute a job, then drop this worker's DB connection."""
+    try:
+        execute(job_id)
+    finally:
+        connection.close()
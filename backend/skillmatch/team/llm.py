@@ -0,0 +1,206 @@
+import ast
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import google.generativeai as genai
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+'''
+Gemini access for the LLM-backed views.
+Responses are cached by sha256(model name + prompt): a bounded in-process LRU
+sits in front of a durable Django cache (the "llm" alias in CACHES), both with a TTL.
+'''
+
+GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
+DEFAULT_MODEL = 'gemini-1.5-pro'
+
+
+class ResponseCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'LLM_CACHE_TIMEOUT', 7 * 24 * 3600)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'LLM_CACHE_MEMORY_ENTRIES', 256)
+
+    @property
+    def store(self):
+        return caches[getattr(settings, 'LLM_CACHE_ALIAS', 'llm')]
+
+    @staticmethod
+    def key(model_name, prompt):
+        digest = hashlib.sha256(f"{model_name}\0{prompt}".encode('utf-8')).hexdigest()
+        return f"llm:{digest}"
+
+    def _remember(self, key, text):
+        with self._lock:
+            self._memory[key] = (time.monotonic() + self.timeout, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, text = entry
+                if expires_at > time.monotonic():
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return text
+                del self._memory[key]
+
+        text = self.store.get(key)
+        if text is not None:
+            self._remember(key, text)
+            with self._lock:
+                self.store_hits += 1
+            return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, text):
+        self._remember(key, text)
+        self.store.set(key, text, self.timeout)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = self.store_hits = self.misses = 0
+        self.store.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.store_hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'memory_hits': self.memory_hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.memory_hits + self.store_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def generate(prompt, model_name=DEFAULT_MODEL, refresh=False, timeout=None):
+    """
+    Return the model's text for prompt, served from cache unless refresh is set.
+    timeout (seconds) bounds the Gemini request. Failures are raised to the
+    caller and never cached.
+    """
+    key = response_cache.key(model_name, prompt)
+    if not refresh:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+
+    genai.configure(api_key=GEMINI_API_KEY)
+    model = genai.GenerativeModel(model_name)
+    with metrics.timer('llm'):
+        if timeout is None:
+            text = model.generate_content(prompt).text
+        else:
+            text = model.generate_content(prompt, request_options={'timeout': timeout}).text
+    response_cache.set(key, text)
+    return text
+
+
+def gap_analysis_prompt(matched, team_skills):
+    # sorted so identical requests build byte-identical prompts (and hit the cache)
+    return (
+        f"User has the following skills: {', '.join(sorted(matched))}.\n"
+        f"Team requires: {', '.join(sorted(team_skills))}.\n"
+        f"Write a short summary of the user's readiness, skills they still need, and an encouraging message. "
+        f"Include an estimated readiness percentage."
+    )
+
+
+def extraction_prompt(text):
+    return (
+        "Extract and return a list of programming and technical skills mentioned in this text.\n\n"
+        f"{text}\n\n"
+        "Return ONLY a Python list of lowercase skill names, like: ['django', 'react', 'gcp'].\n"
+        "Do not explain or add formatting — just output the list."
+    )
+
+
+def parse_skill_list(raw_output):
+    """Parse the model's list output into sorted lowercase skill names."""
+    # Try strict parsing first
+    try:
+        skills = ast.literal_eval(raw_output)
+        if not isinstance(skills, list):
+            raise ValueError("Not a list")
+    except Exception:
+        # Fallback: match list-like patterns
+        skills = re.findall(r"['\"]?([a-zA-Z0-9_+\-.#]+)['\"]?", raw_output)
+
+    return sorted(set(s.lower() for s in skills if isinstance(s, str) and s.strip()))
+
+
+# one semaphore per event loop; asyncio primitives cannot be shared across loops
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _semaphore():
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(getattr(settings, 'LLM_MAX_CONCURRENCY', 100))
+    return sem
+
+
+async def agenerate(prompt, model_name=DEFAULT_MODEL, refresh=False):
+    """
+    Async counterpart of generate() for the ASGI views.
+    At most LLM_MAX_CONCURRENCY calls are in flight per event loop, and each
+    one is cancelled after LLM_TIMEOUT seconds (asyncio.TimeoutError).
+    """
+    key = response_cache.key(model_name, prompt)
+    if not refresh:
+        cached = await sync_to_async(response_cache.get, thread_sensitive=False)(key)
+        if cached is not None:
+            return cached
+
+    async with _semaphore():
+        genai.configure(api_key=GEMINI_API_KEY)
+        model = genai.GenerativeModel(model_name)
+        with metrics.timer('llm'):
+            response = await asyncio.wait_for(
+                model.generate_content_async(prompt),
+                timeout=getattr(settings, 'LLM_TIMEOUT', 30),
+            )
+    text = response.text
+    await sync_to_async(response_cache.set, thread_sensitive=False)(key, text)
+    return text
+
+
+def wants_refresh(request):
+    return is_refresh(request.GET.get('refresh', ''))
+
+
+def is_refresh(value):
+    """A refresh flag from a query string or JSON payload: 1, true or yes (any case), or JSON true."""
+    return str(value).lower() in ('1', 'true', 'yes')
@@ -0,0 +1,99 @@
+import json
+import platform
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from team import benchmarks
+from team.models import User
+
+DATASET_OPTIONS = ('users', 'skills', 'teams', 'skills_per_user', 'seed')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API endpoints on a generated dataset and compare against a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--skills', type=int, default=300)
+        parser.add_argument('--teams', type=int, default=50)
+        parser.add_argument('--skills-per-user', type=float, default=8)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', help='Comma-separated scenarios: ' + ', '.join(
+            ['match', 'match_team', 'users', 'teams', 'candidates', 'set_skills', 'skill_gap', 'extract_skills']))
+        parser.add_argument('--llm-latency', type=float, default=0, help='Simulated model latency in ms')
+        parser.add_argument('--baseline', default=getattr(settings, 'BENCH_BASELINE', 'bench_baseline.json'),
+                            help='Baseline JSON file to compare against / write')
+        parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--latency-tolerance', type=float,
+                            default=getattr(settings, 'BENCH_LATENCY_TOLERANCE', 0.25))
+        parser.add_argument('--memory-tolerance', type=float,
+                            default=getattr(settings, 'BENCH_MEMORY_TOLERANCE', 0.25))
+        parser.add_argument('--min-delta-ms', type=float, default=getattr(settings, 'BENCH_MIN_DELTA_MS', 5),
+                            help='p95 growth below this many ms is treated as noise')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the benchmark database between runs')
+
+    def handle(self, *args, **options):
+        dataset = {key: options[key] for key in DATASET_OPTIONS}
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            # keep benchmark prompts out of the on-disk LLM cache
+            with override_settings(LLM_CACHE_ALIAS='default'):
+                results = self.run_benchmarks(dataset, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.stdout.write(f"{'scenario':<15}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'peak KB':>10}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<15}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['queries']:>9}{r['peak_kb']:>10.0f}")
+
+        report = {
+            'dataset': dataset,
+            'environment': {'python': platform.python_version(), 'django': django.get_version(),
+                            'database': connection.vendor},
+            'results': results,
+        }
+        if options['save']:
+            with open(options['baseline'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        try:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write(f"No baseline at {options['baseline']}; run with --save to record one.")
+            return
+        if baseline['dataset'] != dataset:
+            raise CommandError(f"Baseline was recorded on a different dataset: {baseline['dataset']}")
+
+        problems = benchmarks.compare(
+            results, baseline['results'],
+            latency_tolerance=options['latency_tolerance'], memory_tolerance=options['memory_tolerance'],
+            min_delta_ms=options['min_delta_ms'],
+        )
+        if problems:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(problems))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def run_benchmarks(self, dataset, options):
+        if not User.objects.filter(username='bench-admin').exists():
+            call_command('seed', stdout=self.stderr, **dataset)
+            User.objects.create_user(username='bench-admin', password='bench', is_staff=True)
+        only = options['only'].split(',') if options['only'] else None
+        try:
+            return benchmarks.run(repeat=options['repeat'], warmup=options['warmup'], only=only,
+                                  llm_latency_ms=options['llm_latency'],
+                                  user=User.objects.get(username='bench-admin'))
+        except ValueError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from team.matching import MATCH_ENGINES, rank_team_candidates
+from team.models import Skill, Team, UserSkill
+from team.skill_index import skill_index
+
+
+class Command(BaseCommand):
+    help = 'Compare /api/match/ scoring engines on the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skills', default='python,django,sql',
+                            help='Comma-separated skill names to match on')
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--engines', default=','.join(MATCH_ENGINES),
+                            help='Comma-separated engines to run')
+        parser.add_argument('--team', type=int, help='Also time /api/teams/<id>/candidates/ ranking')
+
+    def handle(self, *args, **options):
+        names = [s.strip().lower() for s in options['skills'].split(',') if s.strip()]
+        skills = dict(Skill.objects.filter(name__in=names).values_list('id', 'name'))
+        rows = UserSkill.objects.filter(skill_id__in=list(skills)).count()
+        self.stdout.write(f"{len(skills)} skills, {rows} matching UserSkill rows, limit={options['limit']}")
+
+        start = time.perf_counter()
+        skill_index.build()
+        self.stdout.write(f"index build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        for engine in options['engines'].split(','):
+            fn = MATCH_ENGINES[engine.strip()]
+            self.report(engine, lambda: fn(skills, limit=options['limit']), options['repeat'])
+
+        if options['team']:
+            team = Team.objects.get(pk=options['team'])
+            required = dict(team.required_skills.values_list('id', 'name'))
+            self.report('team', lambda: rank_team_candidates(required, limit=options['limit']), options['repeat'])
+
+    def report(self, label, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            total, _ = fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(f"{label:>6}: total={total} p50={p50:.2f} ms p95={p95:.2f} ms")
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from team.skill_matrix import skill_matrix
+
+
+class Command(BaseCommand):
+    help = "Write the shared user x skill snapshot for the 'shared' match engine and swap it in"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        header = skill_matrix.build()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {header['rows']} rows to {skill_matrix.stats()['path']} "
+            f"(up to change {header['change_id']}) in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,50 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from team.readiness_matrix import FIELDS, get_matrix, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Export readiness (matched/missing/%) for every user x team pair to CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument('--team', type=int, help='Only this team')
+        parser.add_argument('--min-readiness', type=float, default=0)
+        parser.add_argument('--batch-size', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        matrix = get_matrix(refresh=True)
+        selection = matrix.select(team_id=options['team'], min_readiness=options['min_readiness'])
+        total = len(selection['user_id'])
+        self.stderr.write(
+            f"{len(matrix.user_ids)} users x {len(matrix.team_ids)} teams, "
+            f"{total} pairs with matches, computed in {time.perf_counter() - start:.2f}s"
+        )
+
+        if options['output']:
+            out = open(options['output'], 'w', newline='')
+        else:
+            out = self.stdout
+            out.ending = ''
+        try:
+            writer = None
+            if options['format'] == 'csv':
+                writer = csv.DictWriter(out, fieldnames=FIELDS + ('missing',))
+                writer.writeheader()
+            for offset in range(0, total, options['batch_size']):
+                for row in iter_rows(selection, offset, offset + options['batch_size']):
+                    if writer:
+                        writer.writerow(row)
+                    else:
+                        out.write(json.dumps(row) + '\n')
+        finally:
+            if out is not self.stdout:
+                out.close()
+
+        self.stderr.write(self.style.SUCCESS(f"Exported {total} rows in {time.perf_counter() - start:.2f}s"))
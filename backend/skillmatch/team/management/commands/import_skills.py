@@ -0,0 +1,93 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from team.importer import FORMATS, ImportRowError, SkillImport, detect_format, parse_row, read_rows
+
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = 'Import users and their skills from a CSV or NDJSON file, in batches, resuming from a checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (username,email,display_name,skill,level,experience_years,is_active) '
+                                         'or NDJSON file')
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the extension (.ndjson/.jsonl or csv)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per transaction')
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <path>.checkpoint)')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and start over')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f"{path} does not exist")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+        fmt = options['format'] or detect_format(path)
+        checkpoint = options['checkpoint'] or f"{path}.checkpoint"
+        size = os.path.getsize(path)
+
+        offset = line = done = 0
+        if os.path.exists(checkpoint) and not options['restart']:
+            with open(checkpoint) as f:
+                state = json.load(f)
+            if state['offset'] > size:
+                raise CommandError(f"{checkpoint} is past the end of {path}; use --restart")
+            offset, line, done = state['offset'], state['line'], state['rows']
+            self.stderr.write(f"Resuming after line {line} ({done} rows already imported)")
+
+        importer = SkillImport()
+        batch, errors = [], 0
+        start = time.perf_counter()
+        rows = done
+
+        def flush(offset, line):
+            importer.apply(batch)
+            batch.clear()
+            self.save_checkpoint(checkpoint, {"offset": offset, "line": line, "rows": rows})
+            elapsed = time.perf_counter() - start
+            self.stderr.write(
+                f"  {rows} rows, {offset * 100 / (size or 1):.1f}% of {path}, "
+                f"{(rows - done) / (elapsed or 1e-9):.0f} rows/s"
+            )
+
+        try:
+            for line, row, offset in read_rows(path, fmt, offset, line):
+                try:
+                    batch.append(parse_row(row))
+                except ImportRowError as e:
+                    errors += 1
+                    if errors <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(self.style.WARNING(f"line {line}: {e}"))
+                    continue
+                rows += 1
+                if len(batch) >= options['batch_size']:
+                    flush(offset, line)
+            if batch:
+                flush(offset, line)
+        except Exception:
+            self.stderr.write(self.style.ERROR(
+                f"Import stopped; run the same command again to resume from {checkpoint}"
+            ))
+            raise
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        elapsed = time.perf_counter() - start
+        totals = importer.totals
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {rows - done} rows in {elapsed:.1f}s ({(rows - done) / (elapsed or 1e-9):.0f} rows/s): "
+            f"{totals['users_created']} users created, {totals['users_updated']} updated, "
+            f"{totals['skills_created']} user skills created, {totals['skills_updated']} updated, "
+            f"{errors} rows skipped"
+        ))
+
+    @staticmethod
+    def save_checkpoint(path, state):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from team import profiling
+
+
+class Command(BaseCommand):
+    help = 'List stored ?profile=1 captures, or print the hotspots and slowest SQL of one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('capture_id', nargs='?', help="Capture id, or 'latest'; omit to list captures")
+        parser.add_argument('--sort', choices=profiling.SORT_KEYS, default='cumulative')
+        parser.add_argument('--limit', type=int, default=25, help='Functions to show')
+        parser.add_argument('--queries', type=int, default=5, help='Slowest SQL statements to show')
+
+    def handle(self, *args, **options):
+        captures = profiling.list_captures()
+        if not options['capture_id']:
+            for c in captures:
+                self.stdout.write(
+                    f"{c['id']}  {c['method']} {c['path']}  {c['status']}  "
+                    f"{c['wall_ms']:.1f} ms, {c['query_count']} queries ({c['db_ms']:.1f} ms)"
+                )
+            return
+
+        capture_id = options['capture_id']
+        if capture_id == 'latest':
+            if not captures:
+                raise CommandError("No profiles captured yet")
+            capture_id = captures[0]['id']
+        capture = profiling.load(capture_id)
+        if capture is None:
+            raise CommandError(f"Profile {capture_id} not found")
+
+        self.stdout.write(
+            f"{capture['method']} {capture['path']} -> {capture['status']} "
+            f"({capture['profiler']}, {capture['wall_ms']:.1f} ms, "
+            f"{capture['query_count']} queries in {capture['db_ms']:.1f} ms)\n"
+        )
+        hotspots = profiling.hotspots(capture_id, options['sort'], options['limit'])
+        if isinstance(hotspots, str):
+            self.stdout.write(hotspots)
+        else:
+            self.stdout.write(f"{'calls':>8} {'tottime ms':>11} {'cumtime ms':>11}  function")
+            for row in hotspots:
+                self.stdout.write(
+                    f"{row['calls']:>8} {row['tottime_ms']:>11.3f} {row['cumtime_ms']:>11.3f}  {row['function']}"
+                )
+
+        slowest = sorted(capture['queries'], key=lambda q: q['ms'], reverse=True)[:options['queries']]
+        if slowest:
+            self.stdout.write("\nSlowest SQL:")
+            for q in slowest:
+                self.stdout.write(f"{q['ms']:>9.3f} ms  {q['sql']}")
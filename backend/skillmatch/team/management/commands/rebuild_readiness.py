@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from team.readiness import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the TeamReadiness table from UserSkill and team required skills'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team', type=int, action='append', dest='teams',
+                            help='Only rebuild this team (repeatable)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = rebuild(options['teams'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {created} readiness rows in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from team.jobs import claim, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued gap-analysis and skill-extraction jobs on a thread or process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'JOBS_WORKERS', 4))
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait between polls when the queue is idle')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no jobs are due instead of polling forever')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if options['pool'] == 'process':
+            # children must not inherit the parent's open DB connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(workers, initializer=django.setup)
+        else:
+            executor = ThreadPoolExecutor(workers, thread_name_prefix='job')
+
+        self.stdout.write(f"Running jobs with {workers} {options['pool']} workers")
+        in_flight = {}
+        processed = 0
+        try:
+            while True:
+                claimed = claim(workers - len(in_flight)) if len(in_flight) < workers else []
+                for job_id in claimed:
+                    in_flight[executor.submit(run_job, job_id)] = job_id
+
+                if not in_flight:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = in_flight.pop(future)
+                    processed += 1
+                    if future.exception():
+                        self.stderr.write(f"job {job_id} crashed: {future.exception()}")
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping; waiting for running jobs to finish")
+        finally:
+            executor.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
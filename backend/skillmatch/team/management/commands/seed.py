@@ -1,10 +1,55 @@
+import os
+import time
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
-from ....team.models import User, Skill, UserSkill, Team, TeamRole
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from team import readiness, versions
+from team.models import User, Skill, UserSkill, Team, TeamRole
+from team.skill_extractor import skill_extractor
+from team.skill_index import skill_index
+from team.skill_matrix import matrix_path, skill_matrix
+from team.skill_resolver import skill_resolver
+from team.skill_suggest import skill_suggester
+
+COMMON_SKILLS = [
+    'python', 'javascript', 'sql', 'react', 'django', 'git', 'docker', 'aws', 'typescript', 'java',
+    'node.js', 'html', 'css', 'postgresql', 'linux', 'kubernetes', 'gcp', 'c#', 'go', 'redis',
+    'graphql', 'terraform', 'flask', 'vue', 'angular', 'spring', 'kotlin', 'swift', 'rust', 'c++',
+    'mongodb', 'kafka', 'spark', 'pandas', 'machine learning', 'azure', 'ruby', 'rails', 'php', 'scala',
+]
+LEVELS = ['beginner', 'intermediate', 'advanced']
+LEVEL_WEIGHTS = [0.5, 0.35, 0.15]
+ROLES = [role for role, _ in TeamRole.ROLE_CHOICES]
+USER_FIELDS = ['username', 'display_name', 'password', 'first_name', 'last_name', 'email',
+               'is_superuser', 'is_staff', 'is_active', 'date_joined']
+
 
 class Command(BaseCommand):
-    help = 'Seed the database with mock users, skills, and a team'
+    help = 'Seed the database with mock users, skills, and a team; optionally a large synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=0, help='Synthetic users to generate')
+        parser.add_argument('--skills', type=int, default=200, help='Size of the synthetic skill catalog')
+        parser.add_argument('--teams', type=int, default=0, help='Synthetic teams to generate')
+        parser.add_argument('--skills-per-user', type=float, default=10, help='Mean skills per user')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Zipf exponent of skill popularity (0 = uniform)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; same seed, same dataset')
+        parser.add_argument('--no-readiness', action='store_true',
+                            help='Skip rebuilding TeamReadiness (run rebuild_readiness later)')
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Rows per insert transaction')
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
+        self.seed_fixture()
+        if options['users'] or options['teams']:
+            self.seed_synthetic(**options)
+
+    def seed_fixture(self):
         skill_names = ['python', 'django', 'javascript', 'gcp', 'react', 'sql']
         skills = {name: Skill.objects.get_or_create(name=name)[0] for name in skill_names}
 
@@ -36,4 +81,135 @@ class Command(BaseCommand):
         TeamRole.objects.get_or_create(user=users[1], team=team, role='pm')
         TeamRole.objects.get_or_create(user=users[2], team=team, role='qa')
 
-        self.stdout.write(self.style.SUCCESS("\n✅ Mock users, skills, and team created successfully.\n"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS("\n✅ Mock users, skills, and team created successfully.\n"))
+
+    def seed_synthetic(self, users, skills, teams, skills_per_user, skew, seed, chunk_size, no_readiness=False,
+                       **kwargs):
+        """
+        Users draw their skills from a Zipf-like popularity curve: the skill of
+        rank r is picked with probability proportional to 1 / r**skew. All draws
+        come from one seeded generator, so a seed always yields the same rows.
+        Rows that already exist are left alone, so re-running only fills in
+        what is missing.
+        """
+        if connection.vendor == 'sqlite':
+            # index pages for ~1M random-order inserts; the default 2 MB cache thrashes
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA cache_size = -262144')
+        rng = np.random.default_rng(seed)
+        start = step = time.perf_counter()
+
+        def done(label):
+            nonlocal step
+            now = time.perf_counter()
+            self.stdout.write(f"  {label} in {now - step:.1f}s")
+            step = now
+
+        names = (COMMON_SKILLS + [f'skill-{n:05d}' for n in range(len(COMMON_SKILLS), skills)])[:skills]
+        self.insert_rows(Skill, ['name'], ((name,) for name in names), chunk_size)
+        skill_ids = self.id_map(Skill.objects.values_list('name', 'id'), names)
+        popularity = 1 / np.arange(1, len(names) + 1) ** skew
+        popularity /= popularity.sum()
+        done(f"{len(names)} skills")
+
+        usernames = [f'seed{seed}-user{n:07d}' for n in range(users)]
+        password = make_password('test1234')  # hashed once; every synthetic user shares it
+        joined = connection.ops.adapt_datetimefield_value(timezone.now())
+        self.insert_rows(User, USER_FIELDS, (
+            (name, f'Seed User {n}', password, '', '', '', False, False, True, joined)
+            for n, name in enumerate(usernames)
+        ), chunk_size)
+        user_ids = self.id_map(
+            User.objects.filter(username__startswith=f'seed{seed}-user').values_list('username', 'id'), usernames
+        )
+        done(f"{users} users")
+
+        counts = np.clip(rng.poisson(skills_per_user, users), 1, len(names))
+        owners = np.repeat(np.arange(users), counts)
+        picks = rng.choice(len(names), size=len(owners), p=popularity)
+        # repeated picks of a popular skill collapse to one row per (user, skill)
+        pairs = np.unique(owners.astype(np.int64) * len(names) + picks)
+        owners, picks = pairs // len(names), pairs % len(names)
+        levels = rng.choice(len(LEVELS), size=len(pairs), p=LEVEL_WEIGHTS)
+        years = np.minimum(rng.geometric(0.35, len(pairs)) - 1 + levels * 2, 30)
+        active = rng.random(len(pairs)) < 0.95
+
+        self.insert_rows(UserSkill, ['user', 'skill', 'level', 'experience_years', 'is_active'], (
+            (user_ids[u], skill_ids[s], LEVELS[lv], y, a)
+            for u, s, lv, y, a in zip(owners.tolist(), picks.tolist(), levels.tolist(),
+                                      years.tolist(), active.tolist())
+        ), chunk_size)
+        done(f"{len(pairs)} user skills")
+
+        team_names = [f'Seed {seed} Team {n:04d}' for n in range(teams)]
+        prefix = f'Seed {seed} Team '
+        existing = set(Team.objects.filter(name__startswith=prefix).values_list('name', flat=True))
+        new_teams = [n for n, name in enumerate(team_names) if name not in existing]
+        self.insert_rows(Team, ['name', 'description'], ((team_names[n], 'Synthetic team') for n in new_teams), chunk_size)
+        created = {t.name: t for t in Team.objects.filter(name__startswith=prefix).exclude(name__in=existing)}
+
+        requirements, roles = [], []
+        for n in range(teams):
+            # draw every team's rows so later teams do not depend on which ones already exist
+            size = int(rng.integers(3, 9))
+            required = rng.choice(len(names), size=min(size, len(names)), replace=False, p=popularity)
+            members = rng.choice(users, size=min(int(rng.integers(2, 8)), users), replace=False) if users else []
+            member_roles = rng.choice(len(ROLES), size=len(members))
+            team = created.get(team_names[n])
+            if team is None:
+                continue
+            requirements += [(team.pk, skill_ids[s]) for s in required.tolist()]
+            roles += [(team.pk, user_ids[u], ROLES[r], True)
+                      for u, r in zip(np.asarray(members).tolist(), member_roles.tolist())]
+        self.insert_rows(Team.required_skills.through, ['team', 'skill'], requirements, chunk_size)
+        self.insert_rows(TeamRole, ['team', 'user', 'role', 'is_active'], roles, chunk_size)
+        done(f"{teams} teams")
+
+        # raw inserts skip the signals that maintain TeamReadiness, the catalog versions, the
+        # in-memory skill structures and the change log
+        if not no_readiness:
+            done(f"{readiness.rebuild()} readiness rows")
+        versions.bump(versions.SKILL, versions.USER, versions.USER_SKILL, versions.TEAM, versions.TEAM_ROLE)
+        for structure in (skill_index, skill_resolver, skill_extractor, skill_suggester):
+            structure.invalidate()
+        if os.path.exists(matrix_path()):
+            # workers replay the change log on top of the shared snapshot, so it has to be rewritten
+            done(f"skill matrix snapshot of {skill_matrix.build()['rows']} rows")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seed {seed}: {len(names)} skills, {users} users, {len(pairs)} user skills, "
+            f"{teams} teams in {time.perf_counter() - start:.1f}s"
+        ))
+
+    def insert_rows(self, model, fields, rows, chunk_size):
+        """
+        Plain INSERT of value tuples with executemany, one transaction per chunk;
+        rows that conflict are skipped. At millions of rows, building model
+        instances and preparing every value is most of bulk_create's cost.
+        """
+        ops = connection.ops
+        columns = ', '.join(ops.quote_name(model._meta.get_field(f).column) for f in fields)
+        sql = (
+            f"{ops.insert_statement(on_conflict=OnConflict.IGNORE)} {ops.quote_name(model._meta.db_table)} "
+            f"({columns}) VALUES ({', '.join(['%s'] * len(fields))}) "
+            f"{ops.on_conflict_suffix_sql(None, OnConflict.IGNORE, None, None)}"
+        )
+        chunk = []
+
+        def flush():
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, chunk)
+            chunk.clear()
+
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+
+    @staticmethod
+    def id_map(rows, names):
+        """List of ids in the order of names, from (name, id) rows."""
+        ids = dict(rows)
+        return [ids[name] for name in names]
@@ -0,0 +1,203 @@
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Lower
+
+from .models import TeamReadiness, UserSkill
+from .skill_index import LEVEL_SCORES, skill_index
+from .skill_matrix import skill_matrix
+
+'''
+Match engines for /api/match/.
+Each engine takes {skill_id: skill_name} and returns (total, page), where page
+is a list of {'user_id', 'score', 'skills_matched'} ordered best score first,
+ties by user id. after=(score, user_id), the 'cursor' of a page's last entry,
+continues the ranking from there (keyset paging); total always counts every match.
+'''
+
+
+def _after(score, user_id):
+    """Rows ranked after (score, user_id) in a -score, user_id ordering."""
+    return Q(score__lt=score) | Q(score=score, user_id__gt=user_id)
+
+
+def match_with_orm(skills, limit=None, offset=0, after=None):
+    """Original path: fold every matching UserSkill row in Python."""
+    matched_users = {}
+    user_skills = UserSkill.objects.filter(skill__id__in=list(skills)).select_related('user', 'skill')
+
+    for us in user_skills:
+        uid = us.user.id
+        if uid not in matched_users:
+            matched_users[uid] = {'user_id': uid, 'score': 0, 'skills_matched': []}
+
+        score = LEVEL_SCORES.get(us.level.lower(), 0)
+        matched_users[uid]['score'] += score
+        matched_users[uid]['skills_matched'].append({
+            'skill': us.skill.name,
+            'level': us.level,
+            'score': score
+        })
+
+    sorted_users = sorted(matched_users.values(), key=lambda x: (-x['score'], x['user_id']))
+    total = len(sorted_users)
+    if after is not None:
+        sorted_users = [u for u in sorted_users if (-u['score'], u['user_id']) > (-after[0], after[1])]
+    end = None if limit is None else offset + limit
+    page = sorted_users[offset:end]
+    for entry in page:
+        entry['cursor'] = [entry['score'], entry['user_id']]
+    return total, page
+
+
+def match_with_index(skills, limit=None, offset=0, after=None, index=skill_index):
+    """Score against the in-process inverted index; no UserSkill query."""
+    total, page = index.match(list(skills), limit=limit, offset=offset, after=after)
+    for entry in page:
+        entry['cursor'] = [entry['score'], entry['user_id']]
+        entry['skills_matched'] = [
+            {'skill': skills[sid], 'level': level, 'score': score}
+            for sid, level, score in entry['skills_matched']
+        ]
+    return total, page
+
+
+def match_with_shared(skills, limit=None, offset=0, after=None):
+    """Score against the memory-mapped snapshot shared by all worker processes (team/skill_matrix.py)."""
+    return match_with_index(skills, limit=limit, offset=offset, after=after, index=skill_matrix)
+
+
+def match_with_sql(skills, limit=None, offset=0, after=None):
+    """
+    Aggregate in the database: one row per user with the summed level score,
+    ordered and sliced in SQL. Relies on the UserSkill(skill, level, user) index.
+    """
+    # levels written before set-skills lowercased them may be capitalised; the other engines fold case too
+    level_score = Case(
+        *[When(level_key=level, then=Value(score)) for level, score in LEVEL_SCORES.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    rows = UserSkill.objects.filter(skill_id__in=list(skills)).alias(level_key=Lower('level'))
+    total = rows.values('user_id').distinct().count()
+
+    ranked = (
+        rows.values('user_id')
+        .annotate(score=Sum(level_score), matched_count=Count('id'))
+        .order_by('-score', 'user_id')
+    )
+    if after is not None:
+        ranked = ranked.filter(_after(*after))
+    end = None if limit is None else offset + limit
+    page = [
+        {'user_id': r['user_id'], 'score': r['score'], 'matched_count': r['matched_count'], 'skills_matched': [],
+         'cursor': [r['score'], r['user_id']]}
+        for r in ranked[offset:end]
+    ]
+    if not page:
+        return total, page
+
+    # Matched-skill details for the page only: at most len(page) * len(skills) rows.
+    by_user = {entry['user_id']: entry for entry in page}
+    details = rows.filter(user_id__in=list(by_user)).values_list('user_id', 'skill_id', 'level').order_by('skill_id')
+    for user_id, skill_id, level in details:
+        by_user[user_id]['skills_matched'].append({
+            'skill': skills[skill_id],
+            'level': level,
+            'score': LEVEL_SCORES.get(level.lower(), 0)
+        })
+    return total, page
+
+
+def match_team_readiness(team, limit=None, offset=0, after=None):
+    """
+    /api/match/?team=<id>: users ordered by readiness for team, read from the
+    TeamReadiness table. Page entries also carry matched_count and required_count;
+    their cursor is (readiness %, user_id), a seek on the (team, -score, user) index.
+    """
+    rows = TeamReadiness.objects.filter(team=team)
+    total = rows.count()
+    if after is not None:
+        rows = rows.filter(_after(*after))
+    end = None if limit is None else offset + limit
+    page = [
+        {'user_id': user_id, 'score': 0, 'matched_count': matched, 'required_count': required, 'skills_matched': [],
+         'cursor': [readiness, user_id]}
+        for user_id, matched, required, readiness in rows.order_by('-score', 'user_id').values_list(
+            'user_id', 'matched_count', 'required_count', 'score'
+        )[offset:end]
+    ]
+    if not page:
+        return total, page
+
+    by_user = {entry['user_id']: entry for entry in page}
+    details = (
+        UserSkill.objects.filter(user_id__in=list(by_user), skill__team=team)
+        .values_list('user_id', 'skill__name', 'level').order_by('skill__name')
+    )
+    for user_id, name, level in details:
+        score = LEVEL_SCORES.get(level.lower(), 0)
+        by_user[user_id]['score'] += score
+        by_user[user_id]['skills_matched'].append({'skill': name, 'level': level, 'score': score})
+    return total, page
+
+
+MATCH_ENGINES = {
+    'orm': match_with_orm,
+    'index': match_with_index,
+    'shared': match_with_shared,
+    'sql': match_with_sql,
+}
+
+
+def run_match(skills, limit=None, offset=0, engine=None, after=None):
+    engine = engine or getattr(settings, 'SKILL_MATCH_ENGINE', 'index')
+    return MATCH_ENGINES[engine](skills, limit=limit, offset=offset, after=after)
+
+
+def rank_team_candidates(required, exclude=(), min_readiness=0, limit=None, offset=0):
+    """
+    Rank every user against a team's required skills {skill_id: name} with
+    numpy over those skills' columns of the in-memory index (skill_index.arrays).
+    Only active UserSkill rows count.
+
+    readiness: % of required skills held. score: the same coverage weighted by
+    level (advanced = 1) and experience (full weight at CANDIDATE_EXPERIENCE_CAP years).
+    Users are ordered by readiness, then score. Returns (total, page).
+    """
+    cap = getattr(settings, 'CANDIDATE_EXPERIENCE_CAP', 10)
+    top_level = max(LEVEL_SCORES.values())
+    required_count = len(required) or 1
+
+    columns = skill_index.arrays(list(required))
+    if columns:
+        users, levels, years, active = (np.concatenate(parts) for parts in zip(*columns))
+        users, levels, years = users[active], levels[active], years[active]
+    else:
+        users = levels = years = np.zeros(0, dtype=np.int64)
+    user_ids, inverse = np.unique(users, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(user_ids))
+    weighted = np.bincount(inverse, weights=levels / top_level * (0.5 + 0.5 * np.minimum(years, cap) / cap),
+                           minlength=len(user_ids))
+
+    keep = counts >= min_readiness * required_count / 100
+    if exclude:
+        keep &= ~np.isin(user_ids, np.fromiter(set(exclude), dtype=np.int64))
+    user_ids, counts, weighted = user_ids[keep], counts[keep], weighted[keep]
+    order = np.lexsort((user_ids, -weighted, -counts))
+    end = None if limit is None else offset + limit
+
+    page = []
+    for uid, count, total in zip(*(a[order[offset:end]].tolist() for a in (user_ids, counts, weighted))):
+        held = {sid: e for sid, e in skill_index.user_entries(uid, required).items() if e[2]}
+        page.append({
+            'user_id': uid,
+            'readiness': round(count * 100 / required_count),
+            'score': round(total * 100 / required_count, 1),
+            'matched_skills': [
+                {'skill': required[sid], 'level': level, 'experience_years': years}
+                for sid, (level, years, _) in held.items()
+            ],
+            'missing_skills': sorted(name for sid, name in required.items() if sid not in held),
+        })
+    return len(user_ids), page
@@ -0,0 +1,252 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+'''
+Per-route request metrics, exported in Prometheus text format at /api/metrics/.
+
+MetricsMiddleware (team/middleware.py) opens a RequestStats for each request
+in a context variable. Hooks add to it while the request runs:
+  - query_timer, installed on every DB connection (see team/signals.py),
+  - timer('llm') around the Gemini calls in team/llm.py,
+  - TimedRepresentation on the serializers.
+When the response is done the totals go into fixed-bucket histograms keyed by
+(method, route); a streaming response is done once its body has been sent, so
+the queries run while it is iterated are counted too. Observing is a bisect and a few increments under one lock,
+and the hooks do nothing outside a request. Counters are per process.
+'''
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+METRICS = {
+    # name: (help, buckets)
+    'request_seconds': ('Wall time of the request', SECONDS_BUCKETS),
+    'db_seconds': ('Time spent executing SQL', SECONDS_BUCKETS),
+    'db_queries': ('SQL statements executed', QUERY_BUCKETS),
+    'llm_seconds': ('Time spent waiting on Gemini', SECONDS_BUCKETS),
+    'serialize_seconds': ('Time spent in serializer to_representation', SECONDS_BUCKETS),
+    'response_bytes': ('Size of the response body', BYTES_BUCKETS),
+}
+PREFIX = 'skillmatch_'
+NAMED_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+class RequestStats:
+    __slots__ = ('db_seconds', 'db_queries', 'llm_seconds', 'serialize_seconds', 'serialize_depth')
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.llm_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.serialize_depth = 0
+
+
+_current = ContextVar('request_stats', default=None)
+
+
+def begin():
+    """Start collecting for the current request; returns (token, stats)."""
+    stats = RequestStats()
+    return _current.set(stats), stats
+
+
+def end(token):
+    _current.reset(token)
+
+
+def query_timer(execute, sql, params, many, context):
+    """connection.execute_wrapper hook: time every statement run during a request."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_seconds += time.perf_counter() - start
+        stats.db_queries += 1
+
+
+def install_query_timer(connection):
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+@contextmanager
+def timer(name):
+    """Add the block's wall time to the current request's <name>_seconds."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(stats, f'{name}_seconds', getattr(stats, f'{name}_seconds') + time.perf_counter() - start)
+
+
+class TimedRepresentation:
+    """Serializer mixin: count to_representation time, outermost call only."""
+
+    def to_representation(self, instance):
+        stats = _current.get()
+        if stats is None or stats.serialize_depth:
+            return super().to_representation(instance)
+        stats.serialize_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serialize_seconds += time.perf_counter() - start
+            stats.serialize_depth -= 1
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}  # (method, route) -> {metric: Histogram}
+
+    def observe(self, method, route, values):
+        with self._lock:
+            series = self._series.get((method, route))
+            if series is None:
+                series = self._series[(method, route)] = {
+                    name: Histogram(buckets) for name, (_, buckets) in METRICS.items()
+                }
+            for name, value in values.items():
+                series[name].observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        with self._lock:
+            snapshot = {
+                key: {name: (list(h.counts), h.sum, h.count) for name, h in series.items()}
+                for key, series in self._series.items()
+            }
+        lines = []
+        for name, (help_text, buckets) in METRICS.items():
+            metric = PREFIX + name
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} histogram')
+            for (method, route), series in sorted(snapshot.items()):
+                counts, total, count = series[name]
+                labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+                cumulative = 0
+                for bound, n in zip(buckets + ('+Inf',), counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{labels}}} {total:g}')
+                lines.append(f'{metric}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+_route_labels = {}
+
+
+def route_of(request):
+    """
+    URL pattern the request resolved to, so ids do not explode the label set.
+    Router regexes are tidied to the path() style: ^teams/(?P<pk>[^/.]+)/$ -> teams/<pk>/
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    label = _route_labels.get(match.route)
+    if label is None:
+        label = _route_labels[match.route] = NAMED_GROUP.sub(r'<\1>', match.route).replace('^', '').replace('$', '')
+    return label
+
+
+def finish(request, response, stats, start):
+    """Record the request now, or for a streaming response once its body is exhausted or closed."""
+    if not response.streaming:
+        record(request, response, stats, time.perf_counter() - start)
+        return
+
+    def done(size):
+        record(request, response, stats, time.perf_counter() - start, size)
+
+    wrap = _astream if response.is_async else _stream
+    response.streaming_content = wrap(response.streaming_content, stats, done)
+
+
+def _stream(chunks, stats, done):
+    size = 0
+    chunks = iter(chunks)
+    try:
+        while True:
+            # the middleware has returned by now; put the request's stats back while its body is produced
+            token = _current.set(stats)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            size += len(chunk)
+            yield chunk
+    finally:
+        done(size)
+
+
+async def _astream(chunks, stats, done):
+    size = 0
+    chunks = aiter(chunks)
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = await anext(chunks)
+            except StopAsyncIteration:
+                return
+            finally:
+                _current.reset(token)
+            size += len(chunk)
+            yield chunk
+    finally:
+        done(size)
+
+
+def record(request, response, stats, seconds, size=None):
+    if size is None:
+        size = 0 if response.streaming else len(response.content)
+    registry.observe(request.method, route_of(request), {
+        'request_seconds': seconds,
+        'db_seconds': stats.db_seconds,
+        'db_queries': stats.db_queries,
+        'llm_seconds': stats.llm_seconds,
+        'serialize_seconds': stats.serialize_seconds,
+        'response_bytes': size,
+    })
@@ -0,0 +1,97 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import metrics, profiling
+
+
+class MetricsMiddleware:
+    """Time every request and feed the per-route histograms in team/metrics.py."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token, stats = metrics.begin()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end(token)
+        metrics.finish(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        token, stats = metrics.begin()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end(token)
+        metrics.finish(request, response, stats, start)
+        return response
+
+
+def _staff_user(request):
+    """The staff user behind request (session or token), else None."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        drf_request = Request(
+            request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+        )
+        try:
+            user = drf_request.user
+        except APIException:
+            return None
+    return user if user and user.is_staff else None
+
+
+class ProfilerMiddleware:
+    """
+    Staff can add ?profile=1 (or an X-Profile: 1 header) to any request to have
+    it profiled, with its SQL, into the ring buffer of team/profiling.py. The
+    capture id comes back in X-Profile-Id. Async requests are not profiled, nor
+    are requests that arrive while the profiler is busy with another one.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+        if request.GET.get('profile') != '1' and request.headers.get('X-Profile') != '1':
+            return self.get_response(request)
+        request.profile_user = _staff_user(request)
+        if request.profile_user is None:
+            return self.get_response(request)
+        with profiling.capture() as result:
+            response = self.get_response(request)
+        if result is None:  # another request holds the profiler
+            return response
+        profiling.save(result, request, response)
+        response['X-Profile-Id'] = result.id
+        return response
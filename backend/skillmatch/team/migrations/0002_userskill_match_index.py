@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userskill',
+            index=models.Index(fields=['skill', 'level', 'user'], name='userskill_skill_level_user'),
+        ),
+    ]
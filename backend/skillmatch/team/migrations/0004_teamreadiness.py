@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0003_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamReadiness',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matched_count', models.PositiveIntegerField(default=0)),
+                ('required_count', models.PositiveIntegerField(default=0)),
+                ('score', models.FloatField(default=0)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='team.team')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['team', '-score', 'user'], name='teamreadiness_team_score')],
+                'unique_together': {('user', 'team')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+from django.db.models import Max
+
+CHANGE_SEQUENCE = 'change'
+
+
+def number_existing(apps, schema_editor):
+    Change = apps.get_model('team', 'Change')
+    CatalogVersion = apps.get_model('team', 'CatalogVersion')
+    Change.objects.update(position=models.F('id'))
+    last = Change.objects.aggregate(last=Max('id'))['last'] or 0
+    CatalogVersion.objects.update_or_create(name=CHANGE_SEQUENCE, defaults={'version': last})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0006_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='change',
+            name='position',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(number_existing, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='change',
+            name='position',
+            field=models.BigIntegerField(unique=True),
+        ),
+    ]
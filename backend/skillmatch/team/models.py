@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 '''
@@ -38,6 +39,10 @@ class UserSkill(models.Model):
     is_active = models.BooleanField(default=True)
     class Meta:
         unique_together = ('user', 'skill')
+        indexes = [
+            # covers the aggregated match query: filter on skill, sum over level, group by user
+            models.Index(fields=['skill', 'level', 'user'], name='userskill_skill_level_user'),
+        ]
 
     def __str__(self):
         return f"self.user.username - {self.skill.name} ({self.level})"
@@ -62,4 +67,109 @@ class TeamRole(models.Model):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     is_active = models.BooleanField(default=True)
     def __str__(self):
-        return f"{self.user.username} on {self.team.name} as {self.get_role_display()}"
\ No newline at end of file
+        return f"{self.user.username} on {self.team.name} as {self.get_role_display()}"
+
+class TeamReadiness(models.Model):
+    """
+    Materialized matched/required counts per (user, team), kept current by
+    team/readiness.py. Only pairs with at least one matched skill have a row.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE)
+    matched_count = models.PositiveIntegerField(default=0)
+    required_count = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0)  # matched / required, as a percentage
+
+    class Meta:
+        unique_together = ('user', 'team')
+        indexes = [
+            models.Index(fields=['team', '-score', 'user'], name='teamreadiness_team_score'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} for {self.team_id}: {self.matched_count}/{self.required_count}"
+
+
+class CatalogVersion(models.Model):
+    """
+    Write counter per resource (skill, team, ...), bumped by team/versions.py
+    after every committed change. Drives ETags and the list body cache.
+    """
+    name = models.CharField(max_length=32, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class Change(models.Model):
+    """
+    One committed write to a skill, team, team role, user skill or required
+    skill, appended by team/changes.py. position orders the /api/changes/ feed:
+    unlike id, it is handed out in commit order.
+    """
+    ACTION_CHOICES = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    position = models.BigIntegerField(unique=True)
+    resource = models.CharField(max_length=32)
+    object_id = models.CharField(max_length=64)  # "<user>:<skill>" / "<team>:<skill>" for link rows
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    data = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.resource} {self.object_id}"
+
+
+class Job(TimeStampedModel):
+    """
+    Background LLM work (gap analysis, skill extraction) run by `manage.py run_jobs`.
+    dedupe_key is a hash of kind + payload; only one pending/running job may hold it.
+    """
+    KIND_CHOICES = [
+        ('skill_gap', 'Skill gap analysis'),
+        ('extract_skills', 'Skill extraction'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    dedupe_key = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='job_unique_active_dedupe_key',
+            ),
+        ]
+
+    @property
+    def is_done(self):
+        return self.status in ('succeeded', 'failed')
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
@@ -0,0 +1,86 @@
+import base64
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+'''
+Keyset (cursor) paging and NDJSON streaming for /api/users/ and /api/match/.
+
+A cursor is the ranking position of the last row sent (the user id, or
+(score, user id) for matches), base64-encoded JSON, so the next page is a
+"WHERE key > cursor" seek rather than an OFFSET scan and stays stable while
+rows are added. The body stays a plain list; the next cursor is in
+X-Next-Cursor and in a Link: <...>; rel="next" header.
+
+Sending Accept: application/x-ndjson (or ?format=ndjson) streams one JSON
+object per line from a server-side iterator instead of building the list.
+'''
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Lets views negotiate application/x-ndjson; streamed bodies bypass it, errors do not."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(row, cls=JSONEncoder) + '\n' for row in rows).encode()
+
+
+def wants_ndjson(request):
+    return request.accepted_renderer.format == 'ndjson'
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Key list of the given length from a cursor; ValueError if it is not one of ours."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    if not isinstance(key, list) or len(key) != length or \
+            not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in key):
+        raise ValueError("invalid cursor")
+    return key
+
+
+def page_size(request, param='page_size'):
+    """?page_size= (None when absent and there is no cursor), capped at API_MAX_PAGE_SIZE."""
+    size = request.GET.get(param)
+    if size in (None, ''):
+        return getattr(settings, 'API_PAGE_SIZE', 100) if request.GET.get('cursor') else None
+    try:
+        size = int(size)
+    except ValueError:
+        raise ValueError(f"{param} must be an integer")
+    max_size = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+    if not 1 <= size <= max_size:
+        raise ValueError(f"{param} must be between 1 and {max_size}")
+    return size
+
+
+def next_page_headers(request, key):
+    """X-Next-Cursor and Link headers pointing at the page after key (none when key is None)."""
+    if key is None:
+        return {}
+    cursor = encode_cursor(key)
+    url = remove_query_param(replace_query_param(request.build_absolute_uri(), 'cursor', cursor), 'offset')
+    return {'X-Next-Cursor': cursor, 'Link': f'<{url}>; rel="next"'}
+
+
+def stream(rows, headers=None):
+    """StreamingHttpResponse writing each dict from the rows iterator as one NDJSON line."""
+    response = StreamingHttpResponse(
+        (json.dumps(row, cls=JSONEncoder) + '\n' for row in rows), content_type=NDJSONRenderer.media_type
+    )
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
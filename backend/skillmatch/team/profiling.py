@@ -0,0 +1,189 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # optional: fall back to cProfile
+    SamplingProfiler = None
+
+'''
+Opt-in request profiling for staff (?profile=1 or an X-Profile header, see
+ProfilerMiddleware in team/middleware.py).
+
+Each capture is written to PROFILE_DIR as <id>.json (request, timings and the
+SQL log) next to <id>.prof (cProfile stats) or <id>.txt (pyinstrument's
+report, used when pyinstrument is installed). Ids start with a timestamp, so
+the directory is a ring buffer: after each write only the newest
+PROFILE_MAX_ENTRIES captures are kept.
+
+cProfile can only run one profiler per process from Python 3.12 (it claims
+the single sys.monitoring profiler slot), so cProfile captures take turns:
+a request that arrives while another is being profiled is served unprofiled.
+'''
+
+CAPTURE_ID = re.compile(r'^\d{19}-[0-9a-f]{8}$')
+SQL_PARAMS_CHARS = 200
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+_cprofile_lock = threading.Lock()
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILE_DIR', os.path.join(settings.BASE_DIR, '.cache', 'profiles')))
+
+
+class Capture:
+    def __init__(self):
+        self.id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        self.queries = []
+        self.profiler = None
+        self.kind = 'pyinstrument' if SamplingProfiler else 'cprofile'
+        self.wall_ms = 0.0
+
+    def log_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': repr(params)[:SQL_PARAMS_CHARS],
+                'many': many,
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+@contextmanager
+def capture():
+    """Profile the block and log its SQL; yields the Capture, or None when the profiler is busy."""
+    result = Capture()
+    if SamplingProfiler:
+        result.profiler = SamplingProfiler()
+        start_profiler, stop_profiler = result.profiler.start, result.profiler.stop
+    elif _cprofile_lock.acquire(blocking=False):
+        result.profiler = cProfile.Profile()
+        start_profiler, stop_profiler = result.profiler.enable, result.profiler.disable
+    else:
+        yield None
+        return
+    try:
+        try:
+            start_profiler()
+        except ValueError:  # another tool (a debugger, coverage) holds the profiler slot
+            yield None
+            return
+        start = time.perf_counter()
+        with connection.execute_wrapper(result.log_query):
+            try:
+                yield result
+            finally:
+                stop_profiler()
+                result.wall_ms = round((time.perf_counter() - start) * 1000, 3)
+    finally:
+        if not SamplingProfiler:
+            _cprofile_lock.release()
+
+
+def save(result, request, response):
+    """Write the capture to the ring buffer and drop the oldest ones."""
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    meta = {
+        'id': result.id,
+        'created': time.time(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user': getattr(getattr(request, 'profile_user', None), 'username', None),
+        'status': response.status_code,
+        'profiler': result.kind,
+        'wall_ms': result.wall_ms,
+        'db_ms': round(sum(q['ms'] for q in result.queries), 3),
+        'query_count': len(result.queries),
+        'queries': result.queries,
+    }
+    base = os.path.join(directory, result.id)
+    if result.kind == 'cprofile':
+        result.profiler.dump_stats(base + '.prof')
+    else:
+        _write(base + '.txt', result.profiler.output_text(unicode=True, color=False))
+    _write(base + '.json', json.dumps(meta))
+    _prune(directory, getattr(settings, 'PROFILE_MAX_ENTRIES', 50))
+    return meta
+
+
+def _write(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _prune(directory, keep):
+    ids = sorted(name[:-5] for name in os.listdir(directory) if name.endswith('.json'))
+    for old in ids[:-keep] if keep else ids:
+        for suffix in ('.json', '.prof', '.txt'):
+            try:
+                os.remove(os.path.join(directory, old + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_captures():
+    """Summaries of the stored captures, newest first."""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.endswith('.json'):
+            meta = load(name[:-5])
+            if meta is not None:
+                meta.pop('queries')
+                summaries.append(meta)
+    return summaries
+
+
+def load(capture_id):
+    """Stored metadata and SQL log for capture_id, or None."""
+    if not CAPTURE_ID.match(capture_id or ''):
+        return None
+    try:
+        with open(os.path.join(profile_dir(), capture_id + '.json')) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def hotspots(capture_id, sort='cumulative', limit=25):
+    """
+    Top functions of a cProfile capture as dicts (calls, tottime_ms, cumtime_ms,
+    function), or pyinstrument's text report as a string.
+    """
+    base = os.path.join(profile_dir(), capture_id)
+    if os.path.exists(base + '.txt'):
+        with open(base + '.txt') as f:
+            return f.read()
+    stats = pstats.Stats(base + '.prof', stream=io.StringIO())
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        _, calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            'function': f"{filename}:{line}({name})",
+            'calls': calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        })
+    return rows
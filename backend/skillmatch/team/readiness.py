@@ -0,0 +1,163 @@
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast
+
+from .models import Team, TeamReadiness, UserSkill
+
+'''
+Maintenance of the TeamReadiness table.
+
+Every write is turned into deltas on (user, team) matched counts: a UserSkill
+row added or removed moves the count for each team requiring that skill, and
+a skill added to or removed from a team moves the count for each user holding
+it. Changes run inside the writer's transaction, so the table never disagrees
+with what was committed. rebuild() recomputes from scratch for
+`manage.py rebuild_readiness` and the seed command.
+'''
+
+RequiredSkill = Team.required_skills.through
+
+_state = threading.local()
+
+
+def _score(matched):
+    return Cast(matched, FloatField()) * 100 / F('required_count')
+
+
+def _required_counts(team_ids):
+    return dict(
+        Team.objects.filter(id__in=team_ids).annotate(n=Count('required_skills')).values_list('id', 'n')
+    )
+
+
+def _apply(deltas):
+    """Apply {(user_id, team_id): change in matched count}."""
+    deltas = {pair: d for pair, d in deltas.items() if d}
+    if not deltas:
+        return
+    team_ids = {team_id for _, team_id in deltas}
+    required = _required_counts(team_ids)
+
+    TeamReadiness.objects.bulk_create(
+        [TeamReadiness(user_id=user_id, team_id=team_id, required_count=required[team_id])
+         for (user_id, team_id), d in deltas.items() if d > 0],
+        ignore_conflicts=True,
+    )
+    # one UPDATE per (team, delta) or per (user, delta), whichever needs fewer:
+    # a team change touches many users, one user's edit touches many teams
+    by_team, by_user = defaultdict(list), defaultdict(list)
+    for (user_id, team_id), d in deltas.items():
+        by_team[(team_id, d)].append(user_id)
+        by_user[(user_id, d)].append(team_id)
+    if len(by_team) <= len(by_user):
+        updates = [({'team_id': t, 'user_id__in': users}, d) for (t, d), users in by_team.items()]
+    else:
+        updates = [({'user_id': u, 'team_id__in': teams}, d) for (u, d), teams in by_user.items()]
+    for lookup, d in updates:
+        TeamReadiness.objects.filter(**lookup).update(
+            matched_count=F('matched_count') + d, score=_score(F('matched_count') + d)
+        )
+    TeamReadiness.objects.filter(team_id__in=team_ids, matched_count__lte=0).delete()
+
+
+@contextmanager
+def deferred():
+    """
+    Collect UserSkill changes made inside the block and apply them in one
+    batch on exit, instead of a few queries per row. Nests.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = pending = Counter()
+    try:
+        yield
+    finally:
+        _state.pending = None
+    _apply_user_skills(pending)
+
+
+def user_skills_changed(pairs, sign):
+    """pairs of (user_id, skill_id) were added (sign=1) or removed (sign=-1)."""
+    pending = getattr(_state, 'pending', None)
+    changes = Counter() if pending is None else pending
+    for pair in pairs:
+        changes[pair] += sign
+    if pending is None:
+        _apply_user_skills(changes)
+
+
+def _apply_user_skills(changes):
+    changes = {pair: d for pair, d in changes.items() if d}
+    if not changes:
+        return
+    teams = defaultdict(list)
+    for skill_id, team_id in RequiredSkill.objects.filter(
+            skill_id__in={skill_id for _, skill_id in changes}).values_list('skill_id', 'team_id'):
+        teams[skill_id].append(team_id)
+    deltas = Counter()
+    for (user_id, skill_id), d in changes.items():
+        for team_id in teams[skill_id]:
+            deltas[(user_id, team_id)] += d
+    _apply(deltas)
+
+
+def requirements_changed(team_id, skill_ids, sign):
+    """skill_ids were added to (sign=1) or removed from (sign=-1) team_id's required skills."""
+    required = _required_counts([team_id]).get(team_id, 0)
+    rows = TeamReadiness.objects.filter(team_id=team_id)
+    if not required:
+        rows.delete()
+        return
+    rows.update(required_count=required, score=Cast(F('matched_count'), FloatField()) * 100 / required)
+    holders = UserSkill.objects.filter(skill_id__in=skill_ids).values('user_id').annotate(n=Count('id')).order_by()
+    _apply({(row['user_id'], team_id): sign * row['n'] for row in holders})
+
+
+def rebuild(team_ids=None):
+    """
+    Recompute the table (or the rows of team_ids) from UserSkill and required
+    skills. The counting and the insert both happen in the database, in one
+    INSERT ... SELECT. Returns the number of rows written.
+    """
+    where, params = '', []
+    if team_ids is not None:
+        team_ids = list(team_ids)
+        if not team_ids:
+            return 0
+        where = f"WHERE rs.team_id IN ({', '.join(['%s'] * len(team_ids))})"
+        params = team_ids
+
+    table = connection.ops.quote_name(TeamReadiness._meta.db_table)
+    required = connection.ops.quote_name(RequiredSkill._meta.db_table)
+    user_skill = connection.ops.quote_name(UserSkill._meta.db_table)
+    with transaction.atomic():
+        existing = TeamReadiness.objects.all()
+        if team_ids is not None:
+            existing = existing.filter(team_id__in=team_ids)
+        existing.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {table} (user_id, team_id, matched_count, required_count, score)
+                SELECT us.user_id, rs.team_id, COUNT(*), rc.n, COUNT(*) * 100.0 / rc.n
+                FROM {user_skill} us
+                JOIN {required} rs ON rs.skill_id = us.skill_id
+                JOIN (SELECT team_id, COUNT(*) AS n FROM {required} GROUP BY team_id) rc
+                  ON rc.team_id = rs.team_id
+                {where}
+                GROUP BY us.user_id, rs.team_id, rc.n
+            """, params)
+            return cursor.rowcount
+
+
+def lookup(user_id, team_id):
+    """(matched_count, required_count, score) for one pair; one query when the row exists."""
+    row = TeamReadiness.objects.filter(user_id=user_id, team_id=team_id).values_list(
+        'matched_count', 'required_count', 'score').first()
+    if row is None:
+        return 0, _required_counts([team_id]).get(team_id, 0), 0.0
+    return row
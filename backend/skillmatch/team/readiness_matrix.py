@@ -0,0 +1,123 @@
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+from .models import Team, UserSkill
+
+'''
+Bulk (non-LLM) gap analysis for every user against every team.
+
+A is the user x skill matrix of UserSkill rows and R the skill x team matrix
+of Team.required_skills, both 0/1 and sparse. A @ R gives matched-skill counts
+for every (user, team) pair in one product; required counts are R's column
+sums, and missing = required - matched. Pairs with nothing matched are not
+stored: their readiness is 0.
+'''
+
+
+class ReadinessMatrix:
+    def __init__(self, user_ids, team_ids, required, matched):
+        self.user_ids = user_ids      # row index -> user id
+        self.team_ids = team_ids      # column index -> team id
+        self.required = required      # per team, number of required skills
+        self.matched = matched        # CSR users x teams, matched counts
+        # select() works on these flat pair arrays; computing them once per build
+        # (rather than per request) keeps paging through the matrix cheap
+        coo = matched.tocoo()
+        self.rows, self.cols, self.counts = coo.row, coo.col, coo.data
+        self.readiness = np.rint(self.counts * 100 / np.maximum(required[self.cols], 1)).astype(np.int64)
+        # pair indexes grouped by team (user order kept), so one team is a slice
+        self.by_team = np.argsort(self.cols, kind='stable')
+        self.team_starts = np.searchsorted(self.cols[self.by_team], np.arange(len(team_ids) + 1))
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls):
+        rows = np.fromiter(
+            (v for pair in UserSkill.objects.values_list('user_id', 'skill_id').iterator(chunk_size=20000)
+             for v in pair),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        reqs = np.fromiter(
+            (v for pair in Team.required_skills.through.objects.values_list('team_id', 'skill_id') for v in pair),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        team_ids = np.array(sorted(Team.objects.values_list('id', flat=True)), dtype=np.int64)
+
+        user_ids, user_idx = np.unique(rows[:, 0], return_inverse=True)
+        skill_ids = np.unique(np.concatenate([rows[:, 1], reqs[:, 1]]))
+        a = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (user_idx, np.searchsorted(skill_ids, rows[:, 1]))),
+            shape=(len(user_ids), len(skill_ids)),
+        )
+        r = sparse.csc_matrix(
+            (np.ones(len(reqs), dtype=np.int32),
+             (np.searchsorted(skill_ids, reqs[:, 1]), np.searchsorted(team_ids, reqs[:, 0]))),
+            shape=(len(skill_ids), len(team_ids)),
+        )
+        matched = (a @ r).tocsr()
+        matched.sort_indices()
+        required = np.asarray(r.sum(axis=0)).ravel()
+        return cls(user_ids, team_ids, required, matched)
+
+    @property
+    def nnz(self):
+        return self.matched.nnz
+
+    def select(self, team_id=None, min_readiness=0):
+        """
+        Pairs with at least one matched skill, ordered by user then team, as a dict of
+        parallel arrays: user_id, team_id, matched, required, readiness (0-100).
+        """
+        if team_id is None:
+            pairs = slice(None)
+        else:
+            col = np.searchsorted(self.team_ids, team_id)
+            if col >= len(self.team_ids) or self.team_ids[col] != team_id:
+                pairs = self.by_team[:0]
+            else:
+                pairs = self.by_team[self.team_starts[col]:self.team_starts[col + 1]]
+        if min_readiness and team_id is None:
+            pairs = np.flatnonzero(self.readiness >= min_readiness)
+        elif min_readiness:
+            pairs = pairs[self.readiness[pairs] >= min_readiness]
+
+        rows, cols = self.rows[pairs], self.cols[pairs]
+        counts, readiness = self.counts[pairs], self.readiness[pairs]
+        required = self.required[cols]
+        return {
+            'user_id': self.user_ids[rows],
+            'team_id': self.team_ids[cols],
+            'matched': counts,
+            'required': required,
+            'readiness': readiness,
+        }
+
+
+FIELDS = ('user_id', 'team_id', 'matched', 'required', 'readiness')
+
+
+def iter_rows(selection, start=0, stop=None):
+    """Yield plain-int dicts from a select() result, optionally sliced."""
+    columns = [selection[f][start:stop].tolist() for f in FIELDS]
+    for values in zip(*columns):
+        row = dict(zip(FIELDS, values))
+        row['missing'] = row['required'] - row['matched']
+        yield row
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def get_matrix(refresh=False):
+    """Process-wide matrix, rebuilt when older than READINESS_MATRIX_TTL seconds."""
+    global _current
+    ttl = getattr(settings, 'READINESS_MATRIX_TTL', 300)
+    with _lock:
+        if refresh or _current is None or time.monotonic() - _current.built_at > ttl:
+            _current = ReadinessMatrix.build()
+        return _current
@@ -1,21 +1,139 @@
-
-from .models import User, Skill, Team, TeamRole, UserSkill, Skill
+from .models import User, Skill, Team, TeamRole, UserSkill, Skill, Job, Change
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-class SkillSerializer(serializers.ModelSerializer):
+from .metrics import TimedRepresentation
+
+
+def _is_prefetched(obj, name):
+    return name in getattr(obj, '_prefetched_objects_cache', {})
+
+
+def _split(param):
+    return [path.split('.') for path in (param or '').split(',') if path.strip()]
+
+
+class Shape:
+    """
+    The response shape asked for with ?fields= and ?expand=, e.g.
+    /api/teams/?fields=id,name,members.role&expand=members.user
+    fields holds the names kept at this level (None keeps them all); children
+    holds the Shape of each nested or expanded relation named in either one.
+    """
+
+    def __init__(self):
+        self.fields = None
+        self.children = {}
+
+    def child(self, name):
+        return self.children.setdefault(name, Shape())
+
+    def keep(self, name):
+        if self.fields is None:
+            self.fields = set()
+        self.fields.add(name)
+
+    @classmethod
+    def from_request(cls, request, serializer_class):
+        """None when neither parameter is given (the full shape, as before); ValueError on unknown names."""
+        fields, expand = request.GET.get('fields'), request.GET.get('expand')
+        if fields is None and expand is None:
+            return None
+        shape = cls()
+        for path in _split(expand):
+            node = shape
+            for name in path:
+                node = node.child(name.strip())
+        for path in _split(fields):
+            node = shape
+            for name in path[:-1]:
+                node.keep(name.strip())
+                node = node.child(name.strip())
+            node.keep(path[-1].strip())
+        shape.check(serializer_class)
+        return shape
+
+    def check(self, serializer_class, prefix=''):
+        relations = {**serializer_class.nested_fields, **serializer_class.expandable_fields}
+        for name in sorted((self.fields or set()) | set(self.children)):
+            if name not in serializer_class.Meta.fields:
+                raise ValueError(f"unknown field: {prefix}{name}")
+        for name, child in sorted(self.children.items()):
+            if name not in relations:
+                raise ValueError(f"{prefix}{name} is not a relation")
+            if relations[name] is not None:
+                child.check(relations[name], f"{prefix}{name}.")
+            elif child.fields is not None or child.children:
+                raise ValueError(f"{prefix}{name} has no sub-fields")
+
+
+def renders(shape, name):
+    """Whether a serializer given shape outputs field name (expandable fields also need expands)."""
+    return shape is None or shape.fields is None or name in shape.fields or name in shape.children
+
+
+def expands(shape, name):
+    """Whether expandable field name is expanded: asked for in ?expand=, or named in ?fields=."""
+    return shape is None or name in shape.children or (shape.fields is not None and name in shape.fields)
+
+
+def sub_shape(shape, name):
+    return None if shape is None else shape.children.get(name) or Shape()
+
+
+def columns(model, shape, *required):
+    """Concrete columns of model that shape renders, for .only() (None when it renders them all)."""
+    if shape is None or shape.fields is None:
+        return None
+    names = {f.name for f in model._meta.concrete_fields} & (shape.fields | set(shape.children))
+    return {'id', *required, *names}
+
+
+class ShapedSerializer:
+    """
+    Serializer mixin taking shape= (a Shape, or None for the full output as
+    before). Fields the shape leaves out are dropped; expandable_fields are
+    collapsed unless expanded or named in fields; nested_fields (name -> serializer class) are
+    rendered with the shape given for them.
+    """
+    nested_fields = {}
+    expandable_fields = {}  # name -> serializer class of the expansion, or None
+
+    def __init__(self, *args, shape=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shape = shape
+        if shape is None:
+            return
+        for name in list(self.fields):
+            if not renders(shape, name):
+                self.fields.pop(name)
+            elif name in self.expandable_fields:
+                if expands(shape, name):
+                    self.expand(name, sub_shape(shape, name))
+                else:
+                    self.collapse(name)
+
+    def expand(self, name, shape):
+        pass
+
+    def collapse(self, name):
+        self.fields.pop(name)
+
+
+class SkillSerializer(TimedRepresentation, serializers.ModelSerializer):
 
     class Meta:
         model = Skill
         fields = ['id', 'name']
 
-class UserSkillSerializer(serializers.ModelSerializer):
+class UserSkillSerializer(TimedRepresentation, serializers.ModelSerializer):
     skill = serializers.SlugRelatedField(slug_field='name', queryset=Skill.objects.all())
 
     class Meta:
         model = UserSkill
         fields = ['skill', 'level', 'experience_years','is_active']
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedRepresentation, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
 
     class Meta:
@@ -29,7 +147,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedRepresentation, ShapedSerializer, serializers.ModelSerializer):
     skills = serializers.SerializerMethodField()
     match_score = serializers.IntegerField(read_only=True)
     skills_matched = serializers.ListField(read_only=True)
@@ -39,8 +157,25 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'display_name', 'skills', 'match_score', 'skills_matched',
                   'readiness_score']
 
+    expandable_fields = {'skills': None}
+
+    @staticmethod
+    def setup_eager_loading(queryset, shape=None):
+        """Prefetch skills so get_skills never queries per user; a shape without them loads neither."""
+        only = columns(User, shape)
+        if only:
+            queryset = queryset.only(*only)
+        if expands(shape, 'skills'):
+            queryset = queryset.prefetch_related(
+                Prefetch('userskill_set', queryset=UserSkill.objects.select_related('skill'))
+            )
+        return queryset
+
     def get_skills(self,obj):
-        user_skills = UserSkill.objects.filter(user = obj)
+        if _is_prefetched(obj, 'userskill_set'):
+            user_skills = obj.userskill_set.all()
+        else:
+            user_skills = UserSkill.objects.filter(user = obj).select_related('skill')
         return UserSkillSerializer(user_skills, many= True).data
 
     def get_readiness_score(self, obj):
@@ -50,26 +185,82 @@ class UserSerializer(serializers.ModelSerializer):
         return f"{score}%"
 
 
-class TeamRoleSerializer(serializers.ModelSerializer):
+class TeamRoleSerializer(TimedRepresentation, ShapedSerializer, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    expandable_fields = {'user': UserSerializer}
 
     class Meta:
         model = TeamRole
         fields = ['id', 'user', 'role']
 
-class TeamSerializer(serializers.ModelSerializer):
+    def expand(self, name, shape):
+        self.fields['user'] = UserSerializer(read_only=True, shape=shape)
+
+    def collapse(self, name):
+        # just the id, read from user_id without the join
+        self.fields['user'] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    @staticmethod
+    def setup_eager_loading(queryset, shape=None):
+        if not expands(shape, 'user'):
+            return queryset
+        user_shape = sub_shape(shape, 'user')
+        queryset = queryset.select_related('user')
+        if expands(user_shape, 'skills'):
+            queryset = queryset.prefetch_related(
+                Prefetch('user__userskill_set', queryset=UserSkill.objects.select_related('skill'))
+            )
+        return queryset
+
+class TeamSerializer(TimedRepresentation, ShapedSerializer, serializers.ModelSerializer):
     members = serializers.SerializerMethodField()
     required_skills = serializers.PrimaryKeyRelatedField(many=True, queryset=Skill.objects.all())
+    nested_fields = {'members': TeamRoleSerializer}
+
     class Meta:
         model = Team
         fields = ['id', 'name','description', 'members','required_skills']
 
+    @staticmethod
+    def setup_eager_loading(queryset, shape=None):
+        """
+        Prefetch roles, their users' skills and required_skills in a fixed number of queries,
+        leaving out whatever shape does not render.
+        """
+        only = columns(Team, shape)
+        if only:
+            queryset = queryset.only(*only)
+        if renders(shape, 'members'):
+            roles = TeamRoleSerializer.setup_eager_loading(TeamRole.objects.all(), sub_shape(shape, 'members'))
+            queryset = queryset.prefetch_related(Prefetch('teamrole_set', queryset=roles))
+        if renders(shape, 'required_skills'):
+            queryset = queryset.prefetch_related('required_skills')
+        return queryset
+
     def get_members(self,obj):
-        roles = TeamRole.objects.filter(team=obj)
-        return TeamRoleSerializer(roles, many=True).data
+        shape = sub_shape(self.shape, 'members')
+        if _is_prefetched(obj, 'teamrole_set'):
+            roles = obj.teamrole_set.all()
+        else:
+            roles = TeamRoleSerializer.setup_eager_loading(TeamRole.objects.filter(team=obj), shape)
+        return TeamRoleSerializer(roles, many=True, shape=shape).data
 
-class UserShortSerializer(serializers.ModelSerializer):
+class UserShortSerializer(TimedRepresentation, serializers.ModelSerializer):
     class Meta:
         model = User
         fields =['id', 'username', 'display_name']
 
+
+
+class JobSerializer(TimedRepresentation, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'payload', 'result', 'error', 'attempts', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class ChangeSerializer(TimedRepresentation, serializers.ModelSerializer):
+    class Meta:
+        model = Change
+        fields = ['id', 'position', 'resource', 'object_id', 'action', 'data', 'created_at']
+        read_only_fields = fields
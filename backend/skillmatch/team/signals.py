@@ -0,0 +1,190 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import changes, metrics, readiness, versions
+from .models import Skill, Team, TeamRole, User, UserSkill
+from .skill_extractor import skill_extractor
+from .skill_index import skill_index
+from .skill_resolver import skill_resolver
+from .skill_suggest import skill_suggester
+
+
+@receiver(pre_save, sender=UserSkill)
+def remember_user_skill(sender, instance, **kwargs):
+    # an update may move the row to another user or skill (the admin allows it); see moved_from
+    instance._stored = None
+    if instance.pk is not None and not kwargs.get('raw'):
+        instance._stored = UserSkill.objects.filter(pk=instance.pk).first()
+
+
+def moved_from(instance):
+    """The row as stored before this save, if the save changed its (user, skill) pair; else None."""
+    stored = getattr(instance, '_stored', None)
+    if stored is not None and (stored.user_id, stored.skill_id) != (instance.user_id, instance.skill_id):
+        return stored
+    return None
+
+
+@receiver(post_save, sender=UserSkill)
+def index_user_skill(sender, instance, **kwargs):
+    args = (instance.user_id, instance.skill_id, instance.level, instance.experience_years, instance.is_active)
+    old = moved_from(instance)
+    if old is not None:
+        old_user, old_skill = old.user_id, old.skill_id
+        transaction.on_commit(lambda: skill_index.remove(old_user, old_skill))
+        transaction.on_commit(lambda: skill_suggester.adjust(old_skill, -1))
+        readiness.user_skills_changed([(old_user, old_skill)], -1)
+    transaction.on_commit(lambda: skill_index.add(*args))
+    if kwargs.get('created') or old is not None:
+        skill_id = instance.skill_id
+        transaction.on_commit(lambda: skill_suggester.adjust(skill_id, 1))
+        readiness.user_skills_changed([(instance.user_id, instance.skill_id)], 1)
+
+
+@receiver(post_delete, sender=UserSkill)
+def unindex_user_skill(sender, instance, **kwargs):
+    user_id, skill_id = instance.user_id, instance.skill_id
+    transaction.on_commit(lambda: skill_index.remove(user_id, skill_id))
+    transaction.on_commit(lambda: skill_suggester.adjust(skill_id, -1))
+    readiness.user_skills_changed([(user_id, skill_id)], -1)
+
+
+@receiver(post_save, sender=Skill)
+def add_skill_pattern(sender, instance, created, **kwargs):
+    skill_id, name = instance.id, instance.name
+    if created:
+        transaction.on_commit(lambda: skill_extractor.add(name))
+        transaction.on_commit(lambda: skill_resolver.add(name))
+        transaction.on_commit(lambda: skill_suggester.add(skill_id, name))
+    else:
+        # a rename leaves the old pattern behind; rebuild on next use
+        transaction.on_commit(skill_extractor.invalidate)
+        transaction.on_commit(skill_resolver.invalidate)
+        transaction.on_commit(skill_suggester.invalidate)
+
+
+@receiver(pre_delete, sender=Skill)
+def remember_skill_teams(sender, instance, **kwargs):
+    # the cascade removes required-skill rows without an m2m_changed signal
+    instance._requiring_teams = list(instance.team_set.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Skill)
+def unindex_skill(sender, instance, **kwargs):
+    skill_id, name = instance.id, instance.name
+    transaction.on_commit(lambda: skill_index.remove_skill(skill_id))
+    transaction.on_commit(lambda: skill_extractor.remove(name))
+    transaction.on_commit(lambda: skill_resolver.remove(name))
+    transaction.on_commit(lambda: skill_suggester.remove(skill_id))
+    team_ids = getattr(instance, '_requiring_teams', None)
+    if team_ids:
+        readiness.rebuild(team_ids)
+
+
+@receiver(m2m_changed, sender=Team.required_skills.through)
+def update_team_readiness(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._requiring_teams = list(instance.team_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        if reverse:
+            for team_id in instance._requiring_teams:
+                readiness.requirements_changed(team_id, [instance.pk], -1)
+        else:
+            readiness.requirements_changed(instance.pk, [], -1)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        sign = 1 if action == 'post_add' else -1
+        if reverse:
+            for team_id in pk_set:
+                readiness.requirements_changed(team_id, [instance.pk], sign)
+        else:
+            readiness.requirements_changed(instance.pk, pk_set, sign)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    metrics.install_query_timer(connection)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def bump_skill_version(sender, **kwargs):
+    versions.bump(versions.SKILL)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+@receiver(m2m_changed, sender=Team.required_skills.through)
+def bump_team_version(sender, **kwargs):
+    versions.bump(versions.TEAM)
+
+
+@receiver(post_save, sender=TeamRole)
+@receiver(post_delete, sender=TeamRole)
+def bump_team_role_version(sender, **kwargs):
+    versions.bump(versions.TEAM_ROLE)
+
+
+@receiver(post_save, sender=UserSkill)
+@receiver(post_delete, sender=UserSkill)
+def bump_user_skill_version(sender, **kwargs):
+    versions.bump(versions.USER_SKILL)
+
+
+# every USER_SKILL bump made here follows writes the signals above apply to the index
+versions.on_bump(versions.USER_SKILL, skill_index.bumped)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_version(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return  # logins change nothing that is listed
+    versions.bump(versions.USER)
+
+
+CHANGE_RESOURCES = {
+    Skill: versions.SKILL,
+    Team: versions.TEAM,
+    TeamRole: versions.TEAM_ROLE,
+    UserSkill: versions.USER_SKILL,
+}
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=TeamRole)
+@receiver(post_save, sender=UserSkill)
+def log_save(sender, instance, created, **kwargs):
+    resource = CHANGE_RESOURCES[sender]
+    if sender is UserSkill and moved_from(instance) is not None:
+        # user skills are keyed by (user, skill): a moved row is a delete plus a create
+        changes.record(resource, 'delete', [changes.row(resource, moved_from(instance))])
+        created = True
+    changes.record(resource, 'create' if created else 'update', [changes.row(resource, instance)])
+
+
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=TeamRole)
+@receiver(post_delete, sender=UserSkill)
+def log_delete(sender, instance, **kwargs):
+    resource = CHANGE_RESOURCES[sender]
+    changes.record(resource, 'delete', [changes.row(resource, instance)])
+
+
+@receiver(m2m_changed, sender=Team.required_skills.through)
+def log_required_skills(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        related = instance.team_set if reverse else instance.required_skills
+        instance._cleared_links = list(related.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set, action = instance.__dict__.pop('_cleared_links', ()), 'post_remove'
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    links = [{'team': pk, 'skill': instance.pk} if reverse else {'team': instance.pk, 'skill': pk}
+             for pk in sorted(pk_set)]
+    changes.record(changes.TEAM_SKILL, 'create' if action == 'post_add' else 'delete', links)
+
@@ -0,0 +1,174 @@
+import re
+import threading
+from collections import deque
+
+from django.conf import settings
+
+'''
+Local skill extractor: an Aho-Corasick automaton over Skill.name plus the
+SKILL_ALIASES setting, matched case-insensitively in one pass over the text.
+
+Patterns are raw lowercase strings, so "c++", "c#" and "node.js" work as-is.
+A match only counts when it is not glued to other letters/digits, and
+overlapping matches resolve to the longest one ("c++" beats "c").
+New skills are added to the trie in place; failure links are recomputed
+lazily on the next extract() instead of reloading from the database.
+'''
+
+WORD_CHAR = re.compile(r'[a-z0-9]')
+# tokens that look like technology names: CamelCase, ALLCAPS, or with + # . / digits inside
+TECH_TOKEN = re.compile(r'\b(?:[A-Z][a-z]+[A-Z]\w*|[A-Z]{2,6}|\w+(?:[+#]+|\.\w+|\d\w*))(?![\w+#])')
+
+
+class SkillExtractor:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._reset()
+
+    def _reset(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]   # (pattern length, canonical name) ending at this node
+        self._out_link = [0]  # nearest node on the fail chain with an output
+        self._dirty = False
+
+    @property
+    def is_built(self):
+        return self._built
+
+    def build(self):
+        from .models import Skill
+
+        with self._lock:
+            self._reset()
+            for name in Skill.objects.values_list('name', flat=True).iterator():
+                self._insert(name.lower(), name.lower())
+            for alias, canonical in getattr(settings, 'SKILL_ALIASES', {}).items():
+                self._insert(alias.lower(), canonical.lower())
+            self._link()
+            self._built = True
+
+    def invalidate(self):
+        with self._lock:
+            self._built = False
+            self._reset()
+
+    def add(self, name, canonical=None):
+        """Add one pattern (e.g. a newly created Skill) without a rebuild."""
+        with self._lock:
+            if self._built:
+                self._insert(name.lower(), (canonical or name).lower())
+                self._dirty = True
+
+    def remove(self, name):
+        with self._lock:
+            if not self._built:
+                return
+            node = self._find(name.lower())
+            if node is not None:
+                self._out[node] = None
+                self._dirty = True
+
+    def _find(self, pattern):
+        node = 0
+        for ch in pattern:
+            node = self._goto[node].get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _insert(self, pattern, canonical):
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+                self._out_link.append(0)
+            node = nxt
+        self._out[node] = (len(pattern), canonical)
+
+    def _link(self):
+        """Breadth-first pass computing failure and output links."""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._out_link[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                fail_node = self._fail[child]
+                self._out_link[child] = fail_node if self._out[fail_node] else self._out_link[fail_node]
+                queue.append(child)
+        self._dirty = False
+
+    def _ensure_ready(self):
+        if not self._built:
+            self.build()
+        with self._lock:
+            if self._dirty:
+                self._link()
+
+    def find(self, text):
+        """Return non-overlapping (start, end, canonical) matches, longest first on overlap."""
+        self._ensure_ready()
+        text = text.lower()
+        hits = []
+        with self._lock:
+            goto, fail, out, out_link = self._goto, self._fail, self._out, self._out_link
+            node = 0
+            for i, ch in enumerate(text):
+                while node and ch not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(ch, 0)
+                match = node if out[node] else out_link[node]
+                while match:
+                    length, canonical = out[match]
+                    start, end = i - length + 1, i + 1
+                    if (start == 0 or not WORD_CHAR.match(text[start - 1])) and \
+                            (end == len(text) or not WORD_CHAR.match(text[end])):
+                        hits.append((start, end, canonical))
+                    match = out_link[match]
+
+        hits.sort(key=lambda h: (h[0], h[0] - h[1]))
+        selected, last_end = [], 0
+        for start, end, canonical in hits:
+            if start >= last_end:
+                selected.append((start, end, canonical))
+                last_end = end
+        return selected
+
+    def extract(self, text):
+        return sorted({canonical for _, _, canonical in self.find(text)})
+
+    def estimated_recall(self, text, matches=None):
+        """
+        Share of technology-looking tokens in text that the dictionary recognised.
+        Used by hybrid mode to decide whether the LLM is worth calling.
+        """
+        if matches is None:
+            matches = self.find(text)
+        covered = [(start, end) for start, end, _ in matches]
+        unknown = 0
+        for token in TECH_TOKEN.finditer(text):
+            if not any(start <= token.start() < end for start, end in covered):
+                unknown += 1
+        found = len(matches)
+        if found + unknown == 0:
+            return 0.0
+        return found / (found + unknown)
+
+
+skill_extractor = SkillExtractor()
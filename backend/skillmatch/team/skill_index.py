@@ -0,0 +1,194 @@
+import heapq
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from .versions import USER_SKILL
+
+'''
+In-memory inverted index over UserSkill:
+skill_id -> {user_id: (level, experience_years, is_active)}
+
+Built lazily from the DB the first time it is queried, then kept current
+by the UserSkill signals in team/signals.py. One instance per process.
+
+Those signals only see this process's writes, so the index also keeps the
+USER_SKILL catalog version (team/versions.py) it reflects. Each query first
+reads the stored version, one primary-key lookup, and rebuilds when another
+process has moved it. A bump committed here advances the kept version
+without a rebuild when it is the next one, as its rows are applied locally.
+'''
+
+LEVEL_SCORES = {'beginner': 1, 'intermediate': 2, 'advanced': 3}
+
+
+class SkillIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = None
+        self._arrays = {}     # skill_id -> columns() of its postings as numpy arrays, until they change
+        self._version = None  # USER_SKILL version the postings reflect; None forces a rebuild
+        self._writes = 0      # local add/remove calls, to spot one racing a build
+
+    @property
+    def is_built(self):
+        return self._postings is not None
+
+    def build(self):
+        from .models import UserSkill
+
+        writes = self._writes
+        version = _stored_version()  # read first, so the rows are at least this new
+        postings = defaultdict(dict)
+        rows = UserSkill.objects.values_list(
+            'skill_id', 'user_id', 'level', 'experience_years', 'is_active'
+        ).iterator(chunk_size=5000)
+        for skill_id, user_id, level, years, active in rows:
+            postings[skill_id][user_id] = (level.lower(), years, active)
+        with self._lock:
+            self._postings, self._arrays = postings, {}
+            # a local write applied to the old postings meanwhile may be missing from these
+            self._version = version if self._writes == writes else None
+
+    def invalidate(self):
+        with self._lock:
+            self._postings, self._arrays = None, {}
+
+    def _ensure_built(self):
+        if self._postings is None:
+            self.build()
+
+    def _ensure_current(self):
+        """Build, or rebuild when UserSkill has changed outside this process since the last build."""
+        if self._postings is None or _stored_version() != self._version:
+            self.build()
+
+    def bumped(self, version):
+        """This process committed USER_SKILL version; its rows are applied here by the signals."""
+        with self._lock:
+            if self._version is not None and self._version == version - 1:
+                self._version = version
+
+    def add(self, user_id, skill_id, level, years=0, active=True):
+        with self._lock:
+            self._writes += 1
+            self._arrays.pop(skill_id, None)
+            if self._postings is not None:
+                self._postings[skill_id][user_id] = (level.lower(), years, active)
+
+    def remove(self, user_id, skill_id):
+        with self._lock:
+            self._writes += 1
+            self._arrays.pop(skill_id, None)
+            if self._postings is not None:
+                self._postings.get(skill_id, {}).pop(user_id, None)
+
+    def remove_skill(self, skill_id):
+        with self._lock:
+            self._writes += 1
+            self._arrays.pop(skill_id, None)
+            if self._postings is not None:
+                self._postings.pop(skill_id, None)
+
+    def arrays(self, skill_ids):
+        """
+        [(user ids, level scores, experience years, active flags)], one tuple of
+        numpy arrays per skill id, in the same order. A skill's arrays are built
+        once and reused until one of its postings changes.
+        """
+        self._ensure_current()
+        with self._lock:
+            return [self._skill_arrays(sid) for sid in skill_ids]
+
+    def _skill_arrays(self, skill_id):
+        cached = self._arrays.get(skill_id)
+        if cached is None:
+            users = self._postings.get(skill_id, {})
+            entries, count = users.values(), len(users)
+            cached = self._arrays[skill_id] = (
+                np.fromiter(users, dtype=np.int64, count=count),
+                np.fromiter((LEVEL_SCORES.get(e[0], 0) for e in entries), dtype=np.int64, count=count),
+                np.fromiter((e[1] for e in entries), dtype=np.int64, count=count),
+                np.fromiter((e[2] for e in entries), dtype=bool, count=count),
+            )
+        return cached
+
+    def user_entries(self, user_id, skill_ids):
+        """{skill_id: (level, years, active)} for the skill_ids user_id holds."""
+        self._ensure_built()
+        with self._lock:
+            entries = {}
+            for sid in skill_ids:
+                entry = self._postings.get(sid, {}).get(user_id)
+                if entry is not None:
+                    entries[sid] = entry
+            return entries
+
+    def bitsets(self, skill_ids, levels=None):
+        """
+        {user_id: mask} where bit i is set when the user holds skill_ids[i] on an
+        active row, at one of levels if given.
+        """
+        self._ensure_current()
+        bits = {}
+        with self._lock:
+            for bit, sid in enumerate(skill_ids):
+                for uid, (level, _, active) in self._postings.get(sid, {}).items():
+                    if active and (levels is None or level in levels):
+                        held = bits.get(uid)
+                        if held is None:
+                            bits[uid] = [bit]
+                        else:
+                            held.append(bit)
+        # one big int per user rather than one per held skill
+        return {uid: sum(1 << bit for bit in held) for uid, held in bits.items()}
+
+    def columns(self, skill_ids):
+        """Snapshot the postings for skill_ids as [(skill_id, {user_id: (level, years, active)})]."""
+        self._ensure_current()
+        with self._lock:
+            return [(sid, dict(self._postings.get(sid, {}))) for sid in skill_ids]
+
+    def match(self, skill_ids, limit=None, offset=0, after=None):
+        """
+        Score users against skill_ids and return (total, page) where page is
+        the [offset:offset + limit] slice of the ranking, best score first.
+        after=(score, user_id) starts the ranking just past that position instead.
+        Each entry is {'user_id', 'score', 'skills_matched': [(skill_id, level, score)]}.
+        """
+        postings = self.columns(skill_ids)
+        scores = defaultdict(int)
+        for sid, users in postings:
+            for uid, (level, _, _) in users.items():
+                scores[uid] += LEVEL_SCORES.get(level, 0)
+
+        total = len(scores)
+        items = scores.items()
+        if after is not None:
+            last = (-after[0], after[1])
+            items = [kv for kv in items if (-kv[1], kv[0]) > last]
+        if limit is None:
+            ranked = sorted(items, key=lambda kv: (-kv[1], kv[0]))
+        else:
+            ranked = heapq.nsmallest(offset + limit, items, key=lambda kv: (-kv[1], kv[0]))
+        ranked = ranked[offset:]
+
+        page = []
+        for uid, score in ranked:
+            matched = []
+            for sid, users in postings:
+                entry = users.get(uid)
+                if entry is not None:
+                    matched.append((sid, entry[0], LEVEL_SCORES.get(entry[0], 0)))
+            page.append({'user_id': uid, 'score': score, 'skills_matched': matched})
+        return total, page
+
+
+def _stored_version():
+    from .models import CatalogVersion
+
+    return CatalogVersion.objects.filter(name=USER_SKILL).values_list('version', flat=True).first() or 0
+
+
+skill_index = SkillIndex()
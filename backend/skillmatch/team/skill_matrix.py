@@ -0,0 +1,276 @@
+import json
+import mmap
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: concurrent rebuilds are not coordinated
+    fcntl = None
+
+from .skill_index import LEVEL_SCORES
+from .versions import USER_SKILL
+
+'''
+User x skill x level snapshot shared by every worker process, for the
+'shared' /api/match/ engine (SKILL_MATCH_ENGINE = 'shared').
+
+The snapshot is one file at SKILL_MATRIX_PATH: a JSON header, then the
+UserSkill rows sorted by (skill, user) as flat arrays (skill ids, per-skill
+offsets, user ids, level scores). Workers mmap it read-only and wrap the
+arrays with np.frombuffer, so they all share the page cache's one copy
+instead of each building a skill_index; a worker's private memory does not
+grow with the data.
+
+Whoever needs a snapshot and finds none builds it (`manage.py
+build_skill_matrix` does it ahead of time), under a lock file so one process
+builds while the rest wait. It is written to a temporary file and renamed
+over the old one, so readers see either the old or the new file, never a
+partial one. Workers stat the path before each match and re-map when it
+has changed.
+
+Writes after the build reach workers through the change log
+(team/changes.py): the header keeps the newest committed feed position
+(Change.position, handed out in commit order) read before the rows, and each
+match first applies the userskill changes after it as a small overlay.
+Replaying a change the rows already hold is harmless. Once the overlay holds
+SKILL_MATRIX_MAX_OVERLAY rows or the snapshot is SKILL_MATRIX_MAX_AGE seconds
+old, a background thread rebuilds it.
+
+The file checks, the change query and any build run outside the instance
+lock; it is only held to swap in their results and to read the arrays, so
+concurrent matches do not queue behind one another's refresh.
+'''
+
+MAGIC = 'skillmatch-skill-matrix-1'
+HEADER_SIZE = 4096
+ALIGN = 64
+LEVEL_NAMES = {score: level for level, score in LEVEL_SCORES.items()}
+ARRAYS = (('skill_ids', np.int64), ('offsets', np.int64), ('users', np.int64), ('levels', np.int8))
+
+
+def matrix_path():
+    return str(getattr(settings, 'SKILL_MATRIX_PATH', settings.BASE_DIR / '.cache' / 'skill_matrix.bin'))
+
+
+class _Lock:
+    """Exclusive lock file beside the snapshot, shared by every process; blocking unless wait=False."""
+
+    def __init__(self, path, wait=True):
+        self.path, self.wait, self.file = f"{path}.lock", wait, None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | (0 if self.wait else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+
+    def __exit__(self, *exc):
+        self.file.close()  # closing releases the lock
+
+
+def write_snapshot(path):
+    """Read every UserSkill row into a new snapshot at path, swapped in atomically. Returns its header."""
+    from .changes import latest
+    from .models import UserSkill
+
+    # taken first: a change committed while the rows are read is replayed on top, which is harmless
+    change_id = latest()
+    rows = np.fromiter(
+        (v for row in UserSkill.objects.values_list('skill_id', 'user_id', 'level').iterator(chunk_size=20000)
+         for v in (row[0], row[1], LEVEL_SCORES.get(row[2].lower(), 0))),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    rows = rows[np.lexsort((rows[:, 1], rows[:, 0]))]
+    skill_ids, starts = np.unique(rows[:, 0], return_index=True)
+    arrays = {
+        'skill_ids': skill_ids,
+        'offsets': np.append(starts, len(rows)).astype(np.int64),
+        'users': np.ascontiguousarray(rows[:, 1]),
+        'levels': rows[:, 2].astype(np.int8),
+    }
+
+    header = {'magic': MAGIC, 'change_id': change_id, 'built_at': time.time(), 'rows': len(rows), 'arrays': {}}
+    position = HEADER_SIZE
+    for name, dtype in ARRAYS:
+        header['arrays'][name] = [position, len(arrays[name])]
+        position += -(-arrays[name].astype(dtype).nbytes // ALIGN) * ALIGN
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(json.dumps(header).encode().ljust(HEADER_SIZE, b' '))
+        for name, dtype in ARRAYS:
+            f.seek(header['arrays'][name][0])
+            f.write(arrays[name].astype(dtype).tobytes())
+        f.truncate(position)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return header
+
+
+class SkillMatrix:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stat = None       # (inode, mtime) of the mapped file
+        self._header = None
+        self._arrays = None
+        self._overlay = None    # skill_id -> {user_id: level score, or None once deleted}
+        self._overlay_rows = 0
+        self._seen = 0          # feed position up to which the overlay is applied
+        self._rebuilding = False
+
+    @property
+    def is_attached(self):
+        return self._arrays is not None
+
+    def detach(self):
+        with self._lock:
+            self._stat = self._header = self._arrays = self._overlay = None
+
+    def build(self):
+        """Write a fresh snapshot now (blocking on another process's build) and attach it."""
+        path = matrix_path()
+        with _Lock(path):
+            header = write_snapshot(path)
+        self._attach(path)
+        return header
+
+    def _attach(self, path):
+        """Map path unless it is the file already mapped; the swap itself is the only part under the lock."""
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if self._stat == (st.st_ino, st.st_mtime_ns):
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = json.loads(mapped[:HEADER_SIZE].decode())
+        if header.get('magic') != MAGIC:
+            raise ValueError(f"{path} is not a skill matrix snapshot")
+        arrays = {
+            name: np.frombuffer(mapped, dtype=dtype, count=header['arrays'][name][1], offset=header['arrays'][name][0])
+            for name, dtype in ARRAYS
+        }
+        with self._lock:
+            if self._stat != (st.st_ino, st.st_mtime_ns):
+                self._arrays, self._header, self._stat = arrays, header, (st.st_ino, st.st_mtime_ns)
+                self._overlay, self._overlay_rows, self._seen = defaultdict(dict), 0, header['change_id']
+
+    def _ensure_current(self):
+        path = matrix_path()
+        if not os.path.exists(path):
+            with _Lock(path):
+                if not os.path.exists(path):
+                    write_snapshot(path)
+        self._attach(path)
+        self._replay()
+
+    def _replay(self):
+        """Fold the userskill changes committed since the overlay was last brought up to date into it."""
+        from .models import Change
+
+        with self._lock:
+            header, seen = self._header, self._seen
+        rows = list(Change.objects.filter(position__gt=seen, resource=USER_SKILL).order_by('position').values_list(
+            'position', 'action', 'data'))
+        with self._lock:
+            if self._header is header:  # a snapshot swapped in meanwhile starts from its own position
+                for position, action, data in rows:
+                    if position <= self._seen:
+                        continue  # another thread folded it in first
+                    score = None if action == 'delete' else LEVEL_SCORES.get(data['level'].lower(), 0)
+                    self._overlay[data['skill']][data['user']] = score
+                    self._overlay_rows += 1
+                    self._seen = position
+            self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        max_rows = getattr(settings, 'SKILL_MATRIX_MAX_OVERLAY', 50000)
+        max_age = getattr(settings, 'SKILL_MATRIX_MAX_AGE', 3600)
+        stale = self._overlay_rows >= max_rows or time.time() - self._header['built_at'] >= max_age
+        if stale and not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            path = matrix_path()
+            with _Lock(path, wait=False) as locked:
+                # another worker holding the lock is already writing the next snapshot
+                if locked and self._stat is not None and os.stat(path).st_mtime_ns == self._stat[1]:
+                    write_snapshot(path)
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def _column(self, skill_id):
+        """(user ids, level scores) of skill_id, sorted by user, with the overlay applied."""
+        a = self._arrays
+        i = np.searchsorted(a['skill_ids'], skill_id)
+        if i < len(a['skill_ids']) and a['skill_ids'][i] == skill_id:
+            start, stop = a['offsets'][i], a['offsets'][i + 1]
+        else:
+            start = stop = 0
+        users, levels = a['users'][start:stop], a['levels'][start:stop]  # views into the mapping
+        changed = self._overlay.get(skill_id)
+        if not changed:
+            return users, levels
+        ids = np.fromiter(changed, dtype=np.int64, count=len(changed))
+        keep = ~np.isin(users, ids)
+        added = [(uid, score) for uid, score in changed.items() if score is not None]
+        users = np.concatenate([users[keep], np.array([uid for uid, _ in added], dtype=np.int64)])
+        levels = np.concatenate([levels[keep], np.array([score for _, score in added], dtype=np.int8)])
+        order = np.argsort(users, kind='stable')
+        return users[order], levels[order]
+
+    def match(self, skill_ids, limit=None, offset=0, after=None):
+        """Same contract as SkillIndex.match, from the shared snapshot."""
+        self._ensure_current()
+        with self._lock:
+            columns = [(sid, *self._column(sid)) for sid in skill_ids]
+
+        if columns:
+            all_users = np.concatenate([users for _, users, _ in columns])
+            all_levels = np.concatenate([levels for _, _, levels in columns]).astype(np.int64)
+        else:
+            all_users = all_levels = np.zeros(0, dtype=np.int64)
+        user_ids, inverse = np.unique(all_users, return_inverse=True)
+        scores = np.bincount(inverse, weights=all_levels, minlength=len(user_ids)).astype(np.int64)
+        total = len(user_ids)
+
+        if after is not None:
+            keep = (scores < after[0]) | ((scores == after[0]) & (user_ids > after[1]))
+            user_ids, scores = user_ids[keep], scores[keep]
+        order = np.lexsort((user_ids, -scores))
+        end = None if limit is None else offset + limit
+        ranked = order[offset:end]
+
+        page = []
+        for uid, score in zip(user_ids[ranked].tolist(), scores[ranked].tolist()):
+            matched = []
+            for sid, users, levels in columns:
+                i = np.searchsorted(users, uid)
+                if i < len(users) and users[i] == uid:
+                    level = int(levels[i])
+                    matched.append((sid, LEVEL_NAMES.get(level, ''), level))
+            page.append({'user_id': uid, 'score': score, 'skills_matched': matched})
+        return total, page
+
+    def stats(self):
+        self._ensure_current()
+        with self._lock:
+            return {**{k: v for k, v in self._header.items() if k != 'arrays'},
+                    'overlay_rows': self._overlay_rows, 'path': matrix_path()}
+
+
+skill_matrix = SkillMatrix()
@@ -0,0 +1,161 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+'''
+Resolves free-text skill terms ("JS", "reactjs", "postgre") to canonical
+Skill names for /api/match/, set-skills and extraction.
+
+A term is tried, in order, as
+  - exact:      a Skill name (case-insensitive),
+  - alias:      a key of the SKILL_ALIASES setting,
+  - normalized: a name or alias once spaces, dots, dashes and underscores are dropped,
+  - fuzzy:      the name or alias sharing the most character trigrams, by Dice
+                similarity, if at least SKILL_FUZZY_MIN_SIMILARITY (match and
+                extraction only; writes just get it back as a suggestion).
+Everything is precomputed into dicts and an inverted trigram index, so a
+lookup is a few hash probes. Fuzzy candidates come only from the rarest
+trigrams of the term (prefix filtering): any key similar enough must share
+at least one of them, so the long posting lists of common trigrams are never
+walked, and a candidate is only compared in full when its count over the
+rare lists leaves the threshold within reach. New skills are added in place,
+like the skill extractor.
+'''
+
+COMPACT_DROP = re.compile(r'[\s._\-]+')
+FUZZY_MIN_LENGTH = 3  # shorter terms ("go", "c") only resolve exactly
+
+
+def compact(term):
+    return COMPACT_DROP.sub('', term)
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class SkillResolver:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._reset()
+
+    def _reset(self):
+        self._exact = {}     # lowercase name -> stored Skill name
+        self._aliases = {}   # alias -> canonical name
+        self._compact = {}   # compacted name or alias -> canonical name
+        self._grams = {}     # name or alias -> (trigram set, canonical name)
+        self._postings = defaultdict(set)  # trigram -> names and aliases containing it
+
+    def build(self):
+        from .models import Skill
+
+        with self._lock:
+            self._reset()
+            for name in Skill.objects.values_list('name', flat=True).iterator():
+                self._add_key(name.lower(), name)
+                self._exact[name.lower()] = name
+            for alias, canonical in getattr(settings, 'SKILL_ALIASES', {}).items():
+                canonical = self._exact.get(canonical.lower(), canonical.lower())
+                self._aliases[alias.lower()] = canonical
+                self._add_key(alias.lower(), canonical)
+            self._built = True
+
+    def invalidate(self):
+        with self._lock:
+            self._built = False
+            self._reset()
+
+    def add(self, name):
+        """Index a newly created Skill without a rebuild."""
+        with self._lock:
+            if self._built:
+                self._exact[name.lower()] = name
+                self._add_key(name.lower(), name)
+
+    def remove(self, name):
+        with self._lock:
+            if not self._built or self._exact.pop(name.lower(), None) is None:
+                return
+            key = name.lower()
+            grams, _ = self._grams.pop(key, (frozenset(), None))
+            for gram in grams:
+                self._postings[gram].discard(key)
+            if self._compact.get(compact(key)) == name:
+                del self._compact[compact(key)]
+
+    def _add_key(self, key, canonical):
+        if not key:
+            return
+        self._compact.setdefault(compact(key), canonical)
+        grams = trigrams(key)
+        self._grams[key] = (grams, canonical)
+        for gram in grams:
+            self._postings[gram].add(key)
+
+    def resolve(self, term, fuzzy=True):
+        """
+        Returns {"term", "skill", "method", "score"}; method is exact, alias,
+        normalized, fuzzy or unknown (then skill is None). With fuzzy=False, as
+        on writes, a close name is not applied: the term stays unknown and the
+        name comes back as "suggestion", so "preact" can still become a skill.
+        """
+        if not self._built:
+            self.build()
+        key = term.strip().lower()
+        with self._lock:
+            if key in self._exact:
+                return _resolution(term, self._exact[key], 'exact')
+            if key in self._aliases:
+                return _resolution(term, self._aliases[key], 'alias')
+            canonical = self._compact.get(compact(key))
+            if canonical is not None:
+                return _resolution(term, canonical, 'normalized')
+            if len(key) >= FUZZY_MIN_LENGTH:
+                match = self._fuzzy(key)
+                if match is not None and fuzzy:
+                    return _resolution(term, match[1], 'fuzzy', match[0])
+                if match is not None:
+                    return {**_resolution(term, None, 'unknown', 0.0), "suggestion": match[1]}
+        return _resolution(term, None, 'unknown', 0.0)
+
+    def resolve_many(self, terms, fuzzy=True):
+        return [self.resolve(term, fuzzy) for term in terms]
+
+    def _fuzzy(self, key):
+        threshold = getattr(settings, 'SKILL_FUZZY_MIN_SIMILARITY', 0.6)
+        grams = trigrams(key)
+        # Dice >= t needs at least ceil(t * |grams| / (2 - t)) shared trigrams,
+        # so a match must contain one of the len(grams) - shared + 1 rarest ones
+        shared = max(1, math.ceil(threshold * len(grams) / (2 - threshold)))
+        lists = sorted((self._postings.get(g, ()) for g in grams), key=len)
+        rare = lists[:len(grams) - shared + 1]
+        unread = len(lists) - len(rare)
+        counts = Counter()
+        for keys in rare:
+            counts.update(keys)
+
+        best, best_rank = None, None
+        for candidate, count in counts.items():
+            other, canonical = self._grams[candidate]
+            size = len(grams) + len(other)
+            # even sharing every unread trigram would not reach the threshold
+            if 2 * (count + unread) < threshold * size:
+                continue
+            score = 2 * len(grams & other) / size
+            # ties go to the shorter key, then alphabetically, so results do not depend on set order
+            rank = (score, -len(candidate), [-ord(ch) for ch in candidate])
+            if score >= threshold and (best_rank is None or rank > best_rank):
+                best, best_rank = (score, canonical), rank
+        return best
+
+
+def _resolution(term, skill, method, score=1.0):
+    return {"term": term, "skill": skill, "method": method, "score": round(score, 3)}
+
+
+skill_resolver = SkillResolver()
@@ -0,0 +1,125 @@
+import heapq
+import threading
+
+from django.conf import settings
+
+'''
+Prefix autocomplete for /api/skills/suggest/?q=.
+
+A per-process trie over lowercase Skill names. Every node keeps the top
+SKILL_SUGGEST_MAX_LIMIT skills of its subtree, ranked by holders (UserSkill
+rows) then name, so a lookup is one walk down q plus a slice. When a count
+changes, only the nodes on that skill's path are marked dirty; a dirty node
+is recomputed on the next lookup by merging its children's lists, which are
+already short. Counts follow the UserSkill and Skill signals.
+'''
+
+
+class _Node:
+    __slots__ = ('children', 'skills', 'top', 'dirty')
+
+    def __init__(self):
+        self.children = {}
+        self.skills = None  # {skill_id: name} for names ending here
+        self.top = []       # [(-holders, name, skill_id)], best first
+        self.dirty = True
+
+
+class SkillSuggester:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._root = None
+        self._counts = {}  # skill_id -> holders
+        self._keys = {}    # skill_id -> lowercase name
+
+    @property
+    def is_built(self):
+        return self._root is not None
+
+    def build(self):
+        from django.db.models import Count
+
+        from .models import Skill
+
+        with self._lock:
+            self._root, self._counts, self._keys = _Node(), {}, {}
+            rows = Skill.objects.annotate(holders=Count('userskill')).values_list('id', 'name', 'holders')
+            for skill_id, name, holders in rows.iterator():
+                self._insert(skill_id, name, holders)
+            # fill every node's list now rather than on the first keystrokes
+            self._refresh(self._root, getattr(settings, 'SKILL_SUGGEST_MAX_LIMIT', 50))
+
+    def invalidate(self):
+        with self._lock:
+            self._root = None
+            self._counts, self._keys = {}, {}
+
+    def add(self, skill_id, name):
+        """Index a newly created Skill (no holders yet)."""
+        with self._lock:
+            if self._root is not None and skill_id not in self._keys:
+                self._insert(skill_id, name, 0)
+
+    def remove(self, skill_id):
+        with self._lock:
+            if self._root is None or skill_id not in self._keys:
+                return
+            node = self._mark_path(self._keys.pop(skill_id))
+            node.skills.pop(skill_id, None)
+            self._counts.pop(skill_id, None)
+
+    def adjust(self, skill_id, delta):
+        """Add delta to the holder count of skill_id."""
+        with self._lock:
+            if self._root is None or skill_id not in self._keys:
+                return
+            self._counts[skill_id] += delta
+            self._mark_path(self._keys[skill_id])
+
+    def _insert(self, skill_id, name, holders):
+        key = name.lower()
+        node = self._mark_path(key, create=True)
+        if node.skills is None:
+            node.skills = {}
+        node.skills[skill_id] = name
+        self._counts[skill_id] = holders
+        self._keys[skill_id] = key
+
+    def _mark_path(self, key, create=False):
+        node = self._root
+        node.dirty = True
+        for ch in key:
+            child = node.children.get(ch)
+            if child is None:
+                if not create:
+                    return node
+                child = node.children[ch] = _Node()
+            node = child
+            node.dirty = True
+        return node
+
+    def _refresh(self, node, keep):
+        if node.dirty:
+            entries = [(-self._counts[skill_id], name, skill_id) for skill_id, name in (node.skills or {}).items()]
+            for child in node.children.values():
+                entries.extend(self._refresh(child, keep))
+            node.top = heapq.nsmallest(keep, entries)
+            node.dirty = False
+        return node.top
+
+    def suggest(self, prefix, limit=10):
+        """Up to limit {"id", "name", "holders"} dicts for skills starting with prefix."""
+        keep = getattr(settings, 'SKILL_SUGGEST_MAX_LIMIT', 50)
+        with self._lock:
+            if self._root is None:
+                self.build()
+            node = self._root
+            for ch in prefix.lower():
+                node = node.children.get(ch)
+                if node is None:
+                    return []
+            top = self._refresh(node, keep)[:limit]
+        return [{"id": skill_id, "name": name, "holders": -holders} for holders, name, skill_id in top]
+
+
+skill_suggester = SkillSuggester()
@@ -0,0 +1,192 @@
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from . import changes, readiness, versions
+from .models import Skill, UserSkill
+from .skill_extractor import skill_extractor
+from .skill_index import skill_index
+from .skill_resolver import skill_resolver
+from .skill_suggest import skill_suggester
+
+'''
+Bulk replacement of users' skills.
+Used by set-skills and bulk-set-skills: maps names to canonical skills
+(canonicalize_entries), resolves them in one query,
+creates missing skills with bulk_create, then diffs each user's current
+UserSkill rows against the new list inside one transaction.
+'''
+
+VALID_LEVELS = {level for level, _ in UserSkill.SKILL_LEVELS}
+NAME_MAX_LENGTH = Skill._meta.get_field('name').max_length
+_flag = serializers.BooleanField()
+
+
+class SkillPayloadError(ValueError):
+    pass
+
+
+def parse_skill_entries(skills_data):
+    """
+    Normalise a list of skill dicts into {name: (level, years, active)}.
+    Entries without a name are skipped; later duplicates win.
+    """
+    if not isinstance(skills_data, list):
+        raise SkillPayloadError("skills must be a list of skill dicts")
+
+    entries = {}
+    for entry in skills_data:
+        if not isinstance(entry, dict):
+            raise SkillPayloadError("skills must be a list of skill dicts")
+        name = entry.get("name")
+        if name is not None and not isinstance(name, str):
+            raise SkillPayloadError("skill name must be a string")
+        name = (name or "").strip().lower()
+        if not name:
+            continue
+        if len(name) > NAME_MAX_LENGTH:
+            raise SkillPayloadError(f"skill name longer than {NAME_MAX_LENGTH} characters")
+        level = str(entry.get("level") or "beginner").lower()
+        if level not in VALID_LEVELS:
+            raise SkillPayloadError(f"invalid level '{level}' for skill '{name}'")
+        try:
+            years = int(entry.get("experience_years", 0) or 0)
+        except (TypeError, ValueError):
+            raise SkillPayloadError(f"experience_years must be an integer for skill '{name}'")
+        if years < 0:
+            raise SkillPayloadError(f"experience_years must be non-negative for skill '{name}'")
+        try:
+            # true/false, 1/0, yes/no, as strings too (CSV imports); anything else is rejected
+            active = _flag.to_internal_value(entry.get("is_active", True))
+        except serializers.ValidationError:
+            raise SkillPayloadError(f"is_active must be a boolean for skill '{name}'")
+        entries[name] = (level, years, active)
+    return entries
+
+
+def canonicalize_entries(entries):
+    """
+    Rename the keys of parse_skill_entries output to canonical skill names
+    ("reactjs" -> "react", "Node JS" -> "node.js"). Returns (entries, resolutions);
+    unknown names are kept and become new skills. Typo matching is not applied
+    here, only reported as "suggestion", so a new skill close to an existing
+    name can still be created. If two names land on the same skill, the later entry wins.
+    """
+    resolutions = skill_resolver.resolve_many(entries, fuzzy=False)
+    canonical = {}
+    for resolution, values in zip(resolutions, entries.values()):
+        canonical[resolution['skill'] or resolution['term']] = values
+    return canonical, resolutions
+
+
+def resolve_skills(names):
+    """Return {name: skill_id}, creating any skills that do not exist yet."""
+    names = set(names)
+    if not names:
+        return {}
+    found = dict(Skill.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = names - found.keys()
+    if not missing:
+        return found
+    created = _create_skills(sorted(missing))
+    found.update(Skill.objects.filter(name__in=missing).values_list('name', 'id'))
+    if created:
+        versions.bump(versions.SKILL)
+        changes.record(versions.SKILL, 'create', [{'id': found[name], 'name': name} for name in created])
+
+        def register_patterns():
+            # bulk_create skips post_save, so tell the extractor about the new names here
+            for name in created:
+                skill_extractor.add(name)
+                skill_resolver.add(name)
+                skill_suggester.add(found[name], name)
+
+        transaction.on_commit(register_patterns)
+    return found
+
+
+def _create_skills(names):
+    """
+    Insert skills named names; returns the ones this call created, in order.
+    Names another transaction inserted first are left out, so they are not
+    logged or registered twice.
+    """
+    try:
+        with transaction.atomic():
+            Skill.objects.bulk_create([Skill(name=n) for n in names])
+        return names
+    except IntegrityError:
+        pass
+    # lost a race for at least one name: insert one at a time to find out which
+    created = []
+    for name in names:
+        try:
+            with transaction.atomic():
+                Skill.objects.bulk_create([Skill(name=name)])
+        except IntegrityError:
+            continue
+        created.append(name)
+    return created
+
+
+def replace_user_skills(user_entries, prune=True):
+    """
+    Replace the skills of several users at once.
+    user_entries: {user_id: {name: (level, years, active)}} as built by parse_skill_entries.
+    With prune=False the users' other skills are kept (an upsert, as import_skills does).
+    Runs in a single transaction; returns (created, updated, deleted) counts.
+    """
+    with transaction.atomic(), readiness.deferred():
+        skill_ids = resolve_skills(n for entries in user_entries.values() for n in entries)
+
+        existing = {}
+        current = UserSkill.objects.filter(user_id__in=list(user_entries))
+        if not prune:
+            current = current.filter(skill_id__in=set(skill_ids.values()))
+        for us in current:
+            existing[(us.user_id, us.skill_id)] = us
+
+        wanted = {}
+        for user_id, entries in user_entries.items():
+            for name, values in entries.items():
+                wanted[(user_id, skill_ids[name])] = values
+
+        to_delete = [us.id for key, us in existing.items() if key not in wanted] if prune else []
+        to_create, to_update = [], []
+        for (user_id, skill_id), (level, years, active) in wanted.items():
+            us = existing.get((user_id, skill_id))
+            if us is None:
+                to_create.append(UserSkill(user_id=user_id, skill_id=skill_id, level=level,
+                                           experience_years=years, is_active=active))
+            elif (us.level, us.experience_years, us.is_active) != (level, years, active):
+                us.level, us.experience_years, us.is_active = level, years, active
+                to_update.append(us)
+
+        if to_delete:
+            UserSkill.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            UserSkill.objects.bulk_update(to_update, ['level', 'experience_years', 'is_active'])
+        if to_create:
+            UserSkill.objects.bulk_create(to_create)
+            readiness.user_skills_changed([(us.user_id, us.skill_id) for us in to_create], 1)
+
+        # deletes go through the UserSkill signals; bulk_create/bulk_update do not
+        if to_create or to_update:
+            versions.bump(versions.USER_SKILL)
+        changes.record(versions.USER_SKILL, 'create', [changes.row(versions.USER_SKILL, us) for us in to_create])
+        changes.record(versions.USER_SKILL, 'update', [changes.row(versions.USER_SKILL, us) for us in to_update])
+        changed = [
+            (us.user_id, us.skill_id, us.level, us.experience_years, us.is_active)
+            for us in to_create + to_update
+        ]
+
+        created_skills = [us.skill_id for us in to_create]
+
+        def sync_index():
+            for args in changed:
+                skill_index.add(*args)
+            for skill_id in created_skills:
+                skill_suggester.adjust(skill_id, 1)
+
+        transaction.on_commit(sync_index)
+
+    return len(to_create), len(to_update), len(to_delete)
@@ -1,11 +1,40 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
-from .models import User, Skill, UserSkill, Team
-from unittest.mock import patch
+from .models import User, Skill, UserSkill, Team, TeamRole, TeamReadiness, Job, CatalogVersion, Change
+from . import benchmarks, importer, jobs, metrics, profiling, readiness, skill_sync, versions
+from .batch_extraction import plan
+from .composition import compose_team
+from .readiness_matrix import ReadinessMatrix
+from .matching import match_with_index, match_with_orm, match_with_shared, match_with_sql
+from .llm import response_cache
+from .skill_extractor import skill_extractor
+from .skill_index import skill_index
+from .skill_matrix import skill_matrix
+from .skill_resolver import skill_resolver
+from .skill_suggest import skill_suggester
+from unittest.mock import AsyncMock, Mock, patch
+import asyncio
+import json
+import os
+import tempfile
+from scipy import sparse
 
+@override_settings(LLM_CACHE_ALIAS='default')
 class SkillMatchTest(TestCase):
     def setUp(self):
         self.client = APIClient()
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        skill_extractor.invalidate()
+        response_cache.clear()
 
         # Register a test user and get auth token
         res = self.client.post('/api/register/', {
@@ -54,6 +83,15 @@ class SkillMatchTest(TestCase):
         self.assertEqual(skills.count(), 1)
         self.assertEqual(skills[0].skill.name, 'docker')
 
+    def test_set_skills_parses_is_active_strictly(self):
+        url = f'/api/users/{self.user.id}/set-skills/'
+        res = self.client.post(url, {"skills": [{"name": "docker", "is_active": "false"}]}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(UserSkill.objects.get(user=self.user).is_active)
+        res = self.client.post(url, {"skills": [{"name": "docker", "is_active": "maybe"}]}, format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('is_active', res.data['error'])
+
     def test_match_users_by_skills(self):
         res = self.client.get('/api/match/?skills=python,django')
         self.assertEqual(res.status_code, 200)
@@ -72,7 +110,7 @@ class SkillMatchTest(TestCase):
         self.assertIn('testuser', usernames)
         self.assertNotIn('unskilled', usernames)
 
-    @patch("team.views.genai.GenerativeModel.generate_content")
+    @patch("team.llm.genai.GenerativeModel.generate_content")
     def test_skill_gap_analysis(self, mock_gemini_response):
         # Prepare mock Gemini response
         mock_gemini_response.return_value.text = "You are 66% ready. Learn Docker."
@@ -90,7 +128,7 @@ class SkillMatchTest(TestCase):
         self.assertIn('matched_skills', res.data)
         self.assertIn('missing_skills', res.data)
         self.assertIn('docker', res.data['missing_skills'])
-    @patch("team.views.genai.GenerativeModel.generate_content", side_effect=Exception("Simulated API Failure"))
+    @patch("team.llm.genai.GenerativeModel.generate_content", side_effect=Exception("Simulated API Failure"))
     def test_skill_gap_ai_fallback(self,mock_failure):
         team = Team.objects.create(name= "AI Team")
         team.required_skills.set([self.python,self.django,self.docker])
@@ -102,3 +140,1429 @@ class SkillMatchTest(TestCase):
         self.assertEqual(res.status_code, 200)
         self.assertIn("Gemini AI summary failed", res.data['summary'])
         self.assertIn("simulated api failure", res.data["summary"].lower())
+
+    def test_match_limit_and_offset(self):
+        other = User.objects.create_user(username='other', password='nopass')
+        UserSkill.objects.create(user=other, skill=self.python, level='beginner')
+
+        res = self.client.get('/api/match/?skills=python,django&limit=1')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([u['username'] for u in res.data], ['testuser'])
+        self.assertEqual(res['X-Total-Count'], '2')
+
+        res = self.client.get('/api/match/?skills=python,django&limit=1&offset=1')
+        self.assertEqual([u['username'] for u in res.data], ['other'])
+
+        res = self.client.get('/api/match/?skills=python&limit=abc')
+        self.assertEqual(res.status_code, 400)
+
+    def test_match_index_follows_set_skills(self):
+        self.client.get('/api/match/?skills=docker')
+        self.assertTrue(skill_index.is_built)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/users/{self.user.id}/set-skills/', {
+                "skills": [{"name": "docker", "level": "advanced"}]
+            }, format='json')
+
+        res = self.client.get('/api/match/?skills=docker,python')
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]['match_score'], 3)
+        self.assertEqual(res.data[0]['skills_matched'], [{'skill': 'docker', 'level': 'advanced', 'score': 3}])
+
+    def test_match_engines_agree(self):
+        other = User.objects.create_user(username='other', password='nopass')
+        UserSkill.objects.create(user=other, skill=self.django, level='Advanced')  # case must not matter
+        skills = {self.python.id: 'python', self.django.id: 'django'}
+
+        orm_total, orm_page = match_with_orm(skills)
+        expected = [(m['user_id'], m['score']) for m in orm_page]
+        for engine in (match_with_index, match_with_sql):
+            total, page = engine(skills)
+            self.assertEqual(total, orm_total)
+            self.assertEqual([(m['user_id'], m['score']) for m in page], expected)
+
+    def test_match_sql_engine_pages_in_database(self):
+        other = User.objects.create_user(username='other', password='nopass')
+        UserSkill.objects.create(user=other, skill=self.python, level='beginner')
+
+        with self.settings(SKILL_MATCH_ENGINE='sql'):
+            res = self.client.get('/api/match/?skills=python,django&limit=1&offset=1')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['X-Total-Count'], '2')
+        self.assertEqual(res.data[0]['username'], 'other')
+        self.assertEqual(res.data[0]['match_score'], 1)
+        self.assertEqual(res.data[0]['readiness_score'], '50%')
+        self.assertEqual(res.data[0]['skills_matched'], [{'skill': 'python', 'level': 'beginner', 'score': 1}])
+
+    def test_set_skills_updates_in_place(self):
+        before = UserSkill.objects.get(user=self.user, skill=self.python).id
+        payload = {"skills": [
+            {"name": "Python", "level": "intermediate", "experience_years": 4},
+            {"name": "kubernetes", "level": "beginner"},
+        ]}
+        res = self.client.post(f'/api/users/{self.user.id}/set-skills/', payload, format='json')
+        self.assertEqual(res.status_code, 200)
+
+        rows = {us.skill.name: us for us in UserSkill.objects.filter(user=self.user)}
+        self.assertEqual(set(rows), {'python', 'kubernetes'})
+        self.assertEqual(rows['python'].id, before)
+        self.assertEqual(rows['python'].level, 'intermediate')
+        self.assertEqual(rows['python'].experience_years, 4)
+        self.assertTrue(Skill.objects.filter(name='kubernetes').exists())
+
+    def test_set_skills_rejects_bad_level_atomically(self):
+        payload = {"skills": [{"name": "docker", "level": "expert"}]}
+        res = self.client.post(f'/api/users/{self.user.id}/set-skills/', payload, format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(UserSkill.objects.filter(user=self.user).count(), 2)
+
+    def test_set_skills_rejects_non_string_names(self):
+        for name in [42, ["python"], {"name": "python"}]:
+            res = self.client.post(f'/api/users/{self.user.id}/set-skills/', {"skills": [{"name": name}]}, format='json')
+            self.assertEqual(res.status_code, 400)
+            self.assertEqual(res.data['error'], "skill name must be a string")
+        self.assertEqual(UserSkill.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_set_skills(self):
+        other = User.objects.create_user(username='other', password='nopass')
+        payload = {"users": [
+            {"user_id": self.user.id, "skills": [{"name": "docker", "level": "advanced"}]},
+            {"user_id": other.id, "skills": [{"name": "python"}, {"name": "go", "level": "intermediate"}]},
+            {"user_id": 999999, "skills": []},
+            {"user_id": other.id, "skills": [{"name": "rust", "level": "guru"}]},
+        ]}
+        with self.settings(BULK_SET_SKILLS_CHUNK_SIZE=1):
+            res = self.client.post('/api/users/bulk-set-skills/', payload, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['users'], 2)
+        self.assertEqual(res.data['created'], 3)
+        self.assertEqual(res.data['deleted'], 2)
+        self.assertEqual(sorted(e['index'] for e in res.data['errors']), [2, 3])
+
+        self.assertEqual(list(UserSkill.objects.filter(user=self.user).values_list('skill__name', flat=True)), ['docker'])
+        self.assertEqual(set(UserSkill.objects.filter(user=other).values_list('skill__name', flat=True)), {'python', 'go'})
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_skill_gap_analysis_is_cached(self, mock_gemini_response):
+        mock_gemini_response.return_value.text = "You are 66% ready."
+        team = Team.objects.create(name="Data Team")
+        team.required_skills.set([self.python, self.django, self.docker])
+        payload = {"user_id": self.user.id, "team_id": team.id}
+
+        first = self.client.post('/api/skill-gap/', payload, format='json')
+        second = self.client.post('/api/skill-gap/', payload, format='json')
+        self.assertEqual(first.data['summary'], second.data['summary'])
+        self.assertEqual(mock_gemini_response.call_count, 1)
+
+        self.client.post('/api/skill-gap/?refresh=1', payload, format='json')
+        self.assertEqual(mock_gemini_response.call_count, 2)
+
+        stats = response_cache.stats()
+        self.assertEqual(stats['memory_hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_extract_skills_cache_survives_memory_eviction(self, mock_gemini_response):
+        mock_gemini_response.return_value.text = "['python', 'docker']"
+        with self.settings(LLM_CACHE_MEMORY_ENTRIES=0):
+            self.client.post('/api/extract-skills/', {"text": "Python and Docker"}, format='json')
+            res = self.client.post('/api/extract-skills/', {"text": "Python and Docker"}, format='json')
+        self.assertEqual(res.data['skills'], ['docker', 'python'])
+        self.assertEqual(mock_gemini_response.call_count, 1)
+        self.assertEqual(response_cache.stats()['store_hits'], 1)
+
+    def test_llm_cache_stats_is_staff_only(self):
+        res = self.client.get('/api/llm-cache/')
+        self.assertEqual(res.status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get('/api/llm-cache/')
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('hit_rate', res.data)
+
+    @patch("team.llm.genai.GenerativeModel.generate_content_async", new_callable=AsyncMock)
+    def test_async_skill_gap_analysis(self, mock_gemini_response):
+        mock_gemini_response.return_value.text = "Nearly there."
+        team = Team.objects.create(name="Data Team")
+        team.required_skills.set([self.python, self.django, self.docker])
+
+        res = self.client.post('/api/async/skill-gap/', {
+            "user_id": self.user.id,
+            "team_id": team.id
+        }, format='json')
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual(body['summary'], "Nearly there.")
+        self.assertEqual(body['matched_skills'], ['django', 'python'])
+        self.assertEqual(body['missing_skills'], ['docker'])
+
+    @patch("team.llm.genai.GenerativeModel.generate_content_async", new_callable=AsyncMock)
+    def test_async_extract_skills(self, mock_gemini_response):
+        mock_gemini_response.return_value.text = "['Django', 'gcp']"
+        res = self.client.post('/api/async/extract-skills/', {"text": "Django on GCP"}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['skills'], ['django', 'gcp'])
+
+    @patch("team.llm.genai.GenerativeModel.generate_content_async")
+    def test_async_extract_skills_timeout(self, mock_gemini_response):
+        async def slow(prompt):
+            await asyncio.sleep(1)
+        mock_gemini_response.side_effect = slow
+        with self.settings(LLM_TIMEOUT=0.01):
+            res = self.client.post('/api/async/extract-skills/', {"text": "Django"}, format='json')
+        self.assertEqual(res.status_code, 504)
+
+    def test_async_views_require_auth(self):
+        res = APIClient().post('/api/async/extract-skills/', {"text": "Django"}, format='json')
+        self.assertEqual(res.status_code, 403)
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_job_submit_dedupe_and_run(self, mock_gemini_response):
+        mock_gemini_response.return_value.text = "['python']"
+        payload = {"kind": "extract_skills", "payload": {"text": "Python dev"}}
+
+        first = self.client.post('/api/jobs/', payload, format='json')
+        second = self.client.post('/api/jobs/', payload, format='json')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertTrue(second.data['deduplicated'])
+
+        self.assertEqual(jobs.claim(5), [first.data['id']])
+        self.assertEqual(jobs.claim(5), [])
+        jobs.execute(first.data['id'])
+
+        res = self.client.get(f"/api/jobs/{first.data['id']}/?wait=1")
+        self.assertEqual(res.data['status'], 'succeeded')
+        self.assertEqual(res.data['result']['skills'], ['python'])
+
+        # finished jobs no longer block identical submissions
+        third = self.client.post('/api/jobs/', payload, format='json')
+        self.assertNotEqual(third.data['id'], first.data['id'])
+
+        # another user gets a job of their own, which they can poll
+        other = APIClient()
+        other.force_authenticate(User.objects.create(username='someone-else'))
+        theirs = other.post('/api/jobs/', payload, format='json')
+        self.assertNotEqual(theirs.data['id'], third.data['id'])
+        self.assertFalse(theirs.data['deduplicated'])
+        self.assertEqual(other.get(f"/api/jobs/{theirs.data['id']}/").status_code, 200)
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_job_reclaimed_after_lease_drops_stale_outcome(self, mock_gemini_response):
+        job, _ = jobs.submit('extract_skills', {'text': 'Python dev', 'refresh': 'false'}, user=self.user)
+        self.assertIs(job.payload['refresh'], False)
+
+        def slow(prompt, **kwargs):
+            self.assertEqual(jobs.claim(1), [job.id])  # the lease ran out: another worker takes the job
+            return Mock(text="['python']")
+
+        mock_gemini_response.side_effect = slow
+        with self.settings(JOBS_LEASE_SECONDS=0):
+            self.assertFalse(jobs.execute(jobs.claim(1)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('running', 2))
+
+        mock_gemini_response.side_effect = None
+        mock_gemini_response.return_value.text = "['python']"
+        self.assertTrue(jobs.execute(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+
+    def test_expired_job_fails_once_attempts_are_used_up(self):
+        job, _ = jobs.submit('extract_skills', {'text': 'Python dev'}, user=self.user)
+        Job.objects.filter(id=job.id).update(max_attempts=1)
+        with self.settings(JOBS_LEASE_SECONDS=0):
+            self.assertEqual(jobs.claim(1), [job.id])
+            self.assertEqual(jobs.claim(1), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+
+    @patch("team.llm.genai.GenerativeModel.generate_content", side_effect=Exception("quota"))
+    def test_job_retries_with_backoff_then_fails(self, mock_failure):
+        team = Team.objects.create(name="Data Team")
+        job, _ = jobs.submit('skill_gap', {'user_id': self.user.id, 'team_id': team.id}, user=self.user)
+
+        job.max_attempts = 2
+        job.save()
+        with self.settings(JOBS_RETRY_BACKOFF=0):
+            jobs.execute(jobs.claim(1)[0])
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'pending')
+            self.assertEqual(job.error, 'quota')
+
+            jobs.execute(jobs.claim(1)[0])
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'failed')
+            self.assertEqual(job.attempts, 2)
+
+    def test_job_validation_and_visibility(self):
+        res = self.client.post('/api/jobs/', {"kind": "skill_gap", "payload": {"user_id": 1}}, format='json')
+        self.assertEqual(res.status_code, 400)
+
+        job, _ = jobs.submit('skill_gap', {'user_id': self.user.id, 'team_id': 999999})
+        jobs.execute(jobs.claim(1)[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 1)
+
+        res = self.client.get(f'/api/jobs/{job.id}/')
+        self.assertEqual(res.status_code, 404)
+
+
+class SkillExtractorTest(TestCase):
+    def setUp(self):
+        skill_extractor.invalidate()
+        for name in ['c', 'c++', 'c#', 'node.js', 'java', 'javascript', 'go', 'react', 'sql']:
+            Skill.objects.create(name=name)
+
+    def test_symbols_boundaries_and_longest_match(self):
+        text = "Senior C++/C# dev. Node.js, JavaScript and JS; some Golang. NoSQL, Djangonaut, going."
+        self.assertEqual(
+            skill_extractor.extract(text),
+            ['c#', 'c++', 'go', 'javascript', 'node.js'],
+        )
+
+    def test_aliases_map_to_canonical(self):
+        with self.settings(SKILL_ALIASES={'reactjs': 'react', 'k8s': 'kubernetes'}):
+            skill_extractor.invalidate()
+            self.assertEqual(skill_extractor.extract("ReactJS on K8s"), ['kubernetes', 'react'])
+
+    def test_new_skills_are_added_without_rebuild(self):
+        self.assertEqual(skill_extractor.extract("Rust and Java"), ['java'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(name='rust')
+        with patch.object(skill_extractor, 'build') as rebuild:
+            self.assertEqual(skill_extractor.extract("Rust and Java"), ['java', 'rust'])
+        rebuild.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.get(name='java').delete()
+        self.assertEqual(skill_extractor.extract("Rust and Java"), ['rust'])
+
+    def test_extract_modes(self):
+        user = User.objects.create_user(username='reader', password='x')
+        client = APIClient()
+        client.force_authenticate(user)
+        with patch("team.llm.genai.GenerativeModel.generate_content") as gemini, \
+                self.settings(LLM_CACHE_ALIAS='default'):
+            gemini.return_value.text = "['terraform', 'react']"
+
+            res = client.post('/api/extract-skills/?mode=local', {"text": "React and SQL"}, format='json')
+            self.assertEqual(res.data['skills'], ['react', 'sql'])
+            self.assertFalse(res.data['llm_used'])
+
+            res = client.post('/api/extract-skills/', {"text": "React and SQL", "mode": "hybrid"}, format='json')
+            self.assertFalse(res.data['llm_used'])
+            gemini.assert_not_called()
+
+            text = "React with Terraform, GKE, ArgoCD and Helm3"
+            res = client.post('/api/extract-skills/', {"text": text, "mode": "hybrid"}, format='json')
+            self.assertTrue(res.data['llm_used'])
+            self.assertEqual(res.data['skills'], ['react', 'terraform'])
+
+            res = client.post('/api/extract-skills/', {"text": text, "mode": "magic"}, format='json')
+            self.assertEqual(res.status_code, 400)
+
+
+@override_settings(LLM_CACHE_ALIAS='default', EXTRACT_BATCH_CHUNK_CHARS=100, EXTRACT_BATCH_PACK_CHARS=60)
+class BatchExtractionTest(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        skill_extractor.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='hr', password='x'))
+
+    def test_plan_chunks_long_and_packs_short(self):
+        long_text = ' '.join(['word'] * 60)
+        units = plan([(0, long_text), (1, 'python'), (2, 'django'), (3, 'x' * 40)])
+        singles = [u for u in units if u[0] == 'single']
+        packs = [u for u in units if u[0] == 'pack']
+        self.assertEqual({u[1] for u in singles}, {0, 3})
+        self.assertGreater(len([u for u in singles if u[1] == 0]), 1)
+        self.assertTrue(all(len(u[2]) <= 100 for u in singles))
+        self.assertEqual([[i for i, _ in p[1]] for p in packs], [[1, 2]])
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_batch_results_in_order_with_errors(self, gemini):
+        def reply(prompt):
+            response = type('Response', (), {})()
+            if 'JSON object' in prompt:
+                response.text = '```json\n{"d0": ["Python"], "d1": ["Go", "gRPC"]}\n```'
+            else:
+                response.text = "['rust']"
+            return response
+        gemini.side_effect = reply
+
+        res = self.client.post('/api/extract-skills/batch/', {"documents": [
+            {"id": "a", "text": "python"},
+            "",
+            {"id": "c", "text": "go and grpc"},
+            {"id": "d", "text": "rust " * 30},
+        ]}, format='json')
+        self.assertEqual(res.status_code, 200)
+        results = res.data['results']
+        self.assertEqual([r['id'] for r in results], ['a', 1, 'c', 'd'])
+        self.assertEqual(results[0]['skills'], ['python'])
+        self.assertIsNotNone(results[1]['error'])
+        self.assertEqual(results[2]['skills'], ['go', 'grpc'])
+        self.assertEqual(results[3]['skills'], ['rust'])
+        # one packed prompt for a + c, two chunks for d
+        self.assertEqual(gemini.call_count, 3)
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_unparseable_pack_falls_back_to_single_prompts(self, gemini):
+        gemini.return_value.text = "['python']"
+        res = self.client.post('/api/extract-skills/batch/', {"documents": ["python", "django"]}, format='json')
+        self.assertEqual([r['skills'] for r in res.data['results']], [['python'], ['python']])
+        self.assertEqual(gemini.call_count, 3)
+
+
+class TeamCandidatesTest(TestCase):
+    def setUp(self):
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='lead', password='x'))
+        self.python = Skill.objects.create(name='python')
+        self.django = Skill.objects.create(name='django')
+        self.sql = Skill.objects.create(name='sql')
+        self.team = Team.objects.create(name='Backend')
+        self.team.required_skills.set([self.python, self.django])
+
+        def user(name, *skills):
+            u = User.objects.create(username=name)
+            for skill, level, years in skills:
+                UserSkill.objects.create(user=u, skill=skill, level=level, experience_years=years)
+            return u
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.senior = user('senior', (self.python, 'advanced', 8), (self.django, 'advanced', 6))
+            self.junior = user('junior', (self.python, 'beginner', 1), (self.django, 'beginner', 0))
+            self.half = user('half', (self.python, 'advanced', 10), (self.sql, 'advanced', 10))
+            self.member = user('member', (self.python, 'advanced', 10), (self.django, 'advanced', 10))
+            TeamRole.objects.create(team=self.team, user=self.member, role='dev')
+            user('none', (self.sql, 'advanced', 3))
+
+    def test_ranks_by_coverage_then_weight(self):
+        res = self.client.get(f'/api/teams/{self.team.id}/candidates/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['total'], 3)
+        self.assertEqual([r['username'] for r in res.data['results']], ['senior', 'junior', 'half'])
+        self.assertEqual(res.data['results'][0]['readiness'], 100)
+        self.assertEqual(res.data['results'][2]['missing_skills'], ['django'])
+
+    def test_filters_and_paging(self):
+        res = self.client.get(f'/api/teams/{self.team.id}/candidates/?min_readiness=100&exclude_members=0&limit=1&offset=1')
+        self.assertEqual(res.data['total'], 3)
+        self.assertEqual([r['username'] for r in res.data['results']], ['senior'])
+
+    def test_only_active_members_are_excluded(self):
+        TeamRole.objects.filter(user=self.member).update(is_active=False)
+        res = self.client.get(f'/api/teams/{self.team.id}/candidates/')
+        self.assertEqual([r['username'] for r in res.data['results']], ['member', 'senior', 'junior', 'half'])
+
+    def test_inactive_skills_do_not_count(self):
+        UserSkill.objects.filter(user=self.senior, skill=self.django).update(is_active=False)
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        res = self.client.get(f'/api/teams/{self.team.id}/candidates/')
+        self.assertEqual([r['username'] for r in res.data['results']], ['junior', 'half', 'senior'])
+
+    def test_index_follows_writes_from_other_processes(self):
+        self.client.get(f'/api/teams/{self.team.id}/candidates/')
+        with self.captureOnCommitCallbacks(execute=True):
+            UserSkill.objects.create(user=self.half, skill=self.django, level='beginner')
+        version = CatalogVersion.objects.get(name=versions.USER_SKILL).version
+        self.assertEqual(skill_index._version, version)  # a local write is applied without a rebuild
+
+        # another worker: no signal reaches this index, only the stored version moves
+        UserSkill.objects.filter(user=self.senior, skill=self.django).update(is_active=False)
+        CatalogVersion.objects.filter(name=versions.USER_SKILL).update(version=version + 1)
+        res = self.client.get(f'/api/teams/{self.team.id}/candidates/')
+        self.assertEqual([r['username'] for r in res.data['results']], ['half', 'junior', 'senior'])
+
+    def test_moving_a_user_skill_updates_derived_state(self):
+        self.client.get(f'/api/teams/{self.team.id}/candidates/')
+        row = UserSkill.objects.get(user=self.half, skill=self.sql)
+        with self.captureOnCommitCallbacks(execute=True):
+            row.skill = self.django  # as the admin may do
+            row.save()
+        res = self.client.get(f'/api/teams/{self.team.id}/candidates/')
+        self.assertEqual(res.data['results'][0]['username'], 'half')
+        self.assertEqual(res.data['results'][0]['readiness'], 100)
+        self.assertEqual(skill_index.columns([self.sql.id])[0][1].get(self.half.id), None)
+        self.assertEqual(TeamReadiness.objects.get(user=self.half, team=self.team).matched_count, 2)
+        self.assertEqual([c.action for c in Change.objects.filter(resource='userskill').order_by('-position')[:2]],
+                         ['create', 'delete'])
+
+    def test_unknown_team(self):
+        res = self.client.get('/api/teams/999999/candidates/')
+        self.assertEqual(res.status_code, 404)
+
+
+class TeamComposeTest(TestCase):
+    def setUp(self):
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='lead', password='x'))
+        self.skills = {n: Skill.objects.create(name=n) for n in ['python', 'django', 'sql', 'react', 'docker']}
+        self.team = Team.objects.create(name='Platform')
+        self.team.required_skills.set(self.skills.values())
+        self.other = Team.objects.create(name='Other')
+
+        def person(name, **held):
+            user = User.objects.create(username=name)
+            for skill, level in held.items():
+                UserSkill.objects.create(user=user, skill=self.skills[skill], level=level)
+            return user
+
+        self.wide = person('wide', python='advanced', django='advanced', sql='intermediate')
+        self.front = person('front', react='advanced', docker='beginner')
+        self.narrow = [person(f'n{i}', **{skill: 'advanced'}) for i, skill in enumerate(self.skills)]
+
+    def test_greedy_cover_prefers_broad_users(self):
+        res = self.client.get(f'/api/teams/{self.team.id}/compose/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([u['username'] for u in res.data['roster']], ['wide', 'front'])
+        self.assertEqual(res.data['roster'][1]['covers'], ['docker', 'react'])
+        self.assertEqual(res.data['coverage'], 100)
+
+    def test_level_members_and_size_constraints(self):
+        TeamRole.objects.create(team=self.team, user=self.narrow[4], role='dev')
+        TeamRole.objects.create(team=self.other, user=self.front, role='dev')
+
+        res = self.client.get(f'/api/teams/{self.team.id}/compose/?min_level=advanced&exclude_busy=1')
+        roster = [(u['username'], u['member']) for u in res.data['roster']]
+        self.assertEqual(roster, [('n4', True), ('wide', False), ('n2', False), ('n3', False)])
+
+        res = self.client.get(f'/api/teams/{self.team.id}/compose/?max_size=1&keep_members=0')
+        self.assertEqual(res.data['uncovered_skills'], ['docker', 'react'])
+        self.assertEqual(res.data['coverage'], 60)
+        self.assertEqual(self.client.get(f'/api/teams/{self.team.id}/compose/?min_level=guru').status_code, 400)
+
+    def test_inactive_skills_do_not_count(self):
+        UserSkill.objects.filter(user=self.wide).update(is_active=False)
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        required = dict(self.team.required_skills.values_list('id', 'name'))
+        plan = compose_team(required)
+        self.assertNotIn(self.wide.id, [entry['user_id'] for entry in plan['roster']])
+        self.assertEqual(plan['uncovered'], [])
+
+
+class TeamReadinessTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='hr', password='x'))
+        self.python, self.django, self.sql = (Skill.objects.create(name=n) for n in ['python', 'django', 'sql'])
+        self.team = Team.objects.create(name='Web')
+        self.team.required_skills.set([self.python, self.django])
+        self.ann = User.objects.create(username='ann')
+        self.bob = User.objects.create(username='bob')
+
+    def table(self):
+        return {
+            (r.user_id, r.team_id): (r.matched_count, r.required_count, round(r.score))
+            for r in TeamReadiness.objects.all()
+        }
+
+    def assertMatchesRebuild(self, expected):
+        self.assertEqual(self.table(), expected)
+        readiness.rebuild()
+        self.assertEqual(self.table(), expected)
+
+    def test_incremental_updates_match_full_rebuild(self):
+        UserSkill.objects.create(user=self.ann, skill=self.python, level='advanced')
+        UserSkill.objects.create(user=self.bob, skill=self.sql, level='beginner')
+        self.assertMatchesRebuild({(self.ann.id, self.team.id): (1, 2, 50)})
+
+        self.team.required_skills.add(self.sql)
+        self.assertMatchesRebuild({(self.ann.id, self.team.id): (1, 3, 33), (self.bob.id, self.team.id): (1, 3, 33)})
+
+        self.python.team_set.remove(self.team)
+        self.assertMatchesRebuild({(self.bob.id, self.team.id): (1, 2, 50)})
+
+        self.client.post(f'/api/users/{self.ann.id}/set-skills/', {"skills": [
+            {"name": "django", "level": "advanced"}, {"name": "sql", "level": "beginner"},
+        ]}, format='json')
+        self.assertMatchesRebuild({(self.ann.id, self.team.id): (2, 2, 100), (self.bob.id, self.team.id): (1, 2, 50)})
+
+        self.sql.delete()
+        self.assertMatchesRebuild({(self.ann.id, self.team.id): (1, 1, 100)})
+
+        self.team.required_skills.clear()
+        self.assertMatchesRebuild({})
+
+    def test_match_by_team_reads_readiness(self):
+        UserSkill.objects.create(user=self.ann, skill=self.python, level='advanced')
+        UserSkill.objects.create(user=self.bob, skill=self.python, level='beginner')
+        UserSkill.objects.create(user=self.bob, skill=self.django, level='beginner')
+
+        res = self.client.get(f'/api/match/?team={self.team.id}')
+        self.assertEqual(res['X-Total-Count'], '2')
+        self.assertEqual([(u['username'], u['readiness_score']) for u in res.data], [('bob', '100%'), ('ann', '50%')])
+        self.assertEqual(res.data[0]['match_score'], 2)
+        self.assertEqual(self.client.get('/api/match/?team=999').status_code, 404)
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_gap_analysis_reports_readiness(self, mock_gemini_response):
+        mock_gemini_response.return_value.text = "Half way there."
+        UserSkill.objects.create(user=self.ann, skill=self.django, level='advanced')
+        res = self.client.post('/api/skill-gap/', {"user_id": self.ann.id, "team_id": self.team.id}, format='json')
+        self.assertEqual(res.data['readiness'], {"matched_count": 1, "required_count": 2, "score": 50})
+
+        res = self.client.post('/api/skill-gap/', {"user_id": self.bob.id, "team_id": self.team.id}, format='json')
+        self.assertEqual(res.data['readiness'], {"matched_count": 0, "required_count": 2, "score": 0})
+
+
+class SeedCommandTest(TestCase):
+    def snapshot(self):
+        return (
+            sorted(UserSkill.objects.filter(user__username__startswith='seed3-').values_list(
+                'user__username', 'skill__name', 'level', 'experience_years', 'is_active')),
+            sorted(Team.required_skills.through.objects.filter(team__name__startswith='Seed 3 ').values_list(
+                'team__name', 'skill__name')),
+            sorted(TeamRole.objects.filter(team__name__startswith='Seed 3 ').values_list(
+                'team__name', 'user__username', 'role')),
+        )
+
+    def test_same_seed_same_dataset(self):
+        options = dict(users=60, skills=80, teams=4, skills_per_user=6, seed=3, stdout=StringIO())
+        call_command('seed', **options)
+        first = self.snapshot()
+        self.assertGreater(len(first[0]), 200)
+        self.assertEqual(TeamReadiness.objects.count(), readiness.rebuild())
+
+        User.objects.filter(username__startswith='seed3-').delete()
+        Team.objects.filter(name__startswith='Seed 3 ').delete()
+        call_command('seed', **options)
+        self.assertEqual(self.snapshot(), first)
+
+        call_command('seed', **options)  # re-running adds nothing
+        self.assertEqual(self.snapshot(), first)
+
+    def test_refreshes_derived_structures(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(SKILL_MATRIX_PATH=f"{tmp.name}/matrix.bin"))
+        self.addCleanup(skill_matrix.detach)
+        skill_resolver.invalidate()
+        skill_suggester.invalidate()
+        skill_matrix.build()
+        self.assertEqual(skill_resolver.resolve('kafka')['method'], 'unknown')
+        self.assertEqual(skill_suggester.suggest('kaf'), [])
+
+        call_command('seed', users=20, skills=60, teams=1, seed=4, stdout=StringIO())
+        self.assertEqual(skill_resolver.resolve('kafka')['method'], 'exact')
+        self.assertNotEqual(skill_suggester.suggest('kaf'), [])
+        self.assertEqual(skill_matrix.stats()['rows'], UserSkill.objects.count())
+
+
+class ImportSkillsTest(TestCase):
+    def setUp(self):
+        skill_resolver.invalidate()
+        Skill.objects.create(name='javascript')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, text):
+        path = f"{self.tmp.name}/{name}"
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_csv_upserts_and_skips_bad_rows(self):
+        User.objects.create(username='ann', display_name='Ann')
+        path = self.write('people.csv', (
+            "username,email,display_name,skill,level,experience_years,is_active\n"
+            "ann,ann@x.io,Ann B,python,advanced,4,\n"
+            "ann,,,js,beginner,,false\n"
+            "bob,bob@x.io,\"Bob, Jr\",python,expert,1,\n"
+            ",,,python,beginner,,\n"
+            "cat,,,python,beginner,0,1\n"
+            "dan,,,python,beginner,0,maybe\n"
+        ))
+        out, err = StringIO(), StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_skills', path, batch_size=2, stdout=out, stderr=err)
+        self.assertIn('line 4: invalid level', err.getvalue())
+        self.assertIn('line 7: is_active must be a boolean', err.getvalue())
+        self.assertIn('3 rows skipped', out.getvalue())
+        self.assertEqual(User.objects.get(username='ann').display_name, 'Ann B')
+        self.assertEqual(sorted(UserSkill.objects.values_list('user__username', 'skill__name', 'is_active')),
+                         [('ann', 'javascript', False), ('ann', 'python', True), ('cat', 'python', True)])
+        self.assertFalse(User.objects.get(username='cat').has_usable_password())
+
+        # a rerun only updates; existing skills not in the file stay
+        UserSkill.objects.create(user=User.objects.get(username='cat'), skill=Skill.objects.get(name='javascript'))
+        call_command('import_skills', path, stdout=out, stderr=StringIO())
+        self.assertEqual(UserSkill.objects.count(), 4)
+
+    def test_reports_overlong_fields_and_bad_encoding_as_row_errors(self):
+        rows = [
+            {"username": "ann", "email": "a" * 250 + "@x.io", "skill": "python"},
+            {"username": "bob", "skill": "s" * 101},
+            {"username": "cat", "skill": "python"},
+        ]
+        path = f"{self.tmp.name}/people.ndjson"
+        with open(path, 'wb') as f:
+            f.write(b''.join(json.dumps(row).encode() + b'\n' for row in rows[:2]))
+            f.write(b'{"username": "\xff"}\n')
+            f.write(json.dumps(rows[2]).encode() + b'\n')
+        out, err = StringIO(), StringIO()
+        call_command('import_skills', path, stdout=out, stderr=err)
+        self.assertIn('line 1: email longer than', err.getvalue())
+        self.assertIn('line 2: skill name longer than 100 characters', err.getvalue())
+        self.assertIn('line 3: invalid UTF-8', err.getvalue())
+        self.assertIn('3 rows skipped', out.getvalue())
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['cat'])
+
+    def test_resumes_from_checkpoint(self):
+        lines = [json.dumps({"username": f"u{n}", "skills": [{"name": "python", "level": "intermediate"}]})
+                 for n in range(7)]
+        path = self.write('people.ndjson', '\n'.join(lines) + '\n')
+        original = importer.SkillImport.apply
+        calls = []
+
+        def fail_third(self, rows):
+            calls.append(len(rows))
+            if len(calls) == 3:
+                raise RuntimeError("db went away")
+            return original(self, rows)
+
+        with patch.object(importer.SkillImport, 'apply', fail_third), self.assertRaises(RuntimeError):
+            call_command('import_skills', path, batch_size=2, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='u').count(), 4)
+        with open(f"{path}.checkpoint") as f:
+            self.assertEqual(json.load(f)['line'], 4)
+
+        err = StringIO()
+        call_command('import_skills', path, batch_size=2, stdout=StringIO(), stderr=err)
+        self.assertIn('Resuming after line 4', err.getvalue())
+        self.assertEqual(UserSkill.objects.filter(skill__name='python').count(), 7)
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+
+@override_settings(LLM_CACHE_ALIAS='default')
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+
+    def test_run_reports_metrics_per_scenario(self):
+        call_command('seed', users=30, skills=40, teams=3, skills_per_user=5, seed=1, stdout=StringIO())
+        results = benchmarks.run(repeat=2, warmup=1, only=['match', 'set_skills', 'skill_gap'])
+        self.assertEqual(set(results), {'match', 'set_skills', 'skill_gap'})
+        for metrics in results.values():
+            self.assertEqual(metrics['status'], 200)
+            self.assertGreater(metrics['queries'], 0)
+            self.assertLessEqual(metrics['p50_ms'], metrics['p95_ms'])
+        with self.assertRaises(ValueError):
+            benchmarks.run(only=['nope'])
+
+    def test_compare_flags_regressions_past_tolerance(self):
+        base = {'match': {'p50_ms': 10, 'p95_ms': 20, 'queries': 3, 'peak_kb': 100, 'status': 200}}
+        ok = {'match': {'p50_ms': 11, 'p95_ms': 24, 'queries': 3, 'peak_kb': 120, 'status': 200}}
+        self.assertEqual(benchmarks.compare(ok, base), [])
+        bad = {'match': {'p50_ms': 30, 'p95_ms': 40, 'queries': 4, 'peak_kb': 200, 'status': 500}}
+        self.assertEqual(len(benchmarks.compare(bad, base)), 4)
+
+
+@override_settings(LLM_CACHE_ALIAS='default')
+class MetricsTest(TestCase):
+    def setUp(self):
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        response_cache.clear()
+        metrics.registry.clear()
+        self.staff = User.objects.create(username='ops', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        python = Skill.objects.create(name='python')
+        UserSkill.objects.create(user=self.staff, skill=python, level='advanced')
+        self.team = Team.objects.create(name='Core')
+        self.team.required_skills.set([python])
+
+    def series(self, text, metric, route):
+        prefix = f'skillmatch_{metric}_'
+        labels = f'{{method="{"POST" if "gap" in route else "GET"}",route="{route}"}}'
+        return {
+            line[len(prefix):].split('{')[0]: float(line.rsplit(' ', 1)[1])
+            for line in text.splitlines()
+            if line.startswith(prefix) and labels in line and ('_sum' in line or '_count' in line)
+        }
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_per_route_histograms(self, mock_gemini_response):
+        mock_gemini_response.return_value.text = "Ready."
+        self.client.get('/api/match/?skills=python')
+        self.client.get('/api/match/?skills=python')
+        self.client.get('/api/users/')
+        self.client.post('/api/skill-gap/', {"user_id": self.staff.id, "team_id": self.team.id}, format='json')
+
+        res = self.client.get('/api/metrics/')
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        self.assertIn('# TYPE skillmatch_request_seconds histogram', text)
+        self.assertIn('skillmatch_db_queries_bucket{method="GET",route="api/match/",le="+Inf"} 2', text)
+
+        self.assertEqual(self.series(text, 'request_seconds', 'api/match/')['count'], 2)
+        self.assertGreater(self.series(text, 'db_queries', 'api/match/')['sum'], 0)
+        self.assertGreater(self.series(text, 'response_bytes', 'api/match/')['sum'], 0)
+        self.assertGreater(self.series(text, 'serialize_seconds', 'api/users/')['sum'], 0)
+        self.assertGreater(self.series(text, 'llm_seconds', 'api/skill-gap/')['sum'], 0)
+        self.assertEqual(self.series(text, 'llm_seconds', 'api/match/')['sum'], 0)
+
+    @override_settings(API_STREAM_CHUNK_SIZE=1)
+    def test_streamed_responses_are_recorded_once_sent(self):
+        self.addCleanup(skill_index.invalidate)
+        UserSkill.objects.create(user=User.objects.create(username='bo'), skill=Skill.objects.get(name='python'), level='beginner')
+        res = self.client.get('/api/match/?skills=python', HTTP_ACCEPT='application/x-ndjson')
+        self.assertTrue(res.streaming)
+        self.assertNotIn('route="api/match/"', metrics.registry.render())
+
+        body = b''.join(res.streaming_content)
+        text = metrics.registry.render()
+        self.assertEqual(self.series(text, 'request_seconds', 'api/match/')['count'], 1)
+        self.assertEqual(self.series(text, 'response_bytes', 'api/match/')['sum'], len(body))
+        before = self.series(text, 'db_queries', 'api/match/')['sum']
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/match/?skills=python', HTTP_ACCEPT='application/x-ndjson').getvalue()
+        # includes the user loads run while the body was iterated, one per chunk
+        after = self.series(metrics.registry.render(), 'db_queries', 'api/match/')['sum']
+        self.assertEqual(after - before, len(ctx.captured_queries))
+
+    def test_router_routes_are_labelled_by_pattern(self):
+        self.client.get(f'/api/teams/{self.team.id}/candidates/')
+        self.assertIn('route="api/teams/<pk>/candidates/"', self.client.get('/api/metrics/').content.decode())
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create(username='dev'))
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+
+@override_settings(LLM_CACHE_ALIAS='default', SKILL_ALIASES={'js': 'javascript', 'k8s': 'kubernetes'})
+class SkillResolverTest(TestCase):
+    def setUp(self):
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        response_cache.clear()
+        self.user = User.objects.create(username='ann')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for name in ['python', 'javascript', 'postgresql', 'React', 'c++', 'go']:
+            Skill.objects.create(name=name)
+
+    def test_resolution_methods(self):
+        methods = {r['term']: (r['skill'], r['method']) for r in skill_resolver.resolve_many(
+            ['python', 'react', 'JS', 'k8s', 'post-gresql', 'postgre', 'pyton', 'gp', 'cobol'])}
+        self.assertEqual(methods, {
+            'python': ('python', 'exact'),
+            'react': ('React', 'exact'),
+            'JS': ('javascript', 'alias'),
+            'k8s': ('kubernetes', 'alias'),
+            'post-gresql': ('postgresql', 'normalized'),
+            'postgre': ('postgresql', 'fuzzy'),
+            'pyton': ('python', 'fuzzy'),
+            'gp': (None, 'unknown'),
+            'cobol': (None, 'unknown'),
+        })
+
+    def test_new_skills_are_added_in_place(self):
+        skill_resolver.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(name='terraform')
+        self.assertEqual(skill_resolver.resolve('terafform')['skill'], 'terraform')
+
+    def test_match_reports_resolution(self):
+        UserSkill.objects.create(user=self.user, skill=Skill.objects.get(name='javascript'), level='advanced')
+        res = self.client.get('/api/match/?skills=js,pyton,cobol')
+        self.assertEqual([u['username'] for u in res.data], ['ann'])
+        resolution = json.loads(res['X-Skill-Resolution'])
+        self.assertEqual([(r['term'], r['skill'], r['method']) for r in resolution], [
+            ('js', 'javascript', 'alias'), ('pyton', 'python', 'fuzzy'), ('cobol', None, 'unknown'),
+        ])
+
+    def test_match_counts_each_required_skill_once(self):
+        UserSkill.objects.create(user=self.user, skill=Skill.objects.get(name='javascript'), level='advanced')
+        res = self.client.get('/api/match/?skills=js,javascript,JavaScript')
+        self.assertEqual(res.data[0]['readiness_score'], '100%')
+        res = self.client.get('/api/match/?skills=js,javascript,cobol,cobol')
+        self.assertEqual(res.data[0]['readiness_score'], '50%')
+
+    def test_set_skills_uses_canonical_names(self):
+        res = self.client.post(f'/api/users/{self.user.id}/set-skills/', {"skills": [
+            {"name": "JS"}, {"name": "post-gresql", "level": "advanced"}, {"name": "preact"},
+        ]}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([r['method'] for r in res.data['resolved']], ['alias', 'normalized', 'unknown'])
+        self.assertEqual(res.data['resolved'][2]['suggestion'], 'React')
+        self.assertEqual(
+            sorted(UserSkill.objects.filter(user=self.user).values_list('skill__name', 'level')),
+            [('javascript', 'beginner'), ('postgresql', 'advanced'), ('preact', 'beginner')],
+        )
+
+    @patch("team.llm.genai.GenerativeModel.generate_content")
+    def test_extraction_canonicalises_llm_terms(self, mock_gemini_response):
+        mock_gemini_response.return_value.text = "['JS', 'Postgre SQL', 'pyton', 'cobol']"
+        res = self.client.post('/api/extract-skills/', {"text": "...", "mode": "llm"}, format='json')
+        self.assertEqual(res.data['skills'], ['cobol', 'javascript', 'postgresql', 'python'])
+        self.assertEqual({r['term']: r['method'] for r in res.data['resolved']},
+                         {'js': 'alias', 'postgre sql': 'normalized', 'pyton': 'fuzzy', 'cobol': 'unknown'})
+
+
+class SkillSuggestTest(TestCase):
+    def setUp(self):
+        skill_resolver.invalidate()
+        skill_suggester.invalidate()
+        self.client = APIClient()
+        self.user = User.objects.create(username='ann')
+        self.client.force_authenticate(self.user)
+        self.skills = {name: Skill.objects.create(name=name) for name in ['python', 'pytorch', 'pyspark', 'Pytest', 'perl']}
+        for n, name in enumerate(['pytorch', 'pytorch', 'python', 'pytorch', 'python', 'pyspark']):
+            UserSkill.objects.create(user=User.objects.create(username=f'u{n}'), skill=self.skills[name])
+
+    def names(self, q, **params):
+        res = self.client.get('/api/skills/suggest/', {'q': q, **params})
+        self.assertEqual(res.status_code, 200)
+        return [(s['name'], s['holders']) for s in res.data]
+
+    def test_ranked_by_holders(self):
+        self.assertEqual(self.names('py'), [('pytorch', 3), ('python', 2), ('pyspark', 1), ('Pytest', 0)])
+        self.assertEqual(self.names('PYT', limit=2), [('pytorch', 3), ('python', 2)])
+        self.assertEqual(self.names('rust'), [])
+        self.assertEqual(self.client.get('/api/skills/suggest/').status_code, 400)
+        self.assertEqual(self.client.get('/api/skills/suggest/?q=p&limit=500').status_code, 400)
+
+    def test_counts_follow_changes(self):
+        self.names('py')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/users/{self.user.id}/set-skills/', {"skills": [
+                {"name": "pyspark"}, {"name": "pytest"}, {"name": "pyramid"},
+            ]}, format='json')
+            UserSkill.objects.filter(skill__name='pytorch').first().delete()
+            self.skills['perl'].delete()
+        self.assertEqual(self.names('py'), [('pyspark', 2), ('python', 2), ('pytorch', 2),
+                                            ('Pytest', 1), ('pyramid', 1)])
+        self.assertEqual(self.names('pe'), [])
+
+
+class CatalogVersionTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.client = APIClient()
+        self.user = User.objects.create(username='ann')
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.python = Skill.objects.create(name='python')
+            self.team = Team.objects.create(name='Core')
+            TeamRole.objects.create(user=self.user, team=self.team, role='dev')
+
+    def test_skills_etag_and_304(self):
+        first = self.client.get('/api/skills/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json(), [{'id': self.python.id, 'name': 'python'}])
+        etag = first['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get('/api/skills/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get('/api/skills/')
+        self.assertEqual(cached.content, first.content)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(name='go')
+        changed = self.client.get('/api/skills/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertEqual(len(changed.json()), 2)
+
+    def test_if_modified_since_within_the_same_second(self):
+        version = CatalogVersion.objects.get(name=versions.SKILL)
+        whole = version.updated_at.replace(microsecond=0)
+        CatalogVersion.objects.filter(name=versions.SKILL).update(updated_at=whole)
+        since = self.client.get('/api/skills/')['Last-Modified']
+        self.assertEqual(self.client.get('/api/skills/', HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+
+        # a change later in that second keeps the same Last-Modified date, so only the ETag can tell
+        CatalogVersion.objects.filter(name=versions.SKILL).update(
+            version=version.version + 1, updated_at=whole + timedelta(microseconds=500000))
+        self.assertEqual(self.client.get('/api/skills/')['Last-Modified'], since)
+        self.assertEqual(self.client.get('/api/skills/', HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    def test_team_list_follows_nested_changes(self):
+        etag = self.client.get('/api/teams/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/users/{self.user.id}/set-skills/', {"skills": [{"name": "python"}]}, format='json')
+        res = self.client.get('/api/teams/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()[0]['members'][0]['user']['skills'][0]['skill'], 'python')
+
+        etag = res['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.required_skills.add(self.python)
+        self.assertEqual(self.client.get('/api/teams/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bumps_once_per_transaction(self):
+        before = CatalogVersion.objects.get(name=versions.USER_SKILL).version if \
+            CatalogVersion.objects.filter(name=versions.USER_SKILL).exists() else 0
+        with self.captureOnCommitCallbacks(execute=True):
+            for n in range(3):
+                UserSkill.objects.create(user=User.objects.create(username=f'u{n}'), skill=self.python)
+        self.assertEqual(CatalogVersion.objects.get(name=versions.USER_SKILL).version, before + 1)
+
+        # the bump queued inside a rolled-back savepoint is gone; a later write queues a new one
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    UserSkill.objects.create(user=User.objects.create(username='lost'), skill=self.python)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            UserSkill.objects.create(user=User.objects.create(username='kept'), skill=self.python)
+        self.assertEqual(CatalogVersion.objects.get(name=versions.USER_SKILL).version, before + 2)
+
+
+class ChangeFeedTest(TestCase):
+    def setUp(self):
+        skill_resolver.invalidate()
+        self.client = APIClient()
+        self.user = User.objects.create(username='ann')
+        self.client.force_authenticate(self.user)
+
+    def feed(self, since='', limit=100):
+        res = self.client.get(f'/api/changes/?since={since}&limit={limit}')
+        self.assertEqual(res.status_code, 200)
+        return res.json()
+
+    def test_records_committed_writes_in_order(self):
+        start = self.feed('latest')['cursor']
+        with self.captureOnCommitCallbacks(execute=True):
+            python = Skill.objects.create(name='python')
+            team = Team.objects.create(name='Core')
+            team.required_skills.add(python)
+            TeamRole.objects.create(user=self.user, team=team, role='dev')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/users/{self.user.id}/set-skills/',
+                             {"skills": [{"name": "python"}, {"name": "rust"}]}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/users/{self.user.id}/set-skills/',
+                             {"skills": [{"name": "rust", "level": "advanced"}]}, format='json')
+            team.required_skills.clear()
+
+        feed = self.feed(start)
+        seen = [(c['action'], c['resource'], c['object_id']) for c in feed['changes']]
+        rust = Skill.objects.get(name='rust').id
+        self.assertEqual(seen, [
+            ('create', 'skill', str(python.id)),
+            ('create', 'team', str(team.id)),
+            ('create', 'team_skill', f'{team.id}:{python.id}'),
+            ('create', 'teamrole', str(TeamRole.objects.get().id)),
+            ('create', 'skill', str(rust)),
+            ('create', 'userskill', f'{self.user.id}:{python.id}'),
+            ('create', 'userskill', f'{self.user.id}:{rust}'),
+            ('delete', 'userskill', f'{self.user.id}:{python.id}'),
+            ('update', 'userskill', f'{self.user.id}:{rust}'),
+            ('delete', 'team_skill', f'{team.id}:{python.id}'),
+        ])
+        self.assertEqual(feed['changes'][-2]['data']['level'], 'advanced')
+        self.assertEqual(self.feed(feed['cursor'])['changes'], [])
+
+    def test_pages_and_skips_rolled_back_writes(self):
+        for name in ('a', 'b', 'c'):
+            Skill.objects.create(name=name)  # logged in the write's own transaction, no on_commit needed
+        try:
+            with transaction.atomic():
+                Skill.objects.create(name='lost')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        first = self.feed(limit=2)
+        self.assertTrue(first['has_more'])
+        rest = self.feed(first['cursor'], limit=2)
+        self.assertFalse(rest['has_more'])
+        names = [c['data']['name'] for c in first['changes'] + rest['changes']]
+        self.assertEqual(names, ['a', 'b', 'c'])
+        self.assertEqual(self.client.get('/api/changes/?since=bogus').status_code, 400)
+
+    def test_skills_inserted_concurrently_are_not_logged_as_created(self):
+        Skill.objects.bulk_create([Skill(name='go')])  # another request's insert, seen only by the unique index
+        filter_skills = Skill.objects.filter
+        lookups = []
+
+        def stale_first_lookup(*args, **kwargs):
+            lookups.append(kwargs)
+            return Skill.objects.none() if len(lookups) == 1 else filter_skills(*args, **kwargs)
+
+        with patch.object(Skill.objects, 'filter', side_effect=stale_first_lookup):
+            ids = skill_sync.resolve_skills(['go', 'rust'])
+        self.assertEqual(ids, dict(Skill.objects.values_list('name', 'id')))
+        logged = Change.objects.filter(resource=versions.SKILL, action='create')
+        self.assertEqual([c.data['name'] for c in logged], ['rust'])
+
+    def test_feed_follows_commit_order_not_ids(self):
+        Skill.objects.create(name='early')
+        cursor = self.feed()['cursor']
+        # a writer that took its id before 'early' but committed after the reader passed it
+        Skill.objects.create(name='late')
+        lowest = Change.objects.order_by('id').values_list('id', flat=True).first()
+        Change.objects.filter(data__name='late').update(id=lowest - 1)
+        self.assertEqual([c['data']['name'] for c in self.feed(cursor)['changes']], ['late'])
+        self.assertEqual(self.feed('latest')['cursor'], self.feed(cursor)['cursor'])
+
+
+class SharedSkillMatrixTest(TestCase):
+    def setUp(self):
+        skill_index.invalidate()
+        skill_matrix.detach()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(SKILL_MATRIX_PATH=f"{tmp.name}/matrix.bin"))
+        self.addCleanup(skill_matrix.detach)
+
+        self.skills = {Skill.objects.create(name=name).id: name for name in ('python', 'django', 'go')}
+        ids = list(self.skills)
+        for n in range(12):
+            user = User.objects.create(username=f'u{n:02d}')
+            for i, sid in enumerate(ids):
+                if (n + i) % 3:
+                    UserSkill.objects.create(user=user, skill_id=sid, level=['beginner', 'intermediate', 'advanced'][n % 3])
+
+    def assertSameAsIndex(self):
+        skill_index.invalidate()
+        for limit, after in ((None, None), (5, None), (4, (4, 3))):
+            self.assertEqual(match_with_shared(self.skills, limit=limit, after=after),
+                             match_with_index(self.skills, limit=limit, after=after))
+
+    def test_matches_index_and_follows_changes(self):
+        self.assertSameAsIndex()
+        first = skill_matrix.stats()
+        self.assertEqual(first['rows'], UserSkill.objects.count())
+
+        user = User.objects.get(username='u00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_login(user)
+            self.client.post(f'/api/users/{user.id}/set-skills/',
+                             {"skills": [{"name": "go", "level": "advanced"}, {"name": "python"}]},
+                             content_type='application/json')
+            UserSkill.objects.filter(user__username='u05').delete()
+        self.assertSameAsIndex()
+        self.assertEqual(skill_matrix.stats()['built_at'], first['built_at'])
+        self.assertGreater(skill_matrix.stats()['overlay_rows'], 0)
+
+    def test_replays_changes_committed_out_of_id_order(self):
+        match_with_shared(self.skills)
+        user = User.objects.get(username='u00')
+        UserSkill.objects.filter(user=user).delete()
+        # the deletes took ids below the snapshot's but committed after the snapshot was read
+        Change.objects.filter(resource=versions.USER_SKILL, action='delete').update(id=F('id') - 10 ** 9)
+        self.assertNotIn(user.id, [m['user_id'] for m in match_with_shared(self.skills)[1]])
+        self.assertSameAsIndex()
+
+    def test_rebuild_swaps_file_for_attached_readers(self):
+        match_with_shared(self.skills)
+        other = type(skill_matrix)()  # another worker attached to the same file
+        other.match(list(self.skills))
+        UserSkill.objects.create(user=User.objects.create(username='late'), skill_id=next(iter(self.skills)),
+                                 level='advanced')
+        out = StringIO()
+        call_command('build_skill_matrix', stdout=out)
+        self.assertIn(f"Wrote {UserSkill.objects.count()} rows", out.getvalue())
+        self.assertEqual(other.stats()['rows'], UserSkill.objects.count())
+        self.assertEqual(other.match(list(self.skills))[0], match_with_index(self.skills)[0])
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        self.client = APIClient()
+        self.python = Skill.objects.create(name='python')
+        self.django = Skill.objects.create(name='django')
+        self.users = [User.objects.create(username=f'u{n:02d}') for n in range(7)]
+        self.client.force_authenticate(self.users[0])
+        for n, user in enumerate(self.users):
+            UserSkill.objects.create(user=user, skill=self.python, level=['beginner', 'advanced'][n % 2])
+            if n % 3 == 0:
+                UserSkill.objects.create(user=user, skill=self.django, level='intermediate')
+
+    def walk(self, url, **headers):
+        rows, pages = [], 0
+        while url:
+            res = self.client.get(url, **headers)
+            self.assertEqual(res.status_code, 200)
+            rows += res.json()
+            pages += 1
+            url = res.headers.get('Link', '').partition('<')[2].partition('>')[0]
+        return rows, pages
+
+    def test_users_keyset_pages(self):
+        rows, pages = self.walk('/api/users/?page_size=3')
+        self.assertEqual([r['username'] for r in rows], [u.username for u in self.users])
+        self.assertEqual(pages, 3)
+        self.assertIsInstance(self.client.get('/api/users/').json(), list)
+        self.assertEqual(self.client.get('/api/users/?cursor=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/users/?page_size=0').status_code, 400)
+
+    def test_match_cursor_matches_full_ranking_on_every_engine(self):
+        full = [r['username'] for r in self.client.get('/api/match/?skills=python,django').json()]
+        self.assertEqual(len(full), 7)
+        for engine in ('index', 'sql', 'orm'):
+            with self.settings(SKILL_MATCH_ENGINE=engine):
+                rows, pages = self.walk('/api/match/?skills=python,django&limit=2')
+            self.assertEqual([r['username'] for r in rows], full, engine)
+            self.assertEqual(pages, 4)
+
+        team = Team.objects.create(name='Web')
+        team.required_skills.set([self.python, self.django])
+        full = [r['username'] for r in self.client.get(f'/api/match/?team={team.id}').json()]
+        rows, _ = self.walk(f'/api/match/?team={team.id}&limit=3')
+        self.assertEqual([r['username'] for r in rows], full)
+
+        res = self.client.get('/api/match/?skills=python&cursor=WzEsIDJd&offset=2')
+        self.assertEqual(res.status_code, 400)
+
+    def test_ndjson_streams(self):
+        res = self.client.get('/api/users/', HTTP_ACCEPT='application/x-ndjson')
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['username'] for line in lines], [u.username for u in self.users])
+
+        res = self.client.get('/api/match/?skills=python&limit=4&format=ndjson')
+        rows = [json.loads(line) for line in b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['match_score'], 3)
+        self.assertIn('X-Next-Cursor', res)
+
+        res = self.client.get('/api/match/', HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('error', json.loads(res.content))
+
+
+class SparseFieldsTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.client = APIClient()
+        self.python = Skill.objects.create(name='python')
+        self.users = [User.objects.create(username=f'u{n}', email=f'u{n}@x.io') for n in range(3)]
+        self.client.force_authenticate(self.users[0])
+        self.team = Team.objects.create(name='Core', description='core team')
+        self.team.required_skills.add(self.python)
+        for user in self.users:
+            UserSkill.objects.create(user=user, skill=self.python, level='advanced')
+            TeamRole.objects.create(user=user, team=self.team, role='dev')
+
+    def test_users_fields_skip_skills(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/users/?fields=id,username')
+        self.assertEqual(res.json()[0], {'id': self.users[0].id, 'username': 'u0'})
+        self.assertFalse([q for q in ctx.captured_queries if 'team_userskill' in q['sql']])
+        self.assertNotIn('password', ctx.captured_queries[-1]['sql'])
+
+        row = self.client.get(f'/api/users/{self.users[1].id}/?fields=username&expand=skills').json()
+        self.assertEqual(row['skills'][0]['skill'], 'python')
+        self.assertEqual(set(row), {'username', 'skills'})
+        row = self.client.get('/api/users/?fields=id,skills').json()[0]  # naming it is enough
+        self.assertEqual((set(row), row['skills'][0]['skill']), ({'id', 'skills'}, 'python'))
+        self.assertIn('skills', self.client.get('/api/users/').json()[0])
+        self.assertEqual(self.client.get('/api/users/?fields=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/users/?fields=skills.level').status_code, 400)
+
+    def test_team_members_collapse_unless_expanded(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/teams/?fields=id,name,members')
+        team = res.json()[0]
+        self.assertEqual(set(team), {'id', 'name', 'members'})
+        self.assertEqual(team['members'][0]['user'], self.users[0].id)
+        self.assertFalse([q for q in ctx.captured_queries if 'team_userskill' in q['sql'] or 'team_user"' in q['sql']])
+
+        team = self.client.get('/api/teams/?fields=name,members.role,members.user.username').json()[0]
+        self.assertEqual(team['members'][0], {'role': 'dev', 'user': {'username': 'u0'}})
+        team = self.client.get(f'/api/teams/{self.team.id}/?expand=members.user').json()
+        self.assertEqual(team['required_skills'], [self.python.id])
+        self.assertNotIn('skills', team['members'][0]['user'])
+        self.assertIn('skills', self.client.get('/api/teams/').json()[0]['members'][0]['user'])
+        self.assertEqual(self.client.get('/api/teams/?expand=members.nope').status_code, 400)
+
+    def test_match_fields(self):
+        rows = self.client.get('/api/match/?skills=python&fields=username,match_score').json()
+        self.assertEqual(rows[0], {'username': 'u0', 'match_score': 3})
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(PROFILE_DIR=tmp.name, PROFILE_MAX_ENTRIES=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff = User.objects.create(username='ops', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        UserSkill.objects.create(user=self.staff, skill=Skill.objects.create(name='python'))
+
+    def test_staff_capture_is_listed_with_sql_and_hotspots(self):
+        res = self.client.get('/api/match/?skills=python&profile=1')
+        self.assertEqual(res.status_code, 200)
+        capture_id = res['X-Profile-Id']
+
+        listing = self.client.get('/api/profiles/').json()
+        self.assertEqual([c['id'] for c in listing], [capture_id])
+        self.assertEqual(listing[0]['path'], '/api/match/?skills=python&profile=1')
+        self.assertEqual(listing[0]['user'], 'ops')
+
+        detail = self.client.get(f'/api/profiles/{capture_id}/?sort=tottime&limit=5').json()
+        self.assertGreater(detail['query_count'], 0)
+        self.assertEqual(len(detail['queries']), detail['query_count'])
+        self.assertEqual(len(detail['hotspots']), 5)
+        self.assertEqual(self.client.get('/api/profiles/1-2/').status_code, 404)
+
+        out = StringIO()
+        call_command('profile_hotspots', 'latest', '--limit', '3', stdout=out)
+        self.assertIn('GET /api/match/?skills=python&profile=1 -> 200', out.getvalue())
+        self.assertIn('Slowest SQL:', out.getvalue())
+
+    def test_ring_buffer_keeps_newest(self):
+        ids = [self.client.get('/api/skills/', HTTP_X_PROFILE='1')['X-Profile-Id'] for _ in range(3)]
+        self.assertEqual([c['id'] for c in profiling.list_captures()], ids[:0:-1])
+
+    @patch('team.profiling.SamplingProfiler', None)
+    def test_busy_profiler_serves_request_unprofiled(self):
+        with profiling._cprofile_lock:
+            res = self.client.get('/api/skills/?profile=1')
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Profile-Id', res)
+
+        with patch('cProfile.Profile.enable', side_effect=ValueError("Another profiling tool is already active")):
+            res = self.client.get('/api/skills/?profile=1')
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(profiling.list_captures(), [])
+        self.assertIn('X-Profile-Id', self.client.get('/api/skills/?profile=1'))
+
+    def test_non_staff_is_not_profiled(self):
+        self.client.force_authenticate(User.objects.create(username='dev'))
+        res = self.client.get('/api/skills/?profile=1')
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(profiling.list_captures(), [])
+        self.assertEqual(self.client.get('/api/profiles/').status_code, 403)
+
+
+class ReadinessMatrixTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='exec', password='x'))
+        python, django, sql, go = (Skill.objects.create(name=n) for n in ['python', 'django', 'sql', 'go'])
+        self.web = Team.objects.create(name='Web')
+        self.web.required_skills.set([python, django])
+        self.data = Team.objects.create(name='Data')
+        self.data.required_skills.set([python, sql, go])
+        self.empty = Team.objects.create(name='Empty')
+
+        self.ann = User.objects.create(username='ann')
+        self.bob = User.objects.create(username='bob')
+        for user, skills in [(self.ann, [python, django]), (self.bob, [sql])]:
+            for skill in skills:
+                UserSkill.objects.create(user=user, skill=skill, level='beginner')
+
+    def test_matches_pairwise_gap_analysis(self):
+        rows = {(r['user_id'], r['team_id']): r for r in self.client.get('/api/readiness-matrix/?refresh=1').data['results']}
+        self.assertEqual(set(rows), {(self.ann.id, self.web.id), (self.ann.id, self.data.id), (self.bob.id, self.data.id)})
+        self.assertEqual(rows[(self.ann.id, self.web.id)]['readiness'], 100)
+        self.assertEqual(rows[(self.ann.id, self.data.id)]['matched'], 1)
+        self.assertEqual(rows[(self.ann.id, self.data.id)]['missing'], 2)
+        self.assertEqual(rows[(self.bob.id, self.data.id)]['readiness'], 33)
+
+    def test_filters_and_paging(self):
+        matrix = ReadinessMatrix.build()
+        with patch('team.views.get_matrix', return_value=matrix):
+            res = self.client.get(f'/api/readiness-matrix/?team={self.data.id}&limit=1&offset=1')
+            self.assertEqual(res.data['total'], 2)
+            self.assertEqual([r['user_id'] for r in res.data['results']], [self.bob.id])
+
+            res = self.client.get('/api/readiness-matrix/?min_readiness=50')
+            self.assertEqual([(r['user_id'], r['team_id']) for r in res.data['results']], [(self.ann.id, self.web.id)])
+
+            res = self.client.get(f'/api/readiness-matrix/?team={self.data.id}&min_readiness=50')
+            self.assertEqual(res.data['results'], [])
+            res = self.client.get(f'/api/readiness-matrix/?team={self.empty.id}')
+            self.assertEqual(res.data['total'], 0)
+
+    def test_rejects_malformed_filters(self):
+        res = self.client.get('/api/readiness-matrix/?team=abc')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data['error'], "team must be a team id")
+        res = self.client.get('/api/readiness-matrix/?min_readiness=high')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data['error'], "min_readiness must be a number")
+
+    def test_selection_reuses_the_built_pairs(self):
+        matrix = ReadinessMatrix.build()
+        with patch.object(sparse.csr_matrix, 'tocoo', side_effect=AssertionError("rebuilt per request")):
+            self.assertEqual(len(matrix.select()['user_id']), 3)
+            self.assertEqual(list(matrix.select(team_id=self.data.id)['user_id']), [self.ann.id, self.bob.id])
+
+    def test_export_command_writes_ndjson(self):
+        out = StringIO()
+        call_command('export_readiness', format='ndjson', team=self.data.id, stdout=out, stderr=StringIO())
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(r['user_id'], r['missing']) for r in rows], [(self.ann.id, 2), (self.bob.id, 2)])
+
+
+class QueryBudgetTest(TestCase):
+    """Endpoints must run a fixed number of queries regardless of result size."""
+
+    def setUp(self):
+        caches['default'].clear()
+        skill_index.invalidate()
+        skill_resolver.invalidate()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='admin', password='adminpass')
+        self.client.force_authenticate(self.admin)
+        self.python = Skill.objects.create(name='python')
+        self.django = Skill.objects.create(name='django')
+        self.team = Team.objects.create(name='Platform')
+        self.team.required_skills.set([self.python, self.django])
+
+    def add_users(self, count):
+        start = User.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(start, start + count):
+                user = User.objects.create(username=f'user{i}')
+                UserSkill.objects.create(user=user, skill=self.python, level='advanced')
+                UserSkill.objects.create(user=user, skill=self.django, level='beginner')
+                TeamRole.objects.create(team=self.team, user=user, role='dev')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertFixedQueries(self, url, budget):
+        self.add_users(2)
+        small = self.count_queries(url)
+        self.add_users(20)
+        large = self.count_queries(url)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, budget)
+
+    def test_user_list_budget(self):
+        self.assertFixedQueries('/api/users/', 2)
+
+    def test_match_budget(self):
+        self.client.get('/api/match/?skills=python')  # build the index outside the budget
+        self.assertFixedQueries('/api/match/?skills=python,django', 4)  # 3 + the index's version check
+
+    def test_team_list_budget(self):
+        Team.objects.create(name='Empty')
+        self.assertFixedQueries('/api/teams/', 5)  # 4 + the catalog version lookup
@@ -1,12 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'users', views.UserViewSet, basename='user')
 router.register(r'skills', views.SkillViewSet, basename='skill')
 router.register(r'teams', views.TeamViewSet, basename='team')
+router.register(r'jobs', views.JobViewSet, basename='job')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -17,8 +18,19 @@ urlpatterns = [
     # Function-based API endpoints
     path('api/match/', views.match_user_by_skills),
     path('api/skill-gap/', views.skill_gap_analysis),
+    path('api/readiness-matrix/', views.readiness_matrix_view),
+    path('api/changes/', views.changes_view),
     path('api/extract-skills/', views.SkillExtractionView.as_view()),
+    path('api/extract-skills/batch/', views.SkillBatchExtractionView.as_view()),
     path('api/register/', views.RegisterView.as_view()),
+    path('api/llm-cache/', views.llm_cache_stats),
+    path('api/metrics/', views.metrics_view),
+    path('api/profiles/', views.profiles_view),
+    path('api/profiles/<str:capture_id>/', views.profile_detail_view),
+
+    # Async (ASGI) variants of the Gemini-backed endpoints
+    path('api/async/skill-gap/', async_views.skill_gap_analysis_async),
+    path('api/async/extract-skills/', async_views.extract_skills_async),
 
     # Web pages (HTML views)
     path('dashboard/', views.dashboard_view, name='dashboard'),
@@ -0,0 +1,143 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, parse_etags
+
+from .models import CatalogVersion
+
+'''
+Version counters for conditional GETs on the catalog lists (/api/skills/,
+/api/teams/).
+
+Writes to Skill, Team (and its required skills), TeamRole, UserSkill and
+User bump a CatalogVersion row once per transaction, after commit (see
+team/signals.py; bulk writers call bump() themselves). A list's strong ETag
+is a hash of the versions it depends on plus the path and renderer, so
+  - If-None-Match / If-Modified-Since that still match get a 304, and
+  - rendered JSON bodies are cached under the ETag in CATALOG_CACHE_ALIAS;
+    a stale entry is never read again because the key moves on.
+Either way an unchanged poll costs the one CatalogVersion lookup.
+Versions are read before the data, so a body can only be newer than its tag.
+'''
+
+SKILL, TEAM, TEAM_ROLE, USER_SKILL, USER = 'skill', 'team', 'teamrole', 'userskill', 'user'
+
+
+_listeners = {}
+
+
+def on_bump(name, listener):
+    """Call listener(new version) after each bump of name this process commits."""
+    _listeners.setdefault(name, []).append(listener)
+
+
+def _bump_now(name):
+    """Returns the new version; the one before it was version - 1, as the row stays locked until commit."""
+    now = timezone.now()
+    with transaction.atomic():
+        if not CatalogVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now):
+            _, created = CatalogVersion.objects.get_or_create(name=name, defaults={'version': 1, 'updated_at': now})
+            if not created:
+                CatalogVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+        return CatalogVersion.objects.filter(name=name).values_list('version', flat=True).get()
+
+
+class _Bump:
+    __slots__ = ('name', 'done')
+
+    def __init__(self, name):
+        self.name, self.done = name, False
+
+    def __call__(self):
+        self.done = True
+        version = _bump_now(self.name)
+        for listener in _listeners.get(self.name, ()):
+            listener(version)
+
+
+def _pending():
+    """
+    {name: _Bump} queued in the current transaction. Django starts a new
+    run_on_commit list after each commit or rollback, so the dict is kept
+    with the list it belongs to and starts over when the list changes.
+    """
+    hooks = connection.run_on_commit
+    state = getattr(connection, '_pending_bumps', None)
+    if state is None or state[0] is not hooks:
+        state = connection._pending_bumps = (hooks, {})
+    return state[1]
+
+
+def bump(*names):
+    """Bump each resource once when the current transaction commits (now, outside one)."""
+    pending = _pending()
+    for name in names:
+        queued = pending.get(name)
+        if queued is None or queued.done:
+            pending[name] = queued = _Bump(name)
+            transaction.on_commit(queued)
+
+
+def current(names):
+    """
+    ({name: "version@timestamp"}, last modified datetime or None) for names.
+    The timestamp keeps tags unique if the table is ever reset under a shared cache.
+    """
+    rows = CatalogVersion.objects.filter(name__in=names).values_list('name', 'version', 'updated_at')
+    versions, modified = dict.fromkeys(names, '0'), None
+    for name, version, updated_at in rows:
+        versions[name] = f"{version}@{updated_at.timestamp()}"
+        modified = updated_at if modified is None or updated_at > modified else modified
+    return versions, modified
+
+
+def _not_modified(request, etag, modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        tags = parse_etags(if_none_match)
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    # HTTP dates drop the fraction, so a change later in the second Last-Modified names must not match it
+    return since is not None and modified is not None and modified.timestamp() <= since
+
+
+def conditional_list(request, names, build):
+    """
+    Serve a list view that depends on the resources in names. build() runs the
+    normal list and returns a DRF Response; it is skipped on a 304 or a cache hit.
+    """
+    versions, modified = current(names)
+    renderer = request.accepted_renderer
+    source = f"{request.get_full_path()}|{request.accepted_media_type}|" + \
+        ','.join(f"{name}={versions[name]}" for name in names)
+    digest = hashlib.sha256(source.encode()).hexdigest()[:32]
+    etag = f'"{digest}"'
+
+    if _not_modified(request, etag, modified):
+        response = HttpResponseNotModified()
+    elif renderer.format == 'json':
+        cache = caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+        key = f"catalog:{digest}"
+        body = cache.get(key)
+        if body is None:
+            built = build()
+            if built.status_code != 200:
+                return built
+            body = renderer.render(built.data, request.accepted_media_type, {'request': request})
+            cache.set(key, body, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600))
+        response = HttpResponse(body, content_type=request.accepted_media_type)
+    else:
+        response = build()
+
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Accept', 'Authorization', 'Cookie'))
+    return response
@@ -1,29 +1,104 @@
+from django.http import HttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes, action
-from rest_framework.permissions import IsAuthenticated
+import json
+import time
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from django.conf import settings
 from decouple import config
 from django.contrib.auth.decorators import login_required
-import google.generativeai as genai
-import os
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
-from .models import User, Skill, Team, UserSkill
+from .models import User, Skill, Team, TeamRole, UserSkill, Job
+from . import changes, llm, metrics, pagination, profiling, readiness, versions
+from .analysis import extraction_mode, local_extraction, merge_llm_skills, skill_gap
+from .batch_extraction import extract_batch
+from .composition import compose_team
+from .matching import match_team_readiness, rank_team_candidates, run_match
+from .readiness_matrix import get_matrix, iter_rows
+from .jobs import JobPayloadError, submit
+from .skill_index import LEVEL_SCORES
+from .skill_resolver import skill_resolver
+from .skill_suggest import skill_suggester
+from .skill_sync import SkillPayloadError, canonicalize_entries, parse_skill_entries, replace_user_skills
 from .serializers import (
+    Shape,
     SkillSerializer,
     TeamSerializer,
     UserSerializer,
     UserSkillSerializer,
     RegisterSerializer,
+    JobSerializer,
+    UserShortSerializer,
+    ChangeSerializer,
 )
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class ShapedViewSetMixin:
+    """
+    ?fields=id,name&expand=members.user on list and retrieve (see serializers.Shape).
+    The queryset only joins and prefetches what the requested shape renders.
+    """
+    shape = None
+
+    def read_shape(self, request):
+        self.shape = Shape.from_request(request, self.get_serializer_class())
+
+    def get_queryset(self):
+        return self.get_serializer_class().setup_eager_loading(super().get_queryset(), self.shape)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('shape', self.shape)
+        return super().get_serializer(*args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            self.read_shape(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return super().retrieve(request, *args, **kwargs)
+
+
+class UserViewSet(ShapedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, pagination.NDJSONRenderer]
+
+    def list(self, request, *args, **kwargs):
+        """
+        GET /api/users/?page_size=100&cursor=<X-Next-Cursor>&fields=id,username
+        Without page_size or cursor the whole list comes back, as before; with them
+        users are keyset-paged by id. Accept: application/x-ndjson streams one user per line.
+        Skills are left out once fields or expand is given, unless expand=skills.
+        """
+        try:
+            self.read_shape(request)
+            size = pagination.page_size(request)
+            cursor = request.GET.get('cursor')
+            after = pagination.decode_cursor(cursor, 1) if cursor else None
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if size is None and not pagination.wants_ndjson(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_queryset().order_by('id')
+        if after is not None:
+            queryset = queryset.filter(id__gt=after[0])
+        headers = {}
+        if size is not None:
+            # id of this page's last row, if another row follows it
+            ids = list(queryset.values_list('id', flat=True)[size - 1:size + 1])
+            headers = pagination.next_page_headers(request, ids[:1] if len(ids) == 2 else None)
+            queryset = queryset[:size]
+
+        if pagination.wants_ndjson(request):
+            chunk_size = getattr(settings, 'API_STREAM_CHUNK_SIZE', 500)
+            rows = (self.get_serializer(user).data for user in queryset.iterator(chunk_size=chunk_size))
+            return pagination.stream(rows, headers)
+        return Response(self.get_serializer(queryset, many=True).data, headers=headers)
 
     @action(detail=True, methods=['post'], url_path='set-skills')
     def set_skills(self, request, pk=None):
@@ -31,88 +106,233 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         POST /api/users/<id>/set-skills/
         Accepts list like:
         [{"name": "python", "level": "advanced", "experience_years": 2}]
+        Names go through the skill resolver (aliases, spelling variants); a close
+        existing name is not applied but comes back in "resolved" as "suggestion".
         """
         user = self.get_object()
-        skills_data = request.data.get("skills", [])
-
-        if not isinstance(skills_data, list):
-            return Response({"error": "skills must be a list of skill dicts"}, status=400)
+        try:
+            entries, resolved = canonicalize_entries(parse_skill_entries(request.data.get("skills", [])))
+        except SkillPayloadError as e:
+            return Response({"error": str(e)}, status=400)
 
-        UserSkill.objects.filter(user=user).delete()
+        replace_user_skills({user.id: entries})
+        return Response({"message": "Skills updated successfully", "resolved": resolved})
 
-        for entry in skills_data:
-            name = entry.get("name")
-            level = entry.get("level", "beginner").lower()
-            years = entry.get("experience_years", 0)
-            active = entry.get("is_active", True)
+    @action(detail=False, methods=['post'], url_path='bulk-set-skills')
+    def bulk_set_skills(self, request):
+        """
+        POST /api/users/bulk-set-skills/
+        Accepts many users at once, same skill format as set-skills:
+        {"users": [{"user_id": 1, "skills": [{"name": "python", "level": "advanced"}]}]}
+        Users are written in chunks of BULK_SET_SKILLS_CHUNK_SIZE, one transaction per chunk.
+        Invalid items are reported in "errors" and do not block the rest.
+        """
+        items = request.data.get("users", [])
+        if not isinstance(items, list):
+            return Response({"error": "users must be a list of {user_id, skills} dicts"}, status=400)
 
-            if not name:
+        errors = []
+        parsed = []
+        for i, item in enumerate(items):
+            try:
+                if not isinstance(item, dict) or not item.get("user_id"):
+                    raise SkillPayloadError("user_id required")
+                entries, _ = canonicalize_entries(parse_skill_entries(item.get("skills", [])))
+                parsed.append((i, int(item["user_id"]), entries))
+            except (SkillPayloadError, TypeError, ValueError) as e:
+                errors.append({"index": i, "error": str(e)})
+
+        known = set(User.objects.filter(id__in=[uid for _, uid, _ in parsed]).values_list('id', flat=True))
+        chunk_size = getattr(settings, 'BULK_SET_SKILLS_CHUNK_SIZE', 500)
+        totals = {"users": 0, "created": 0, "updated": 0, "deleted": 0}
+        chunk = {}
+
+        def flush():
+            created, updated, deleted = replace_user_skills(chunk)
+            totals["users"] += len(chunk)
+            totals["created"] += created
+            totals["updated"] += updated
+            totals["deleted"] += deleted
+            chunk.clear()
+
+        for i, user_id, entries in parsed:
+            if user_id not in known:
+                errors.append({"index": i, "error": "User not found"})
                 continue
+            chunk[user_id] = entries
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+
+        return Response({**totals, "errors": errors})
 
-            skill, _ = Skill.objects.get_or_create(name=name.lower())
-            UserSkill.objects.create(
-                user=user,
-                skill=skill,
-                level=level,
-                experience_years=years,
-                is_active=active
-            )
 
-        return Response({"message": "Skills updated successfully"})
+def _parse_page_params(request, default_limit=None):
+    """Read ?limit= and ?offset= from the query string."""
+    if default_limit is None:
+        default_limit = getattr(settings, 'SKILL_MATCH_DEFAULT_LIMIT', None)
+    limit = request.GET.get('limit', default_limit)
+    offset = request.GET.get('offset', 0)
+    try:
+        limit = None if limit in (None, '') else int(limit)
+        offset = int(offset or 0)
+    except (TypeError, ValueError):
+        raise ValueError("limit and offset must be integers")
+    if (limit is not None and limit < 0) or offset < 0:
+        raise ValueError("limit and offset must be non-negative")
+    return limit, offset
+
+
+def _match_rows(page, total_required, chunk_size=None, shape=None):
+    """Serialized /api/match/ rows for page, loading users chunk_size at a time (all at once if None)."""
+    chunk_size = chunk_size or len(page) or 1
+    queryset = UserSerializer.setup_eager_loading(User.objects.all(), shape)
+    for start in range(0, len(page), chunk_size):
+        chunk = page[start:start + chunk_size]
+        users = queryset.in_bulk([m['user_id'] for m in chunk])
+        for match in chunk:
+            matched_count = match.get('matched_count', len(match['skills_matched']))
+            serializer = UserSerializer(
+                users[match['user_id']],
+                context={'matched_count': matched_count,
+                         'required_count': match.get('required_count', total_required)},
+                shape=shape,
+            )
+            user_data = serializer.data
+            for name, value in (('match_score', match['score']), ('skills_matched', match['skills_matched'])):
+                if name in serializer.fields:
+                    user_data[name] = value
+            yield user_data
 
 
 @api_view(['GET'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, pagination.NDJSONRenderer])
 @permission_classes([IsAuthenticated])
 def match_user_by_skills(request):
     """
-    GET /api/match/?skills=python,django
+    GET /api/match/?skills=python,django&limit=20&offset=0
+    GET /api/match/?team=<id>  (users ordered by readiness for the team, from TeamReadiness)
     Returns users with score, matched skill details, and readiness %.
+    Only the requested page is ranked (top-k); X-Total-Count holds the number of matches.
+    When more follow, X-Next-Cursor / Link give ?cursor= for the next page (keyset, no offset).
+    Skill terms are resolved through aliases and typo matching; X-Skill-Resolution
+    holds a JSON list saying how each one was resolved.
+    Accept: application/x-ndjson streams one user per line; fields= / expand= shape
+    each user as on /api/users/.
     """
     permission_classes = [IsAuthenticated]
     skill_names = request.GET.get('skills')
-    if not skill_names:
+    team_id = request.GET.get('team')
+    if not skill_names and not team_id:
         return Response({
             "error": "Please provide a comma-separated list of skills, e.g. ?skills=python,django"
         }, status=400)
 
-    skill_list = [s.strip().lower() for s in skill_names.split(',')]
-    matching_skills = Skill.objects.filter(name__in=skill_list)
-    skill_ids = matching_skills.values_list('id', flat=True)
-
-    LEVEL_SCORES = {'beginner': 1, 'intermediate': 2, 'advanced': 3}
+    try:
+        limit, offset = _parse_page_params(request)
+        cursor = request.GET.get('cursor')
+        after = pagination.decode_cursor(cursor, 2) if cursor else None
+        shape = Shape.from_request(request, UserSerializer)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    if after is not None and offset:
+        return Response({"error": "use either offset or cursor, not both"}, status=400)
+    if after is not None and limit is None:
+        limit = getattr(settings, 'API_PAGE_SIZE', 100)
+    # one row past the page says whether there is a next one
+    fetch = None if limit is None else limit + 1
+
+    headers = {}
+    if team_id:
+        team = Team.objects.filter(pk=team_id).first() if team_id.isdigit() else None
+        if team is None:
+            return Response({"error": "Team not found"}, status=404)
+        total, page = match_team_readiness(team, limit=fetch, offset=offset, after=after)
+        total_required = 0
+    else:
+        skill_list = [s.strip().lower() for s in skill_names.split(',')]
+        resolved = skill_resolver.resolve_many(skill_list)
+        names = [r['skill'] for r in resolved if r['skill']]
+        matching_skills = dict(Skill.objects.filter(name__in=names).values_list('id', 'name'))
+        total, page = run_match(matching_skills, limit=fetch, offset=offset, after=after)
+        # aliases of one skill count once; terms the catalog does not know still count as missing
+        unknown = {r['term'] for r in resolved if not r['skill'] and r['term']}
+        total_required = len(matching_skills) + len(unknown)
+        headers['X-Skill-Resolution'] = json.dumps(resolved)
+
+    more = limit is not None and len(page) > limit
+    page = page[:limit]
+    headers.update(pagination.next_page_headers(request, page[-1]['cursor'] if more else None))
+    headers['X-Total-Count'] = str(total)
+    if pagination.wants_ndjson(request):
+        chunk_size = getattr(settings, 'API_STREAM_CHUNK_SIZE', 500)
+        return pagination.stream(_match_rows(page, total_required, chunk_size, shape), headers)
+    return Response(list(_match_rows(page, total_required, shape=shape)), headers=headers)
 
-    matched_users = {}
-    user_skills = UserSkill.objects.filter(skill__id__in=skill_ids).select_related('user', 'skill')
 
-    for us in user_skills:
-        uid = us.user.id
-        if uid not in matched_users:
-            matched_users[uid] = {'user': us.user, 'score': 0, 'skills_matched': []}
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def readiness_matrix_view(request):
+    """
+    GET /api/readiness-matrix/?team=<id>&min_readiness=50&limit=1000&offset=0
+    Matched/missing counts and readiness % for every (user, team) pair, computed
+    without the LLM from one sparse product. Pairs with no matched skill are omitted.
+    """
+    try:
+        limit, offset = _parse_page_params(request, getattr(settings, 'READINESS_MATRIX_PAGE_SIZE', 1000))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    team_id = request.GET.get('team')
+    if team_id and not team_id.isdigit():
+        return Response({"error": "team must be a team id"}, status=400)
+    team_id = int(team_id) if team_id else None
+    try:
+        min_readiness = float(request.GET.get('min_readiness', 0))
+    except ValueError:
+        return Response({"error": "min_readiness must be a number"}, status=400)
 
-        score = LEVEL_SCORES.get(us.level.lower(), 0)
-        matched_users[uid]['score'] += score
-        matched_users[uid]['skills_matched'].append({
-            'skill': us.skill.name,
-            'level': us.level,
-            'score': score
-        })
+    matrix = get_matrix(refresh=request.user.is_staff and llm.wants_refresh(request))
+    selection = matrix.select(team_id=team_id, min_readiness=min_readiness)
+    end = None if limit is None else offset + limit
+    return Response({
+        "total": len(selection['user_id']),
+        "results": list(iter_rows(selection, offset, end)),
+    })
 
-    sorted_users = sorted(matched_users.values(), key=lambda x: x['score'], reverse=True)
 
-    result = []
-    total_required = len(skill_list)
-    for match in sorted_users:
-        matched_count = len(match['skills_matched'])
-        serializer = UserSerializer(
-            match['user'],
-            context={'matched_count': matched_count, 'required_count': total_required}
-        )
-        user_data = serializer.data
-        user_data['match_score'] = match['score']
-        user_data['skills_matched'] = match['skills_matched']
-        result.append(user_data)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def changes_view(request):
+    """
+    GET /api/changes/?since=<cursor>&limit=500
+    Creates, updates and deletes of skills, teams, team roles, user skills and
+    required skills (team_skill) after the cursor, oldest first. Keep "cursor"
+    for the next call; has_more says whether to call again straight away.
+    Without since the feed starts at the beginning; since=latest returns no
+    changes, just a cursor for "now" (take it before a full sync).
+    """
+    since = request.GET.get('since', '')
+    if since == 'latest':
+        return Response({"changes": [], "cursor": pagination.encode_cursor([changes.latest()]), "has_more": False})
+    try:
+        after = pagination.decode_cursor(since, 1)[0] if since else 0
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    max_limit = getattr(settings, 'CHANGE_FEED_MAX_PAGE_SIZE', 5000)
+    try:
+        limit = int(request.GET.get('limit', getattr(settings, 'CHANGE_FEED_PAGE_SIZE', 500)))
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=400)
+    if not 1 <= limit <= max_limit:
+        return Response({"error": f"limit must be between 1 and {max_limit}"}, status=400)
 
-    return Response(result)
+    rows, more = changes.since(after, limit)
+    return Response({
+        "changes": ChangeSerializer(rows, many=True).data,
+        "cursor": pagination.encode_cursor([rows[-1].position if rows else after]),
+        "has_more": more,
+    })
 
 
 @api_view(['POST'])
@@ -133,24 +353,12 @@ def skill_gap_analysis(request):
     except Team.DoesNotExist:
         return Response({'error': 'Team not found'}, status = 400)
 
-    user_skills = set(UserSkill.objects.filter(user=user).values_list('skill__name', flat=True))
-    team_skills = set(team.required_skills.values_list('name', flat=True))
-
-    matched = list(user_skills & team_skills)
-    missing = list(team_skills - user_skills)
-
-    prompt = (
-        f"User has the following skills: {', '.join(matched)}.\n"
-        f"Team requires: {', '.join(team_skills)}.\n"
-        f"Write a short summary of the user's readiness, skills they still need, and an encouraging message. "
-        f"Include an estimated readiness percentage."
-    )
+    matched, missing, team_skills = skill_gap(user, team)
+    matched_count, required_count, score = readiness.lookup(user.id, team.id)
+    prompt = llm.gap_analysis_prompt(matched, team_skills)
 
     try:
-        genai.configure(api_key = GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-1.5-pro')
-        response = model.generate_content(prompt)
-        summary = response.text
+        summary = llm.generate(prompt, refresh=llm.wants_refresh(request))
     except Exception as e:
         summary = f"Gemini AI summary failed: {e}"
 
@@ -159,6 +367,7 @@ def skill_gap_analysis(request):
         'team': team.name,
         'matched_skills': matched,
         "missing_skills": missing,
+        "readiness": {"matched_count": matched_count, "required_count": required_count, "score": round(score)},
         "summary": summary
     })
 
@@ -166,19 +375,136 @@ class SkillViewSet(viewsets.ModelViewSet):
     """
      Standard CRUD API for Skill objects
      GET, POST, PUT, DELETE /api/skills/
+     The list carries an ETag/Last-Modified and answers 304 while no skill changed.
      """
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
     permission_classes = [IsAuthenticated]
 
-class TeamViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        return versions.conditional_list(request, [versions.SKILL], lambda: super(SkillViewSet, self).list(request))
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        GET /api/skills/suggest/?q=pyt&limit=10
+        Skills whose name starts with q, most held first, from an in-memory trie.
+        """
+        prefix = request.GET.get('q', '').strip()
+        if not prefix:
+            return Response({"error": "Please provide a prefix, e.g. ?q=pyt"}, status=400)
+        max_limit = getattr(settings, 'SKILL_SUGGEST_MAX_LIMIT', 50)
+        try:
+            limit = int(request.GET.get('limit', getattr(settings, 'SKILL_SUGGEST_LIMIT', 10)))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        if not 1 <= limit <= max_limit:
+            return Response({"error": f"limit must be between 1 and {max_limit}"}, status=400)
+        return Response(skill_suggester.suggest(prefix, limit))
+
+class TeamViewSet(ShapedViewSetMixin, viewsets.ModelViewSet):
     """
     Standard CRUD API for Team objects
     GET, POST, PUT, DELETE /api/teams/
+    The list nests members and their skills, so its ETag follows all of those.
+    GET /api/teams/?fields=id,name,members.role&expand=members.user trims the nesting:
+    once fields or expand is given, members carry user ids unless expand=members.user.
     """
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
     permission_classes = [IsAuthenticated]
+    LIST_DEPENDS_ON = [versions.TEAM, versions.TEAM_ROLE, versions.USER, versions.USER_SKILL, versions.SKILL]
+
+    def list(self, request, *args, **kwargs):
+        try:
+            self.read_shape(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return versions.conditional_list(request, self.LIST_DEPENDS_ON, lambda: super(TeamViewSet, self).list(request))
+
+    @action(detail=True, methods=['get'])
+    def candidates(self, request, pk=None):
+        """
+        GET /api/teams/<id>/candidates/?min_readiness=50&limit=20&offset=0&exclude_members=1
+        Users ranked by coverage of the team's required skills, then by level/experience.
+        Users with an active role on the team are left out unless exclude_members=0.
+        """
+        team = Team.objects.filter(pk=pk).first()
+        if team is None:
+            return Response({"error": "Team not found"}, status=404)
+        try:
+            limit, offset = _parse_page_params(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        try:
+            min_readiness = float(request.query_params.get('min_readiness', 0))
+        except ValueError:
+            return Response({"error": "min_readiness must be a percentage"}, status=400)
+
+        required = dict(team.required_skills.values_list('id', 'name'))
+        exclude = ()
+        if request.query_params.get('exclude_members', '1').lower() not in ('0', 'false', 'no'):
+            exclude = TeamRole.objects.filter(team=team, is_active=True).values_list('user_id', flat=True)
+
+        total, page = rank_team_candidates(required, exclude=exclude, min_readiness=min_readiness,
+                                           limit=limit, offset=offset)
+        users = User.objects.in_bulk([entry['user_id'] for entry in page])
+        results = []
+        for entry in page:
+            user_data = UserShortSerializer(users[entry.pop('user_id')]).data
+            results.append({**user_data, **entry})
+
+        return Response({
+            "team": team.name,
+            "required_skills": sorted(required.values()),
+            "total": total,
+            "results": results,
+        })
+    @action(detail=True, methods=['get'])
+    def compose(self, request, pk=None):
+        """
+        GET /api/teams/<id>/compose/?min_level=intermediate&max_size=5&keep_members=1&exclude_busy=0
+        A near-minimal set of users that together cover the team's required skills
+        at min_level or above (active UserSkill rows only). Active members are kept
+        and counted first unless keep_members=0; exclude_busy=1 skips users with an
+        active role on another team.
+        """
+        team = Team.objects.filter(pk=pk).first()
+        if team is None:
+            return Response({"error": "Team not found"}, status=404)
+        params = request.query_params
+        min_level = params.get('min_level', 'beginner').lower()
+        if min_level not in LEVEL_SCORES:
+            return Response({"error": f"min_level must be one of {', '.join(LEVEL_SCORES)}"}, status=400)
+        max_size = params.get('max_size')
+        if max_size is not None:
+            if not max_size.isdigit() or int(max_size) < 1:
+                return Response({"error": "max_size must be a positive integer"}, status=400)
+            max_size = int(max_size)
+
+        required = dict(team.required_skills.values_list('id', 'name'))
+        roles = TeamRole.objects.filter(is_active=True)
+        members = ()
+        if params.get('keep_members', '1').lower() not in ('0', 'false', 'no'):
+            members = roles.filter(team=team).values_list('user_id', flat=True)
+        exclude = set()
+        if params.get('exclude_busy', '0').lower() in ('1', 'true', 'yes'):
+            exclude.update(roles.exclude(team=team).values_list('user_id', flat=True))
+
+        plan = compose_team(required, min_level=min_level, members=members, exclude=exclude, max_size=max_size)
+        users = User.objects.in_bulk([entry['user_id'] for entry in plan['roster']])
+        roster = []
+        for entry in plan['roster']:
+            user_data = UserShortSerializer(users[entry.pop('user_id')]).data
+            roster.append({**user_data, **entry})
+
+        return Response({
+            "team": team.name,
+            "required_skills": sorted(required.values()),
+            "coverage": round(len(plan['covered']) * 100 / len(required)) if required else 100,
+            "uncovered_skills": plan['uncovered'],
+            "roster": roster,
+        })
 
 class RegisterView(APIView):
     permission_classes = []
@@ -195,52 +521,174 @@ class RegisterView(APIView):
         return Response(serializer.errors, status = 400)
 
 
-import ast
-import re
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-
 class SkillExtractionView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        """
+        POST /api/extract-skills/?mode=local|llm|hybrid
+        local: dictionary extractor only; llm: Gemini only;
+        hybrid: dictionary first, Gemini only when local recall looks low.
+        Gemini's terms are mapped to canonical skills; "resolved" says how.
+        """
         text = request.data.get("text", "")
         if not text:
             return Response({"error": "Missing 'text' field"}, status=400)
 
-        prompt = (
-            "Extract and return a list of programming and technical skills mentioned in this text.\n\n"
-            f"{text}\n\n"
-            "Return ONLY a Python list of lowercase skill names, like: ['django', 'react', 'gcp'].\n"
-            "Do not explain or add formatting — just output the list."
-        )
+        try:
+            mode = extraction_mode(request.data.get("mode") or request.query_params.get("mode"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        local_skills, needs_llm = local_extraction(text, mode)
+        if not needs_llm:
+            return Response({"skills": local_skills, "mode": mode, "llm_used": False})
+
+        prompt = llm.extraction_prompt(text)
 
         try:
-            genai.configure(api_key=GEMINI_API_KEY)
-            model = genai.GenerativeModel("gemini-1.5-pro")
-            response = model.generate_content(prompt)
-            raw_output = response.text.strip()
+            raw_output = llm.generate(prompt, refresh=llm.wants_refresh(request)).strip()
 
             # Debug: print Gemini's response in console
             print("\n Gemini raw output:", raw_output)
 
-            # Try strict parsing first
-            try:
-                skills = ast.literal_eval(raw_output)
-                if not isinstance(skills, list):
-                    raise ValueError("Not a list")
-            except Exception:
-                # Fallback: match list-like patterns
-                skills = re.findall(r"['\"]?([a-zA-Z0-9_+\-.#]+)['\"]?", raw_output)
-
-            cleaned = sorted(set(s.lower() for s in skills if isinstance(s, str) and s.strip()))
-            return Response({"skills": cleaned})
+            skills, resolved = merge_llm_skills(local_skills, llm.parse_skill_list(raw_output))
+            return Response({"skills": skills, "mode": mode, "llm_used": True, "resolved": resolved})
 
         except Exception as e:
+            if mode == 'hybrid':
+                return Response({"skills": local_skills, "mode": mode, "llm_used": False,
+                                 "llm_error": f"Gemini AI failed: {str(e)}"})
             return Response({"error": f"Gemini AI failed: {str(e)}"}, status=500)
 
 
+class SkillBatchExtractionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        POST /api/extract-skills/batch/
+        {"documents": [{"id": "cv-1", "text": "..."}, "plain text also works"], "mode": "hybrid"}
+        Returns {"results": [{"id", "skills", "llm_used", "error"}]} in input order.
+        """
+        documents = request.data.get("documents")
+        if not isinstance(documents, list) or not documents:
+            return Response({"error": "documents must be a non-empty list"}, status=400)
+        max_documents = getattr(settings, 'EXTRACT_BATCH_MAX_DOCUMENTS', 500)
+        if len(documents) > max_documents:
+            return Response({"error": f"at most {max_documents} documents per request"}, status=400)
+
+        try:
+            mode = extraction_mode(request.data.get("mode") or request.query_params.get("mode"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        ids, texts = [], []
+        for i, doc in enumerate(documents):
+            if isinstance(doc, dict):
+                ids.append(doc.get("id", i))
+                texts.append(doc.get("text"))
+            else:
+                ids.append(i)
+                texts.append(doc)
+
+        results = extract_batch(texts, mode, refresh=llm.wants_refresh(request))
+        return Response({
+            "mode": mode,
+            "results": [{"id": doc_id, **result} for doc_id, result in zip(ids, results)],
+        })
+
+
+class JobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    POST /api/jobs/ {"kind": "skill_gap", "payload": {"user_id": 1, "team_id": 2}}
+    POST /api/jobs/ {"kind": "extract_skills", "payload": {"text": "..."}}
+        -> 202 with the job; an identical pending/running job is returned instead of a new one.
+    GET /api/jobs/<id>/?wait=10
+        -> the job, long-polling up to `wait` seconds (max JOBS_LONG_POLL_MAX) for it to finish.
+    Jobs are executed by `manage.py run_jobs`.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(created_by=self.request.user)
+
+    def create(self, request):
+        try:
+            job, created = submit(request.data.get('kind'), request.data.get('payload', {}), user=request.user)
+        except JobPayloadError as e:
+            return Response({"error": str(e)}, status=400)
+        data = JobSerializer(job).data
+        data['deduplicated'] = not created
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    def retrieve(self, request, pk=None):
+        job = self.get_object()
+        try:
+            wait = min(float(request.query_params.get('wait', 0)), getattr(settings, 'JOBS_LONG_POLL_MAX', 30))
+        except ValueError:
+            return Response({"error": "wait must be a number of seconds"}, status=400)
+
+        deadline = time.monotonic() + wait
+        while not job.is_done and time.monotonic() < deadline:
+            time.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+            job.refresh_from_db()
+        return Response(JobSerializer(job).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def llm_cache_stats(request):
+    """
+    GET /api/llm-cache/
+    Hit/miss counters for this process's Gemini response cache (staff only).
+    """
+    return Response(llm.response_cache.stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    GET /api/metrics/
+    Per-route histograms of wall, DB, LLM and serializer time, query counts and
+    response sizes for this process, in Prometheus text format (staff only).
+    """
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profiles_view(request):
+    """
+    GET /api/profiles/
+    Stored ?profile=1 captures, newest first: request, status, wall and DB time, query count.
+    """
+    return Response(profiling.list_captures())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_detail_view(request, capture_id):
+    """
+    GET /api/profiles/<id>/?sort=cumulative&limit=25
+    One capture with its SQL log and top functions (pyinstrument captures: its text report).
+    """
+    capture = profiling.load(capture_id)
+    if capture is None:
+        return Response({"error": "Profile not found"}, status=404)
+    sort = request.GET.get('sort', 'cumulative')
+    if sort not in profiling.SORT_KEYS:
+        return Response({"error": f"sort must be one of: {', '.join(profiling.SORT_KEYS)}"}, status=400)
+    try:
+        limit = int(request.GET.get('limit', 25))
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=400)
+    capture['hotspots'] = profiling.hotspots(capture_id, sort, max(1, limit))
+    return Response(capture)
 
 
 @login_required